@@ -0,0 +1,111 @@
+"""Async counterpart of ``http_client.UpstreamClient`` on a shared httpx connection pool.
+
+An async client borrows the rate limiter and retry policy of the sync client for
+the same upstream, so sync and async callers in one process draw on a single
+request budget. Its connection pool is sized by the upstream's ``async_pool_size``.
+"""
+import asyncio
+import logging
+import weakref
+from typing import Dict
+
+import httpx
+
+from .http_client import AdaptiveRateLimiter, RetryPolicy, get_upstream, parse_retry_after, upstream_config
+
+logger = logging.getLogger(__name__)
+
+
+def build_async_client(pool_size: int) -> httpx.AsyncClient:
+    """Keep-alive client holding up to ``pool_size`` connections, shared by every coroutine of one event loop."""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        headers={'Accept-Encoding': 'gzip, deflate'},
+    )
+
+
+class AsyncUpstreamClient:
+    """Rate-limited, retrying async HTTP access to a single upstream service."""
+
+    def __init__(
+        self,
+        name: str,
+        limiter: AdaptiveRateLimiter,
+        retry_policy: RetryPolicy,
+        client: httpx.AsyncClient,
+    ):
+        self.name = name
+        self.limiter = limiter
+        self.retry_policy = retry_policy
+        self.client = client
+
+    async def acquire(self) -> None:
+        while True:
+            wait = self.limiter.reserve()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request, retrying transient failures exactly like ``UpstreamClient.request``."""
+        max_attempts = self.retry_policy.max_attempts
+
+        for attempt in range(max_attempts):
+            is_last_attempt = attempt == max_attempts - 1
+            await self.acquire()
+
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if is_last_attempt:
+                    raise
+                delay = self.retry_policy.delay(attempt)
+                logger.warning(f"{self.name} request failed ({e}), retry {attempt + 1} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            if response.status_code not in self.retry_policy.RETRY_STATUSES or is_last_attempt:
+                if response.status_code < 500 and response.status_code != 429:
+                    self.limiter.on_success()
+                return response
+
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if response.status_code in self.retry_policy.THROTTLE_STATUSES:
+                self.limiter.on_throttle(retry_after)
+
+            delay = self.retry_policy.delay(attempt, retry_after)
+            logger.warning(
+                f"{self.name} returned {response.status_code}, retry {attempt + 1} in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request('POST', url, **kwargs)
+
+
+# An httpx pool is bound to the event loop that opened its connections, so clients are kept per loop.
+_clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, AsyncUpstreamClient]]' = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_async_upstream(name: str) -> AsyncUpstreamClient:
+    """Client for an upstream shared by every coroutine of the running event loop."""
+    clients = _clients.setdefault(asyncio.get_running_loop(), {})
+    client = clients.get(name)
+    if client is None:
+        upstream = get_upstream(name)
+        pool_size = upstream_config(name).get('async_pool_size', 100)
+        client = AsyncUpstreamClient(name, upstream.limiter, upstream.retry_policy, build_async_client(pool_size))
+        clients[name] = client
+    return client
+
+
+async def close_async_upstreams() -> None:
+    """Close the clients of the running event loop, e.g. before ``asyncio.run`` tears the loop down."""
+    clients = _clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.client.aclose()
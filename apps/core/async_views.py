@@ -0,0 +1,424 @@
+"""Async CarAPI proxy views for ASGI deployments.
+
+The views in ``views`` hold a worker thread for as long as their upstream call
+is in flight. These await it on the event loop instead, over one httpx
+connection pool per loop, so a single ASGI worker can keep hundreds of CarAPI
+calls open. Endpoints, params, caching and response bodies are those of the
+sync view each async view wraps, and both share the same cache entries.
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+
+from .async_http import get_async_upstream
+from .singleflight import AsyncSingleFlight
+from .vin import normalize_vin
+from .views import (
+    CarAPIService,
+    GetBodiesAPIView,
+    GetEnginesAPIView,
+    GetMakesAPIView,
+    GetMileagesAPIView,
+    GetModelsAPIView,
+    GetSubmodelsAPIView,
+    GetTrimsAPIView,
+    GetYearsAPIView,
+    VINBatchDecodeAPIView,
+    VINDecodeAPIView,
+    carapi_service,
+    is_true,
+    response_body,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncCarAPIService(CarAPIService):
+    """``CarAPIService`` with coroutine versions of its request path, prefixed with ``a`` as in Django."""
+
+    def __init__(self):
+        super().__init__()
+        self.async_single_flight = AsyncSingleFlight(self.single_flight)
+
+    async def aget_jwt_token(self) -> Optional[str]:
+        token = self.jwt.current()
+        if token:
+            if self.jwt.needs_refresh():
+                self.async_single_flight.refresh('auth', self.arefresh_jwt_token)
+            return token
+
+        if not self.api_token or not self.api_secret:
+            return None
+
+        return await self.async_single_flight.run('auth', self.alogin, self.aread_shared_jwt_token)
+
+    async def aread_shared_jwt_token(self) -> Optional[str]:
+        try:
+            return self.jwt.set(await cache.aget(self.JWT_CACHE_KEY))
+        except Exception as e:
+            logger.warning(f"CarAPI token cache read failed: {e}")
+            return None
+
+    async def arefresh_jwt_token(self) -> Optional[str]:
+        token = await self.aread_shared_jwt_token()
+        if token and not self.jwt.needs_refresh():
+            return token
+        return await self.alogin()
+
+    async def astore_jwt_token(self, token: Optional[str]) -> Optional[str]:
+        token = self.jwt.set(token)
+        if token:
+            try:
+                await cache.aset(self.JWT_CACHE_KEY, token, self.jwt.remaining())
+            except Exception as e:
+                logger.warning(f"CarAPI token cache write failed: {e}")
+        return token
+
+    async def alogin(self) -> Optional[str]:
+        try:
+            response = await get_async_upstream('carapi').post(
+                f"{self.base_url}/auth/login",
+                json={
+                    "api_token": self.api_token,
+                    "api_secret": self.api_secret
+                },
+                timeout=10
+            )
+
+            if response.status_code == 200:
+                return await self.astore_jwt_token(response.json().get('access_token'))
+
+            logger.error(f"Authentication failed: {response.status_code} - {response.text}")
+            return None
+
+        except Exception as e:
+            logger.error(f"Error getting JWT token: {e}")
+            return None
+
+    async def amake_request(self, endpoint: str, params: Optional[Dict] = None, use_v2: bool = False) -> Dict:
+        """Coroutine version of ``make_request``."""
+        if use_v2 and not endpoint.endswith('/v2'):
+            endpoint = endpoint.rstrip('/') + '/v2'
+
+        mirrored = await sync_to_async(self.read_mirror)(endpoint, params)
+        if mirrored is not None:
+            return {'status_code': 200, 'data': mirrored, 'error': None, 'cache': 'MIRROR'}
+
+        ttl = self.cache_ttl(endpoint)
+        if not ttl:
+            return {**await self.arequest_upstream(endpoint, params), 'cache': 'BYPASS'}
+
+        key = self.cache_key(endpoint, params)
+        entry = await self.aread_cache(key)
+        if entry is not None:
+            if entry['fresh_until'] > time.time():
+                return self.cached_result(entry, 'HIT')
+
+            self.async_single_flight.refresh(key, lambda: self.afetch_and_cache(endpoint, params, key, ttl))
+            return self.cached_result(entry, 'STALE')
+
+        return await self.async_single_flight.run(
+            key,
+            lambda: self.afetch_and_cache(endpoint, params, key, ttl),
+            lambda: self.aread_fresh(key),
+        )
+
+    async def alist_all(self, endpoint: str, params: Optional[Dict] = None, use_v2: bool = False) -> Dict:
+        """Coroutine version of ``list_all``; ``pages`` is an async iterator."""
+        params = {key: value for key, value in (params or {}).items() if key != 'page'}
+        key = self.cache_key(f"{endpoint}?all", params)
+        ttl = self.cache_ttl(endpoint)
+
+        entry = await self.aread_cache(key) if ttl else None
+        if entry is not None and entry['fresh_until'] > time.time():
+            data = entry['data']
+            return self.listing_result(data['collection'], aiter_items([data['data']]), 'HIT')
+
+        first = await self.amake_request(endpoint, {**params, 'page': 1}, use_v2=use_v2)
+        if first['status_code'] != 200:
+            return first
+
+        data = first['data'] if isinstance(first['data'], dict) else {'data': first['data']}
+        page_count = int(data.get('collection', {}).get('pages') or 1)
+        if page_count > self.MAX_ALL_PAGES:
+            return {
+                'status_code': status.HTTP_400_BAD_REQUEST,
+                'data': None,
+                'error': f"all=true is limited to {self.MAX_ALL_PAGES} pages, this listing has {page_count}; "
+                         f"narrow the filters or raise limit",
+            }
+
+        collection = {'total': data.get('collection', {}).get('total'), 'pages': page_count}
+        pages = self.aiter_pages(endpoint, params, use_v2, data.get('data', []), page_count, collection, key, ttl)
+        return self.listing_result(collection, pages, first.get('cache'))
+
+    async def aiter_pages(self, endpoint: str, params: Dict, use_v2: bool, first_items: List, page_count: int,
+                          collection: Dict, key: str, ttl: int) -> AsyncIterator[List]:
+        items = list(first_items)
+        yield first_items
+
+        semaphore = asyncio.Semaphore(self.ALL_PAGES_WORKERS)
+
+        async def fetch(page: int) -> Dict:
+            async with semaphore:
+                return await self.amake_request(endpoint, {**params, 'page': page}, use_v2=use_v2)
+
+        page_numbers = range(2, page_count + 1)
+        tasks = [asyncio.ensure_future(fetch(page)) for page in page_numbers]
+        try:
+            for page, task in zip(page_numbers, tasks):
+                page_items = self.page_items(page, await task)
+                items.extend(page_items)
+                yield page_items
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        if ttl:
+            entry = {'data': {'collection': collection, 'data': items}, 'fresh_until': time.time() + ttl}
+            try:
+                await cache.aset(key, entry, ttl)
+            except Exception as e:
+                logger.warning(f"CarAPI cache write failed: {e}")
+
+    async def aread_cache(self, key: str) -> Optional[Dict]:
+        try:
+            return await cache.aget(key)
+        except Exception as e:
+            logger.warning(f"CarAPI cache read failed: {e}")
+            return None
+
+    async def aread_fresh(self, key: str) -> Optional[Dict]:
+        entry = await self.aread_cache(key)
+        if entry is None or entry['fresh_until'] <= time.time():
+            return None
+        return self.cached_result(entry, 'HIT')
+
+    async def afetch_and_cache(self, endpoint: str, params: Optional[Dict], key: str, ttl: int) -> Dict:
+        result = await self.arequest_upstream(endpoint, params)
+        if result['status_code'] == 200 and result['data'] is not None:
+            entry = {'data': result['data'], 'fresh_until': time.time() + ttl}
+            try:
+                await cache.aset(key, entry, ttl + self.STALE_WHILE_REVALIDATE)
+            except Exception as e:
+                logger.warning(f"CarAPI cache write failed: {e}")
+
+        return {**result, 'cache': 'MISS'}
+
+    async def adecode_vin(self, vin: str, basic: bool = False) -> Dict:
+        stored = await sync_to_async(self.read_vin)(vin, basic)
+        if stored is not None:
+            return stored
+
+        return await self.async_single_flight.run(
+            f"vin:{vin}",
+            lambda: self.afetch_vin(vin),
+            lambda: sync_to_async(self.read_vin)(vin),
+        )
+
+    async def adecode_vins(self, vins: List[str], basic: bool = False) -> Dict[str, Dict]:
+        """Coroutine version of ``decode_vins``, with the upstream calls as coroutines on this loop."""
+        results = await sync_to_async(self.read_vins)(vins, basic)
+        missing = [vin for vin in vins if vin not in results]
+        if not missing:
+            return results
+
+        semaphore = asyncio.Semaphore(self.VIN_BATCH_WORKERS)
+
+        async def fetch(vin: str) -> Dict:
+            async with semaphore:
+                return await self.arequest_upstream(f'/vin/{vin}')
+
+        fetched = dict(zip(missing, await asyncio.gather(*(fetch(vin) for vin in missing))))
+        await sync_to_async(self.save_vins)(fetched)
+        results.update({vin: {**result, 'cache': 'MISS'} for vin, result in fetched.items()})
+        return results
+
+    async def afetch_vin(self, vin: str) -> Dict:
+        result = await self.arequest_upstream(f'/vin/{vin}')
+        await sync_to_async(self.save_vins)({vin: result})
+        return {**result, 'cache': 'MISS'}
+
+    async def arequest_upstream(self, endpoint: str, params: Optional[Dict] = None) -> Dict:
+        headers = {'Accept': 'application/json'}
+        jwt_token = await self.aget_jwt_token()
+        if jwt_token:
+            headers['Authorization'] = f'Bearer {jwt_token}'
+
+        client = get_async_upstream('carapi')
+        try:
+            response = await client.get(f"{self.base_url}{endpoint}", params=params, headers=headers, timeout=10)
+
+            if response.status_code == 401:
+                self.jwt.clear(jwt_token)
+                await cache.adelete(self.JWT_CACHE_KEY)
+                jwt_token = await self.aget_jwt_token()
+                if jwt_token:
+                    headers['Authorization'] = f'Bearer {jwt_token}'
+                    response = await client.get(
+                        f"{self.base_url}{endpoint}", params=params, headers=headers, timeout=10
+                    )
+
+            if response.status_code == 403 and 'deprecated' in response.text.lower():
+                if not endpoint.endswith('/v2'):
+                    logger.info(f"Endpoint {endpoint} deprecated, trying v2...")
+                    return await self.arequest_upstream(endpoint.rstrip('/') + '/v2', params)
+
+            return {
+                'status_code': response.status_code,
+                'data': response.json() if response.status_code == 200 else None,
+                'error': response.text if response.status_code != 200 else None,
+                'raw_response': response
+            }
+
+        except httpx.TimeoutException:
+            return {
+                'status_code': 504,
+                'data': None,
+                'error': 'Request timeout'
+            }
+        except Exception as e:
+            return {
+                'status_code': 500,
+                'data': None,
+                'error': str(e)
+            }
+
+
+async def aiter_items(pages: List[List]) -> AsyncIterator[List]:
+    for items in pages:
+        yield items
+
+
+async def astream_listing(result: Dict) -> AsyncIterator[str]:
+    """Async version of ``views.stream_listing``."""
+    yield '{"collection": ' + json.dumps(result['collection']) + ', "data": ['
+    count = 0
+    error = None
+    try:
+        async for items in result['pages']:
+            if items:
+                yield (', ' if count else '') + ', '.join(json.dumps(item) for item in items)
+                count += len(items)
+    except Exception as e:
+        logger.warning(f"CarAPI all=true listing stopped: {e}")
+        error = str(e)
+    yield f'], "count": {count}, "success": {json.dumps(error is None)}, "error": {json.dumps(error)}}}'
+
+
+async_carapi_service = AsyncCarAPIService()
+# Sync and async views of one process hold a single token between them.
+async_carapi_service.jwt = carapi_service.jwt
+
+
+class AsyncCarAPIView(View):
+    """Async counterpart of a ``CarAPIBaseView``: ``view_class`` supplies the endpoint, params and validation."""
+    service = async_carapi_service
+    view_class = None
+
+    async def get(self, request, **kwargs):
+        view = self.view_class()
+        error = view.validate(**kwargs)
+        if error:
+            return JsonResponse({
+                'success': False,
+                'error': error
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if view.paginated and is_true(request.GET.get('all')):
+            result = await self.service.alist_all(
+                view.get_endpoint(**kwargs),
+                view.get_params(request.GET),
+                use_v2=view.use_v2
+            )
+            if 'pages' in result:
+                response = StreamingHttpResponse(astream_listing(result), content_type='application/json')
+                if result.get('cache'):
+                    response['X-Cache'] = result['cache']
+                return response
+        else:
+            result = await self.fetch(view, request.GET, **kwargs)
+
+        body, status_code = response_body(result)
+        response = JsonResponse(body, status=status_code)
+        if result.get('cache'):
+            response['X-Cache'] = result['cache']
+        return response
+
+    async def fetch(self, view, query, **kwargs) -> Dict:
+        return await self.service.amake_request(view.get_endpoint(**kwargs), view.get_params(query), use_v2=view.use_v2)
+
+
+class AsyncGetYearsAPIView(AsyncCarAPIView):
+    view_class = GetYearsAPIView
+
+
+class AsyncGetMakesAPIView(AsyncCarAPIView):
+    view_class = GetMakesAPIView
+
+
+class AsyncGetModelsAPIView(AsyncCarAPIView):
+    view_class = GetModelsAPIView
+
+
+class AsyncGetSubmodelsAPIView(AsyncCarAPIView):
+    view_class = GetSubmodelsAPIView
+
+
+class AsyncGetTrimsAPIView(AsyncCarAPIView):
+    view_class = GetTrimsAPIView
+
+
+class AsyncGetBodiesAPIView(AsyncCarAPIView):
+    view_class = GetBodiesAPIView
+
+
+class AsyncGetEnginesAPIView(AsyncCarAPIView):
+    view_class = GetEnginesAPIView
+
+
+class AsyncGetMileagesAPIView(AsyncCarAPIView):
+    view_class = GetMileagesAPIView
+
+
+class AsyncVINDecodeAPIView(AsyncCarAPIView):
+    view_class = VINDecodeAPIView
+
+    async def fetch(self, view, query, vin=None, **kwargs) -> Dict:
+        return await self.service.adecode_vin(normalize_vin(vin), basic=view.is_basic(query))
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncVINBatchDecodeAPIView(View):
+    """Async counterpart of ``VINBatchDecodeAPIView``, exempt from CSRF like DRF's views."""
+    service = async_carapi_service
+    view_class = VINBatchDecodeAPIView
+
+    async def post(self, request):
+        view = self.view_class()
+        try:
+            data = json.loads(request.body or b'null')
+        except ValueError:
+            data = None
+
+        vins, errors, error = view.parse_batch(data)
+        if error:
+            return JsonResponse({
+                'success': False,
+                'error': error
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        valid = [vin for vin in vins if vin not in errors]
+        results = await self.service.adecode_vins(valid, basic=view.is_basic(data))
+        return JsonResponse(view.batch_body(vins, errors, results), status=status.HTTP_200_OK)
@@ -0,0 +1,219 @@
+"""Local mirror of the CarAPI catalog: years, makes, models, submodels and trims.
+
+``CatalogSync`` copies the endpoints into ``CatalogEntry`` (run it through the
+``sync_carapi_catalog`` task) and ``lookup`` answers proxy requests from it in
+the shape CarAPI would have returned. A request the mirror cannot answer
+exactly (unmirrored params, no matching rows, or an endpoint not synced within
+``CARAPI_CATALOG_MAX_AGE``) gets ``None`` and goes upstream.
+"""
+import logging
+import math
+from datetime import timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CatalogEntry, CatalogSyncState, Generation, Model, Stamp
+
+logger = logging.getLogger(__name__)
+
+# Mirrored endpoints in sync order, with the filter params the mirror can answer for each.
+MIRRORED_FILTERS = {
+    '/years': (),
+    '/makes': ('year',),
+    '/models': ('year', 'make'),
+    '/submodels': ('year', 'make', 'model'),
+    '/trims': ('year', 'make', 'model', 'submodel'),
+}
+# Items of these endpoints carry no year, so they are synced once per year.
+YEAR_SCOPED = ('/makes', '/models')
+MAX_LIMIT = 1000
+DEFAULT_MAX_AGE = 2 * 24 * 60 * 60
+
+
+def base_endpoint(endpoint: str) -> str:
+    return endpoint[:-len('/v2')] if endpoint.endswith('/v2') else endpoint
+
+
+def normalize(value) -> Optional[str]:
+    return str(value).strip().lower() if value not in (None, '') else None
+
+
+def synced_recently(endpoint: str) -> bool:
+    """Whether ``endpoint`` was mirrored within ``CARAPI_CATALOG_MAX_AGE`` seconds."""
+    synced_at = CatalogSyncState.objects.filter(endpoint=endpoint).values_list('synced_at', flat=True).first()
+    if synced_at is None:
+        return False
+    max_age = getattr(settings, 'CARAPI_CATALOG_MAX_AGE', DEFAULT_MAX_AGE)
+    return timezone.now() - synced_at <= timedelta(seconds=max_age)
+
+
+def lookup(endpoint: str, params: Optional[Dict] = None) -> Optional[Dict]:
+    """A CarAPI-shaped payload for ``endpoint`` and ``params`` from the mirror, or ``None`` on a miss."""
+    if not getattr(settings, 'CARAPI_CATALOG_MIRROR', True):
+        return None
+
+    endpoint = base_endpoint(endpoint)
+    params = params or {}
+    filters = MIRRORED_FILTERS.get(endpoint)
+    if filters is None or set(params) - set(filters) - {'limit', 'page'}:
+        return None
+    if not synced_recently(endpoint):
+        return None
+
+    rows = CatalogEntry.objects.filter(endpoint=endpoint)
+    if endpoint == '/years':
+        years = list(rows.order_by('position').values_list('year', flat=True))
+        return years or None
+
+    try:
+        limit = min(MAX_LIMIT, max(1, int(params.get('limit', 100))))
+        page = max(1, int(params.get('page', 1)))
+        year = int(params['year']) if params.get('year') else None
+    except (TypeError, ValueError):
+        return None
+
+    if endpoint in YEAR_SCOPED or year is not None:
+        rows = rows.filter(year=year)
+    for param in ('make', 'model', 'submodel'):
+        if param in filters and params.get(param):
+            rows = rows.filter(**{param: normalize(params[param])})
+
+    total = rows.count()
+    if not total:
+        return None
+
+    offset = (page - 1) * limit
+    items = list(rows.order_by('position').values_list('data', flat=True)[offset:offset + limit])
+    return {
+        'collection': {
+            'url': endpoint,
+            'count': len(items),
+            'pages': math.ceil(total / limit),
+            'total': total,
+        },
+        'data': items,
+    }
+
+
+class CatalogSync:
+    """Mirrors the catalog endpoints through ``service``, replacing one endpoint's rows per transaction.
+
+    ``service`` is a ``CarAPIService``; its response cache is bypassed so the
+    mirror never copies stale pages.
+    """
+    PAGE_LIMIT = 1000
+
+    def __init__(self, service):
+        self.service = service
+        self.stamps: Dict[str, int] = {}
+        self.models: Dict[Tuple[int, str], int] = {}
+        self.generations: Dict[Tuple[int, str], int] = {}
+        self.make_names: Dict = {}
+
+    def sync(self) -> Dict[str, int]:
+        """Refresh every mirrored endpoint; returns the number of rows stored per endpoint."""
+        self.load_local_names()
+        counts = {}
+        years = []
+        for endpoint in MIRRORED_FILTERS:
+            if endpoint == '/years':
+                years = [int(year) for year in self.fetch('/years')]
+                entries = [
+                    CatalogEntry(endpoint=endpoint, year=year, position=position, data=year)
+                    for position, year in enumerate(years)
+                ]
+            else:
+                scopes = [None] + years if endpoint in YEAR_SCOPED else [None]
+                entries = list(self.build_entries(endpoint, scopes))
+
+            with transaction.atomic():
+                CatalogEntry.objects.filter(endpoint=endpoint).delete()
+                CatalogEntry.objects.bulk_create(entries, batch_size=1000)
+                CatalogSyncState.objects.update_or_create(
+                    endpoint=endpoint, defaults={'synced_at': timezone.now(), 'rows': len(entries)}
+                )
+            counts[endpoint] = len(entries)
+            logger.info(f"Mirrored {len(entries)} CarAPI {endpoint} rows")
+
+        return counts
+
+    def load_local_names(self) -> None:
+        """Lowercased names of the existing stamps, models and generations, for linking entries to them."""
+        self.stamps = {name.lower(): pk for pk, name in Stamp.objects.values_list('pk', 'name') if name}
+        self.models = {
+            (stamp_id, name.lower()): pk
+            for pk, stamp_id, name in Model.objects.values_list('pk', 'stamp_id', 'name') if name
+        }
+        self.generations = {
+            (model_id, name.lower()): pk
+            for pk, model_id, name in Generation.objects.values_list('pk', 'model_id', 'name') if name
+        }
+
+    def fetch(self, endpoint: str, params: Optional[Dict] = None) -> List:
+        """Every item of an endpoint, following the page count in the ``collection`` metadata."""
+        items = []
+        page = 1
+        while True:
+            result = self.service.request_upstream(
+                f"{endpoint}/v2", {**(params or {}), 'limit': self.PAGE_LIMIT, 'page': page}
+            )
+            if result['status_code'] != 200:
+                raise RuntimeError(f"CarAPI {endpoint} page {page} returned {result['status_code']}: {result['error']}")
+
+            data = result['data']
+            if isinstance(data, list):
+                return data
+
+            batch = data.get('data', [])
+            items.extend(batch)
+            if not batch or page >= data.get('collection', {}).get('pages', 1):
+                return items
+            page += 1
+
+    def build_entries(self, endpoint: str, scopes: List[Optional[int]]) -> Iterator[CatalogEntry]:
+        position = 0
+        for year in scopes:
+            seen = set()
+            for item in self.fetch(endpoint, {'year': year} if year else None):
+                external_id = str(item.get('id')) if item.get('id') is not None else None
+                if external_id is not None and external_id in seen:
+                    continue
+                seen.add(external_id)
+
+                if endpoint == '/makes':
+                    self.make_names[item.get('id')] = item.get('name')
+                entry = self.build_entry(endpoint, item, year)
+                entry.external_id = external_id
+                entry.position = position
+                position += 1
+                yield entry
+
+    def build_entry(self, endpoint: str, item: Dict, year: Optional[int]) -> CatalogEntry:
+        make = item.get('make')
+        if isinstance(make, dict):
+            make = make.get('name')
+        if endpoint == '/makes':
+            make = item.get('name')
+        elif not make:
+            make = self.make_names.get(item.get('make_id'))
+
+        model = item.get('name') if endpoint == '/models' else item.get('model')
+        submodel = item.get('submodel') if endpoint in ('/submodels', '/trims') else None
+
+        entry = CatalogEntry(
+            endpoint=endpoint,
+            year=year if endpoint in YEAR_SCOPED else item.get('year'),
+            make=normalize(make),
+            model=normalize(model),
+            submodel=normalize(submodel),
+            data=item,
+        )
+        entry.stamp_id = self.stamps.get(entry.make)
+        if entry.stamp_id and entry.model:
+            entry.car_model_id = self.models.get((entry.stamp_id, entry.model))
+        if entry.car_model_id and entry.submodel:
+            entry.generation_id = self.generations.get((entry.car_model_id, entry.submodel))
+        return entry
@@ -0,0 +1,268 @@
+"""Shared outbound HTTP helpers: pooled sessions, adaptive rate limiting and retries per upstream."""
+import logging
+import random
+import threading
+import time
+from contextlib import nullcontext
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+UPSTREAM_DEFAULTS = {
+    'opendatasoft': {
+        'rate': 5.0,
+        'burst': 5,
+        'max_rate': 50.0,
+        'max_attempts': 6,
+        'max_delay': 60.0,
+        'pool_size': 16,
+    },
+    'carapi': {
+        'rate': 10.0,
+        'burst': 20,
+        'max_rate': 100.0,
+        'max_attempts': 3,
+        'max_delay': 5.0,
+        'pool_size': 64,
+        'async_pool_size': 256,
+    },
+}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a ``Retry-After`` header given either as seconds or as an HTTP date."""
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveRateLimiter:
+    """Thread-safe token bucket whose refill rate adapts to upstream feedback.
+
+    The rate grows additively on every successful response and is cut
+    multiplicatively when the upstream throttles, so it settles near whatever
+    the upstream currently allows.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        min_rate: float = 0.5,
+        max_rate: float = 50.0,
+        increase: float = 0.1,
+        decrease: float = 0.5,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token if one is available and return 0, otherwise return the seconds to wait before retrying."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+
+            if now >= self.blocked_until and self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+
+            return max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+
+    def acquire(self) -> None:
+        while True:
+            wait = self.reserve()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def on_success(self) -> None:
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self.tokens = min(self.tokens, 0.0)
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+        logger.debug(f"Upstream throttled, rate lowered to {self.rate:.2f} req/s")
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter and a bounded number of attempts."""
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    THROTTLE_STATUSES = {429, 503}
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 0.5, max_delay: float = 30.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is not None:
+            return max(min(retry_after, self.max_delay), backoff)
+        return backoff
+
+
+def build_session(pool_size: int, pool_hosts: int = 4) -> requests.Session:
+    """Keep-alive session holding up to ``pool_size`` connections per host for ``pool_hosts`` hosts."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_size, pool_block=True)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['Accept-Encoding'] = 'gzip, deflate'
+    session.headers['Connection'] = 'keep-alive'
+    return session
+
+
+class UpstreamClient:
+    """Rate-limited, retrying HTTP access to a single upstream service over a pooled session."""
+
+    def __init__(
+        self,
+        name: str,
+        limiter: AdaptiveRateLimiter,
+        retry_policy: RetryPolicy,
+        session: Optional[requests.Session] = None,
+    ):
+        self.name = name
+        self.limiter = limiter
+        self.retry_policy = retry_policy
+        self.session = session or build_session(pool_size=10)
+
+    def request(self, method: str, url: str, concurrency_slot=nullcontext, **kwargs) -> requests.Response:
+        """Send a request, retrying transient failures within the policy's attempt budget.
+
+        The last response is returned even if its status is retryable; the last
+        connection error or timeout is re-raised once the budget is spent.
+        """
+        max_attempts = self.retry_policy.max_attempts
+
+        for attempt in range(max_attempts):
+            is_last_attempt = attempt == max_attempts - 1
+            self.limiter.acquire()
+
+            try:
+                with concurrency_slot():
+                    response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if is_last_attempt:
+                    raise
+                delay = self.retry_policy.delay(attempt)
+                logger.warning(f"{self.name} request failed ({e}), retry {attempt + 1} in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+
+            if response.status_code not in self.retry_policy.RETRY_STATUSES or is_last_attempt:
+                if response.status_code < 500 and response.status_code != 429:
+                    self.limiter.on_success()
+                return response
+
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if response.status_code in self.retry_policy.THROTTLE_STATUSES:
+                self.limiter.on_throttle(retry_after)
+
+            delay = self.retry_policy.delay(attempt, retry_after)
+            logger.warning(
+                f"{self.name} returned {response.status_code}, retry {attempt + 1} in {delay:.1f}s"
+            )
+            time.sleep(delay)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def pool_stats(self) -> Dict[str, Dict]:
+        """Per-host connection pool usage: connections opened, requests sent and idle connections."""
+        stats = {}
+        for adapter in set(self.session.adapters.values()):
+            for pool_key in adapter.poolmanager.pools.keys():
+                pool = adapter.poolmanager.pools[pool_key]
+                stats[pool.host] = {
+                    'connections_opened': pool.num_connections,
+                    'requests': pool.num_requests,
+                    'idle_connections': pool.pool.qsize() if pool.pool else 0,
+                    'max_connections': pool.pool.maxsize if pool.pool else 0,
+                }
+        return stats
+
+
+_clients: Dict[str, UpstreamClient] = {}
+_clients_lock = threading.Lock()
+
+
+def pool_stats() -> Dict[str, Dict]:
+    """Connection pool usage of every upstream client created in this process."""
+    with _clients_lock:
+        clients = list(_clients.values())
+    return {client.name: client.pool_stats() for client in clients}
+
+
+def upstream_config(name: str) -> Dict:
+    """UPSTREAM_DEFAULTS for an upstream with settings.UPSTREAM_LIMITS applied on top."""
+    return {
+        **UPSTREAM_DEFAULTS.get(name, {}),
+        **getattr(settings, 'UPSTREAM_LIMITS', {}).get(name, {}),
+    }
+
+
+def get_upstream(name: str) -> UpstreamClient:
+    """Process-wide client for an upstream, configured from UPSTREAM_DEFAULTS and settings.UPSTREAM_LIMITS."""
+    with _clients_lock:
+        client = _clients.get(name)
+        if client is None:
+            config = upstream_config(name)
+            limiter = AdaptiveRateLimiter(
+                rate=config.get('rate', 5.0),
+                burst=config.get('burst', 5),
+                min_rate=config.get('min_rate', 0.5),
+                max_rate=config.get('max_rate', 50.0),
+            )
+            retry_policy = RetryPolicy(
+                max_attempts=config.get('max_attempts', 5),
+                base_delay=config.get('base_delay', 0.5),
+                max_delay=config.get('max_delay', 30.0),
+            )
+            session = build_session(
+                pool_size=config.get('pool_size', 10),
+                pool_hosts=config.get('pool_hosts', 4),
+            )
+            client = UpstreamClient(name, limiter, retry_policy, session)
+            _clients[name] = client
+        return client
+
+
+def reset_upstreams() -> None:
+    """Close and forget every client, so the next get_upstream() rereads settings.UPSTREAM_LIMITS."""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.session.close()
@@ -0,0 +1,184 @@
+"""Table-driven classification of raw OpenDataSoft vehicle attributes.
+
+The source dataset only has a few hundred distinct ``drive``, ``vclass``,
+``fueltype1`` and ``trany`` strings, so every classifier is memoized per raw
+value with a bounded LRU cache. Model names are far more varied and only matter
+through a handful of keywords, so body classification is memoized on the
+keywords found in the model name rather than on the name itself.
+"""
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+CACHE_SIZE = 4096
+
+# Each rule maps a result to alternatives; an alternative matches when all of its
+# substrings occur in the lowercased input. Rules are checked in order.
+Rules = Tuple[Tuple[object, Tuple[Tuple[str, ...], ...]], ...]
+
+DRIVE_RULES: Rules = (
+    ('fwd', (('front',),)),
+    ('rwd', (('rear',),)),
+    ('4wd', (('4-wheel',), ('4wd',))),
+    ('awd', (('all-wheel',), ('awd',))),
+)
+
+MODEL_BODY_RULES: Rules = (
+    ('SEDAN', (('sedan',),)),
+    ('COUPE', (('coupe',),)),
+    ('CONVERTIBLE', (('convertible',), ('cabriolet',))),
+    ('WAGON', (('wagon',),)),
+)
+
+VCLASS_BODY_RULES: Rules = (
+    ('PICKUP', (('pickup',), ('truck',))),
+    ('VAN', (('van',), ('minivan',))),
+    ('SUV', (('suv',), ('sport utility',), ('special purpose',))),
+    ('WAGON', (('wagon',),)),
+    ('HATCHBACK', (('compact',), ('subcompact',))),
+    ('COUPE', (('two seater',), ('coupe',))),
+    ('SEDAN', (('sedan',), ('midsize',), ('large car',))),
+)
+
+SEATS_RULES: Rules = (
+    (2, (('two seater',),)),
+    (7, (('van',), ('minivan',))),
+)
+CREW_PICKUP_SEATS = 5
+SUV_SEATS_RULES: Rules = (
+    (5, (('suv',), ('sport utility',))),
+)
+DEFAULT_SEATS = 4
+
+FUEL_RULES: Rules = (
+    ('gasoline+electric', (('electric', 'gasoline'),)),
+    ('diesel+electric', (('electric', 'diesel'),)),
+    ('gasoline+lpg', (('lpg', 'gasoline'),)),
+    ('electric', (('electric',),)),
+    ('diesel', (('diesel',),)),
+    ('gasoline', (('gasoline',), ('regular',), ('premium',), ('midgrade',))),
+)
+DEFAULT_FUEL = 'other'
+
+TRANSMISSION_RULES: Rules = (
+    ('automatic', (('automatic',), ('auto',))),
+    ('mechanical', (('manual',),)),
+    ('variator', (('cvt',), ('variable',), ('variator',))),
+    ('semi_automatic', (('semi',), ('automated',), ('amt',), ('dual',), ('dct',))),
+)
+DEFAULT_TRANSMISSION = 'other'
+
+
+class VehicleClassification(NamedTuple):
+    drive: Optional[str]
+    body_type: Optional[str]
+    seats_count: int
+    fuel: Optional[str]
+    transmission: Optional[str]
+
+
+def compile_rules(rules: Rules) -> Tuple[Tuple[object, str, Tuple[str, ...]], ...]:
+    """Flatten rules into ordered ``(result, first substring, other substrings)`` entries."""
+    return tuple(
+        (result, substrings[0], substrings[1:])
+        for result, alternatives in rules
+        for substrings in alternatives
+    )
+
+
+def match_rules(text: str, compiled_rules, default=None):
+    """Return the result of the first compiled rule fully contained in ``text``."""
+    for result, first, rest in compiled_rules:
+        if first in text and (not rest or all(substring in text for substring in rest)):
+            return result
+    return default
+
+
+_DRIVE_TABLE = compile_rules(DRIVE_RULES)
+_MODEL_BODY_TABLE = compile_rules(MODEL_BODY_RULES)
+_VCLASS_BODY_TABLE = compile_rules(VCLASS_BODY_RULES)
+_SEATS_TABLE = compile_rules(SEATS_RULES)
+_SUV_SEATS_TABLE = compile_rules(SUV_SEATS_RULES)
+_FUEL_TABLE = compile_rules(FUEL_RULES)
+_TRANSMISSION_TABLE = compile_rules(TRANSMISSION_RULES)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def classify_drive(drive: str) -> Optional[str]:
+    """Map API drive string to model choices."""
+    if not drive:
+        return None
+    return match_rules(drive.lower(), _DRIVE_TABLE)
+
+
+def classify_body(vclass: str, model_name: str) -> Tuple[Optional[str], int]:
+    """Map vehicle class and model name to a ``(body_type, seats_count)`` pair."""
+    model_lower = (model_name or '').lower()
+    return classify_vclass_body(vclass, match_rules(model_lower, _MODEL_BODY_TABLE), 'crew' in model_lower)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def classify_vclass_body(vclass: str, model_body: Optional[str], crew: bool) -> Tuple[Optional[str], int]:
+    """``classify_body`` given the body keyword and crew cab flag already read from the model name."""
+    vclass_lower = (vclass or '').lower()
+
+    seats_count = match_rules(vclass_lower, _SEATS_TABLE)
+    if seats_count is None:
+        if 'pickup' in vclass_lower and crew:
+            seats_count = CREW_PICKUP_SEATS
+        else:
+            seats_count = match_rules(vclass_lower, _SUV_SEATS_TABLE, DEFAULT_SEATS)
+
+    if not vclass_lower:
+        return None, seats_count
+
+    body_type = model_body or match_rules(vclass_lower, _VCLASS_BODY_TABLE)
+    return body_type, seats_count
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def classify_fuel(fuel: str) -> Optional[str]:
+    """Map API fuel type to a Fuel name."""
+    if not fuel:
+        return None
+    return match_rules(fuel.lower(), _FUEL_TABLE, DEFAULT_FUEL)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def classify_transmission(trany: str) -> Optional[str]:
+    """Map API transmission to a Transmission name."""
+    if not trany:
+        return None
+    return match_rules(trany.lower(), _TRANSMISSION_TABLE, DEFAULT_TRANSMISSION)
+
+
+def classify_record(record: Dict) -> VehicleClassification:
+    body_type, seats_count = classify_body(record.get('vclass') or '', record.get('model') or '')
+    return VehicleClassification(
+        drive=classify_drive(record.get('drive') or ''),
+        body_type=body_type,
+        seats_count=seats_count,
+        fuel=classify_fuel(record.get('fueltype1') or ''),
+        transmission=classify_transmission(record.get('trany') or ''),
+    )
+
+
+def classify_records(records: Iterable[Dict]) -> List[VehicleClassification]:
+    """Classify a whole page of records in one call."""
+    return [classify_record(record) for record in records]
+
+
+CLASSIFIERS = {
+    'drive': classify_drive,
+    'body': classify_vclass_body,
+    'fuel': classify_fuel,
+    'transmission': classify_transmission,
+}
+
+
+def cache_info() -> Dict:
+    return {name: classifier.cache_info() for name, classifier in CLASSIFIERS.items()}
+
+
+def cache_clear() -> None:
+    for classifier in CLASSIFIERS.values():
+        classifier.cache_clear()
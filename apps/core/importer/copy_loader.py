@@ -0,0 +1,158 @@
+"""Bulk loading of CarGeneralInfo rows through a PostgreSQL staging table.
+
+Rows are streamed into an unlogged staging table with ``COPY FROM STDIN`` and
+merged into ``car_general_info`` with one set-based ``INSERT ... ON CONFLICT``.
+Used by ``import_vehicles --copy`` for full refreshes. Each run stages into its
+own table, since batches are written from a separate connection (so a temporary
+table would not be visible to them) and concurrent runs must not share one.
+"""
+import io
+import json
+from datetime import date, datetime
+from typing import Iterable, List, Tuple
+
+from django.db import connection
+
+from ..models import CarGeneralInfo
+
+STAGING_TABLE = 'car_general_info_staging'
+
+
+def copy_text(value) -> str:
+    """Encode a value for COPY's text format."""
+    if value is None:
+        return r'\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False)
+    elif isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+def like_prefix(prefix: str) -> str:
+    """LIKE pattern matching values that start with ``prefix`` literally."""
+    return prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+class CopyLoader:
+    """Stages rows with COPY and merges them into car_general_info in one statement."""
+
+    def __init__(self, field_names: Iterable[str], staging_table: str = STAGING_TABLE):
+        meta = CarGeneralInfo._meta
+        self.table = meta.db_table
+        self.staging_table = staging_table
+        self.fields = [meta.get_field(name) for name in field_names]
+        self.columns = [field.column for field in self.fields]
+        self.rows_staged = 0
+
+    def quoted(self, columns: List[str]) -> str:
+        return ', '.join(connection.ops.quote_name(column) for column in columns)
+
+    def prepare(self) -> None:
+        """(Re)create the staging table with the target's current column types.
+
+        A table left behind by a crashed run is dropped rather than reused, as
+        its columns may no longer match the model.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.staging_table}")
+            cursor.execute(
+                f"CREATE UNLOGGED TABLE {self.staging_table} AS "
+                f"SELECT {self.quoted(self.columns)} FROM {self.table} WITH NO DATA"
+            )
+        self.rows_staged = 0
+
+    def write(self, rows: List[CarGeneralInfo]) -> None:
+        """Stream rows into the staging table with a single COPY."""
+        if not rows:
+            return
+
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write('\t'.join(copy_text(getattr(row, field.attname)) for field in self.fields))
+            buffer.write('\n')
+
+        sql = f"COPY {self.staging_table} ({self.quoted(self.columns)}) FROM STDIN"
+        with connection.cursor() as cursor:
+            raw_cursor = cursor.cursor
+            if hasattr(raw_cursor, 'copy'):
+                # psycopg 3
+                with raw_cursor.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
+            else:
+                buffer.seek(0)
+                raw_cursor.copy_expert(sql, buffer)
+
+        self.rows_staged += len(rows)
+
+    def merge(self) -> Tuple[int, int, int]:
+        """Upsert the staged rows into the target table, leaving rows with an unchanged hash alone.
+
+        Returns a ``(created, updated, unchanged)`` tuple.
+        """
+        columns = self.quoted(self.columns)
+        updates = ', '.join(
+            f"{column} = EXCLUDED.{column}"
+            for column in (connection.ops.quote_name(column) for column in self.columns if column != 'external_id')
+        )
+
+        # A record can be staged twice when pages overlap; DISTINCT ON keeps the last copy
+        # (ctid follows insertion order in a freshly created, append-only table).
+        sql = f"""
+            WITH staged AS (
+                SELECT DISTINCT ON (external_id) {columns}
+                FROM {self.staging_table}
+                WHERE external_id IS NOT NULL
+                ORDER BY external_id, ctid DESC
+            ),
+            merged AS (
+                INSERT INTO {self.table} ({columns}, created_at, updated_at)
+                SELECT {columns}, now(), now() FROM staged
+                ON CONFLICT (external_id) DO UPDATE
+                SET {updates}, updated_at = EXCLUDED.updated_at
+                WHERE {self.table}.source_hash IS DISTINCT FROM EXCLUDED.source_hash
+                RETURNING (xmax = 0) AS inserted
+            )
+            SELECT
+                (SELECT count(*) FROM staged),
+                count(*) FILTER (WHERE inserted),
+                count(*) FILTER (WHERE NOT inserted)
+            FROM merged
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+            staged, created, updated = cursor.fetchone()
+
+        return created, updated, staged - created - updated
+
+    def sweep(self, external_id_prefix: str) -> int:
+        """Delete rows of one source that are missing from the staged refresh. Returns the number removed.
+
+        Only rows whose ``external_id`` starts with ``external_id_prefix`` are
+        considered, so rows imported from other sources are never touched.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                DELETE FROM {self.table} AS target
+                WHERE target.external_id LIKE %s
+                  AND NOT EXISTS (
+                      SELECT 1 FROM {self.staging_table} AS staged
+                      WHERE staged.external_id = target.external_id
+                  )
+                """,
+                [like_prefix(external_id_prefix)],
+            )
+            return cursor.rowcount
+
+    def drop(self) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.staging_table}")
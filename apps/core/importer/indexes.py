@@ -0,0 +1,124 @@
+"""Secondary index maintenance around bulk loads, and index usage statistics.
+
+Only the indexes declared in a model's ``Meta.indexes`` are dropped and rebuilt:
+their definitions live in the model, so a load that dies halfway can always be
+repaired with ``rebuild_secondary_indexes`` (or ``index_report --create-missing``).
+Primary keys, unique constraints and foreign key indexes are left alone.
+"""
+import logging
+from typing import Dict, List, Optional, Set, Type
+
+from django.db import connection, models
+
+logger = logging.getLogger(__name__)
+
+
+def existing_index_names(model: Type[models.Model]) -> Set[str]:
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, model._meta.db_table)
+    return {name for name, info in constraints.items() if info['index']}
+
+
+def missing_indexes(model: Type[models.Model]) -> List[models.Index]:
+    """Indexes declared in ``Meta.indexes`` that do not exist in the database."""
+    existing = existing_index_names(model)
+    return [index for index in model._meta.indexes if index.name not in existing]
+
+
+def drop_secondary_indexes(model: Type[models.Model]) -> List[str]:
+    """Drop the model's ``Meta.indexes`` without blocking readers. Returns the dropped names."""
+    existing = existing_index_names(model)
+    dropped = []
+    with connection.schema_editor(atomic=False) as editor:
+        for index in model._meta.indexes:
+            if index.name in existing:
+                editor.remove_index(model, index, concurrently=True)
+                dropped.append(index.name)
+    logger.info(f"Dropped {len(dropped)} secondary indexes on {model._meta.db_table}")
+    return dropped
+
+
+def rebuild_secondary_indexes(model: Type[models.Model]) -> List[str]:
+    """Create missing ``Meta.indexes`` concurrently, then ANALYZE the table. Returns the created names."""
+    created = []
+    with connection.schema_editor(atomic=False) as editor:
+        for index in missing_indexes(model):
+            editor.add_index(model, index, concurrently=True)
+            created.append(index.name)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
+    logger.info(f"Rebuilt {len(created)} secondary indexes on {model._meta.db_table}")
+    return created
+
+
+def index_usage(table: Optional[str] = None) -> List[Dict]:
+    """Size and scan counts of user indexes from ``pg_stat_user_indexes``, largest first.
+
+    Each entry also carries ``covered_by``: the name of another plain btree index on
+    the same table whose leading columns are this index's columns, which makes this
+    one redundant for lookups.
+    """
+    sql = """
+        SELECT
+            stats.relname,
+            stats.indexrelname,
+            pg_relation_size(stats.indexrelid),
+            stats.idx_scan,
+            stats.idx_tup_read,
+            stats.idx_tup_fetch,
+            pg_index.indisunique,
+            pg_index.indisprimary,
+            pg_index.indpred IS NULL AND pg_index.indexprs IS NULL AND access_method.amname = 'btree',
+            pg_index.indkey::int2[],
+            pg_get_indexdef(stats.indexrelid)
+        FROM pg_stat_user_indexes AS stats
+        JOIN pg_index ON pg_index.indexrelid = stats.indexrelid
+        JOIN pg_class AS index_class ON index_class.oid = stats.indexrelid
+        JOIN pg_am AS access_method ON access_method.oid = index_class.relam
+    """
+    params = []
+    if table:
+        sql += " WHERE stats.relname = %s"
+        params.append(table)
+    sql += " ORDER BY pg_relation_size(stats.indexrelid) DESC"
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    indexes = [
+        {
+            'table': relname,
+            'name': name,
+            'size': size,
+            'scans': scans,
+            'tuples_read': tuples_read,
+            'tuples_fetched': tuples_fetched,
+            'unique': unique,
+            'primary': primary,
+            'plain': plain,
+            'columns': list(columns),
+            'definition': definition,
+        }
+        for (relname, name, size, scans, tuples_read, tuples_fetched,
+             unique, primary, plain, columns, definition) in rows
+    ]
+
+    for index in indexes:
+        index['covered_by'] = None
+        if index['unique'] or not index['plain']:
+            continue
+        for other in indexes:
+            if (
+                other is not index
+                and other['table'] == index['table']
+                and other['plain']
+                and other['columns'][:len(index['columns'])] == index['columns']
+                # Of two identical indexes, only the one sorting last is reported.
+                and (len(other['columns']) > len(index['columns']) or other['name'] < index['name'])
+            ):
+                index['covered_by'] = other['name']
+                break
+
+    return indexes
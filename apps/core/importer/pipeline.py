@@ -0,0 +1,115 @@
+"""Bounded hand-off between the import stages.
+
+``prefetch`` runs a producer (the page fetcher) ahead of its consumer and
+``WriteBehind`` runs the database writer behind it. Both use bounded queues:
+a full queue blocks the upstream stage, so a slow writer slows fetching down
+instead of letting buffered pages pile up in memory.
+"""
+import logging
+import queue
+import threading
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+_ITEM, _DONE, _ERROR = 'item', 'done', 'error'
+_STOP = object()
+
+
+def prefetch(items: Iterable[T], maxsize: int, name: str = 'prefetch') -> Iterator[T]:
+    """Iterate ``items`` on a background thread, at most ``maxsize`` items ahead of the consumer.
+
+    An exception raised by the producer is re-raised to the consumer after the
+    items produced before it. Closing the generator early stops the producer.
+    """
+    buffer = queue.Queue(maxsize=max(1, maxsize))
+    stopped = threading.Event()
+
+    def put(entry) -> bool:
+        while not stopped.is_set():
+            try:
+                buffer.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in items:
+                if not put((_ITEM, item)):
+                    return
+            put((_DONE, None))
+        except BaseException as e:
+            put((_ERROR, e))
+
+    producer = threading.Thread(target=produce, name=name, daemon=True)
+    producer.start()
+
+    try:
+        while True:
+            kind, value = buffer.get()
+            if kind == _DONE:
+                return
+            if kind == _ERROR:
+                raise value
+            yield value
+    finally:
+        stopped.set()
+
+
+class WriteBehind:
+    """Runs ``handler(*args)`` for each submitted item on one background thread.
+
+    At most ``maxsize`` items wait in the queue; ``submit`` blocks beyond that.
+    An exception raised by the handler is re-raised by the next ``submit``,
+    ``join`` or ``close``; items already queued behind the failed one are discarded.
+    """
+
+    def __init__(self, handler: Callable, maxsize: int, name: str = 'write-behind',
+                 on_exit: Optional[Callable[[], None]] = None):
+        self.handler = handler
+        self.on_exit = on_exit
+        self.queue = queue.Queue(maxsize=max(1, maxsize))
+        self.error = None
+        self.thread = threading.Thread(target=self.run, name=name, daemon=True)
+        self.thread.start()
+
+    def run(self) -> None:
+        try:
+            while True:
+                args = self.queue.get()
+                try:
+                    if args is _STOP:
+                        return
+                    if self.error is None:
+                        self.handler(*args)
+                except BaseException as e:
+                    logger.exception(f"{self.thread.name} failed")
+                    self.error = e
+                finally:
+                    self.queue.task_done()
+        finally:
+            if self.on_exit:
+                self.on_exit()
+
+    def raise_error(self) -> None:
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def submit(self, *args) -> None:
+        self.raise_error()
+        self.queue.put(args)
+
+    def join(self) -> None:
+        """Wait until every submitted item has been handled."""
+        self.queue.join()
+        self.raise_error()
+
+    def close(self) -> None:
+        self.queue.put(_STOP)
+        self.thread.join()
+        self.raise_error()
@@ -0,0 +1,161 @@
+"""Partition planning for the OpenDataSoft vehicle import.
+
+The records endpoint refuses offsets past ``OFFSET_CEILING``, so the import is
+split into partitions (a make, or a range of model years of a make) that each
+stay below it.
+"""
+import hashlib
+import logging
+from datetime import date
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from django.core.cache import cache
+
+from ..http_client import get_upstream
+
+logger = logging.getLogger(__name__)
+
+DATASET_URL = "https://public.opendatasoft.com/api/explore/v2.1/catalog/datasets/all-vehicles-model"
+
+OFFSET_CEILING = 10000
+FIRST_MODEL_YEAR = 1984
+PLAN_CACHE_KEY = 'opendatasoft_partition_plan'
+PLAN_CACHE_TTL = 24 * 60 * 60
+
+
+class Partition(NamedTuple):
+    make_name: str
+    expected_count: int
+    year_from: Optional[int] = None
+    year_to: Optional[int] = None
+
+    @property
+    def label(self) -> str:
+        """Name under which the partition is reported and checkpointed."""
+        if self.year_from is None and self.year_to is None:
+            return self.make_name
+        return f"{self.make_name} [{self.year_from or ''}-{self.year_to or ''}]"
+
+    @property
+    def where(self) -> Optional[str]:
+        """ODSQL filter restricting the make to the partition's model years (bounds inclusive)."""
+        conditions = []
+        if self.year_from is not None:
+            conditions.append(f"year >= date'{self.year_from}-01-01'")
+        if self.year_to is not None:
+            conditions.append(f"year < date'{self.year_to + 1}-01-01'")
+        return ' and '.join(conditions) or None
+
+
+def static_partitions(
+    makes: Iterable[Tuple[str, int]],
+    threshold: int = OFFSET_CEILING,
+    years_per_partition: int = 10,
+) -> List[Partition]:
+    """Partitions from a hand-maintained (make, expected count) list.
+
+    Makes above ``threshold`` are cut into fixed year ranges; the first and last
+    ranges are open-ended so that no model year is left out.
+    """
+    last_year = date.today().year + 1
+    partitions = []
+
+    for make_name, expected_count in makes:
+        if expected_count <= threshold:
+            partitions.append(Partition(make_name, expected_count))
+            continue
+
+        starts = list(range(FIRST_MODEL_YEAR, last_year + 1, years_per_partition))
+        for index, year_from in enumerate(starts):
+            partitions.append(Partition(
+                make_name,
+                expected_count // len(starts),
+                None if index == 0 else year_from,
+                None if index == len(starts) - 1 else year_from + years_per_partition - 1,
+            ))
+
+    partitions.sort(key=lambda partition: partition.expected_count, reverse=True)
+    return partitions
+
+
+def fetch_facet(name: str, refine: Optional[str] = None, dataset_url: str = DATASET_URL) -> List[Tuple[str, int]]:
+    """``(value, count)`` pairs of a dataset facet, optionally within a refinement."""
+    params = {'facet': name}
+    if refine:
+        params['refine'] = refine
+
+    response = get_upstream('opendatasoft').get(f"{dataset_url}/facets", params=params, timeout=30)
+    response.raise_for_status()
+
+    for facet in response.json().get('facets', []):
+        if facet.get('name') == name:
+            return [(value['value'], value['count']) for value in facet.get('facets', [])]
+    return []
+
+
+def split_by_year(
+    make_name: str,
+    expected_count: int,
+    max_partition_size: int,
+    dataset_url: str = DATASET_URL,
+) -> List[Partition]:
+    """Cut a make into consecutive year ranges of at most ``max_partition_size`` records."""
+    year_counts = sorted(
+        (int(value[:4]), count)
+        for value, count in fetch_facet('year', refine=f'make:"{make_name}"', dataset_url=dataset_url)
+        if value[:4].isdigit()
+    )
+    if not year_counts:
+        return [Partition(make_name, expected_count)]
+
+    partitions = []
+    range_start, range_count = year_counts[0][0], 0
+    previous_year = range_start
+    for year, count in year_counts:
+        if range_count and range_count + count > max_partition_size:
+            partitions.append(Partition(make_name, range_count, range_start, previous_year))
+            range_start, range_count = year, 0
+        range_count += count
+        previous_year = year
+    partitions.append(Partition(make_name, range_count, range_start, previous_year))
+
+    # Leave the outer ranges open so records outside the faceted years are still covered.
+    partitions[0] = partitions[0]._replace(year_from=None)
+    partitions[-1] = partitions[-1]._replace(year_to=None)
+
+    for partition in partitions:
+        if partition.expected_count > OFFSET_CEILING:
+            logger.warning(f"{partition.label} has {partition.expected_count} records, above the offset ceiling")
+
+    return partitions
+
+
+def discover_partitions(
+    max_partition_size: int = OFFSET_CEILING,
+    refresh: bool = False,
+    dataset_url: str = DATASET_URL,
+) -> List[Partition]:
+    """Build the partition plan from the dataset's make facet, splitting big makes by year facet.
+
+    The plan is cached for ``PLAN_CACHE_TTL`` seconds per dataset and ``max_partition_size``.
+    """
+    max_partition_size = min(max_partition_size, OFFSET_CEILING)
+    dataset_key = hashlib.md5(dataset_url.encode()).hexdigest()[:12]
+    cache_key = f"{PLAN_CACHE_KEY}:{dataset_key}:{max_partition_size}"
+
+    if not refresh:
+        cached_plan = cache.get(cache_key)
+        if cached_plan:
+            return [Partition(*partition) for partition in cached_plan]
+
+    partitions = []
+    for make_name, count in fetch_facet('make', dataset_url=dataset_url):
+        if count > max_partition_size:
+            partitions.extend(split_by_year(make_name, count, max_partition_size, dataset_url))
+        else:
+            partitions.append(Partition(make_name, count))
+
+    partitions.sort(key=lambda partition: partition.expected_count, reverse=True)
+    cache.set(cache_key, [list(partition) for partition in partitions], PLAN_CACHE_TTL)
+    logger.info(f"Discovered {len(partitions)} import partitions")
+    return partitions
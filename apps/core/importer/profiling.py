@@ -0,0 +1,95 @@
+import math
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List
+
+STAGES = ('fetch', 'decode', 'classify', 'dimensions', 'normalize', 'write', 'commit', 'indexes')
+TOTAL = '__all__'
+
+
+def percentile(sorted_samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_samples:
+        return 0.0
+    index = max(0, min(len(sorted_samples) - 1, math.ceil(fraction * len(sorted_samples)) - 1))
+    return sorted_samples[index]
+
+
+def summarize(samples: List[float]) -> Dict:
+    ordered = sorted(samples)
+    return {
+        'count': len(ordered),
+        'total': sum(ordered),
+        'p50': percentile(ordered, 0.50),
+        'p95': percentile(ordered, 0.95),
+        'max': ordered[-1] if ordered else 0.0,
+    }
+
+
+class ImportProfiler:
+    """Per-make, per-stage timings, record counts and database query counts for an import run.
+
+    Stage timings may be recorded from fetch worker threads; query counting is
+    installed on the writer thread's connection with ``connection.execute_wrapper``.
+    """
+
+    def __init__(self):
+        self.samples = defaultdict(lambda: defaultdict(list))
+        self.records = defaultdict(int)
+        self.queries = defaultdict(int)
+        self.current_make = TOTAL
+        self.lock = threading.Lock()
+
+    def record(self, make_name: str, stage: str, seconds: float) -> None:
+        with self.lock:
+            self.samples[make_name][stage].append(seconds)
+
+    @contextmanager
+    def measure(self, make_name: str, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(make_name, stage, time.perf_counter() - start)
+
+    def count_records(self, make_name: str, count: int) -> None:
+        self.records[make_name] += count
+
+    def count_query(self, execute, sql, params, many, context):
+        """``connection.execute_wrapper`` hook attributing every query to the current make."""
+        self.queries[self.current_make] += 1
+        return execute(sql, params, many, context)
+
+    def make_report(self, make_name: str) -> Dict:
+        records = self.records.get(make_name, 0)
+        queries = self.queries.get(make_name, 0)
+        return {
+            'records': records,
+            'queries': queries,
+            'queries_per_record': queries / records if records else None,
+            'stages': {
+                stage: summarize(self.samples[make_name][stage])
+                for stage in STAGES
+                if self.samples[make_name].get(stage)
+            },
+        }
+
+    def report(self) -> Dict:
+        with self.lock:
+            makes = sorted(set(self.samples) | set(self.records) | set(self.queries))
+            all_samples = defaultdict(list)
+            for make_name in makes:
+                for stage, samples in self.samples[make_name].items():
+                    all_samples[stage].extend(samples)
+
+            total_records = sum(self.records.values())
+            total_queries = sum(self.queries.values())
+            return {
+                'records': total_records,
+                'queries': total_queries,
+                'queries_per_record': total_queries / total_records if total_records else None,
+                'stages': {stage: summarize(all_samples[stage]) for stage in STAGES if all_samples.get(stage)},
+                'makes': {make_name: self.make_report(make_name) for make_name in makes if make_name != TOTAL},
+            }
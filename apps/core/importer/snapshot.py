@@ -0,0 +1,62 @@
+import gzip
+import json
+import re
+from itertools import islice
+from pathlib import Path
+from typing import Dict, IO, Iterator, List, Tuple
+
+SNAPSHOT_SUFFIX = '.ndjson.gz'
+
+
+def snapshot_file_name(make_name: str) -> str:
+    """File name used for a make inside a snapshot directory."""
+    slug = re.sub(r'[^a-z0-9]+', '-', make_name.lower()).strip('-')
+    return f"{slug or 'unknown'}{SNAPSHOT_SUFFIX}"
+
+
+class SnapshotWriter:
+    """Streams raw OpenDataSoft records into one gzip-compressed NDJSON file per make."""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.files: Dict[str, IO[str]] = {}
+        self.records_written = 0
+
+    def write(self, make_name: str, records: List[Dict]) -> None:
+        snapshot = self.files.get(make_name)
+        if snapshot is None:
+            path = self.directory / snapshot_file_name(make_name)
+            snapshot = gzip.open(path, 'wt', encoding='utf-8')
+            self.files[make_name] = snapshot
+
+        for record in records:
+            snapshot.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')))
+            snapshot.write('\n')
+        self.records_written += len(records)
+
+    def close(self) -> None:
+        for snapshot in self.files.values():
+            snapshot.close()
+        self.files = {}
+
+
+def iter_snapshot_files(path: str) -> List[Path]:
+    """Snapshot files under ``path``, which may be a single file or a snapshot directory."""
+    snapshot_path = Path(path)
+    if snapshot_path.is_file():
+        return [snapshot_path]
+    return sorted(snapshot_path.glob(f'*{SNAPSHOT_SUFFIX}'))
+
+
+def read_snapshot_pages(path: Path, page_size: int) -> Iterator[Tuple[int, List[Dict]]]:
+    """Yield ``(offset, records)`` pages from a snapshot file without loading it whole."""
+    with gzip.open(path, 'rt', encoding='utf-8') as snapshot:
+        records = (json.loads(line) for line in snapshot if line.strip())
+        offset = 0
+        while True:
+            page = list(islice(records, page_size))
+            if not page:
+                break
+            yield offset, page
+            offset += len(page)
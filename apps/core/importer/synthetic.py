@@ -0,0 +1,275 @@
+"""Synthetic OpenDataSoft vehicle records and a local HTTP stub that serves them.
+
+Records are derived from ``(seed, make, index)`` alone, so any page can be
+produced on demand without holding the dataset in memory. Within a make,
+records are ordered by model year, which lets year-filtered queries map to a
+contiguous index range the same way the planner expects from the real API.
+"""
+import hashlib
+import json
+import random
+import re
+from bisect import bisect_right
+from itertools import accumulate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from .planning import FIRST_MODEL_YEAR, OFFSET_CEILING
+
+LAST_MODEL_YEAR = 2025
+
+DRIVES = [
+    ('Front-Wheel Drive', 40), ('Rear-Wheel Drive', 22), ('4-Wheel or All-Wheel Drive', 14),
+    ('All-Wheel Drive', 8), ('4-Wheel Drive', 8), ('Part-time 4-Wheel Drive', 4),
+    ('2-Wheel Drive', 3), ('', 1),
+]
+VCLASSES = [
+    ('Compact Cars', 14), ('Midsize Cars', 14), ('Large Cars', 6), ('Subcompact Cars', 10),
+    ('Two Seaters', 4), ('Minicompact Cars', 3), ('Small Station Wagons', 4), ('Midsize Station Wagons', 2),
+    ('Small Sport Utility Vehicle 4WD', 6), ('Standard Sport Utility Vehicle 2WD', 5),
+    ('Sport Utility Vehicle - 4WD', 6), ('Special Purpose Vehicles', 3), ('Minivan - 2WD', 3),
+    ('Vans', 2), ('Vans, Cargo Type', 2), ('Small Pickup Trucks 2WD', 4), ('Standard Pickup Trucks 4WD', 6),
+]
+FUELS = [
+    ('Regular Gasoline', 68), ('Premium Gasoline', 21), ('Diesel', 3), ('Electricity', 3),
+    ('Midgrade Gasoline', 2), ('E85', 2), ('Natural Gas', 1),
+]
+TRANSMISSIONS = [
+    ('Automatic 4-spd', 22), ('Automatic (S6)', 12), ('Automatic (AM7)', 4),
+    ('Automatic (variable gear ratios)', 6), ('Automatic (AV-S8)', 3), ('Manual 5-spd', 24),
+    ('Manual 6-spd', 10), ('Automatic (AM-S7)', 3), ('Automatic 3-spd', 6), ('Automatic (S8)', 10),
+]
+BASE_MODELS = [
+    'Camry', 'Civic', 'F150', 'Silverado', '911', 'A4', 'Mustang', 'Caravan', 'Model 3', 'Wrangler',
+    'Accord', 'Corolla', 'Sierra', 'Ranger', 'Golf', 'Jetta', 'Altima', 'Sentra', 'Malibu', 'Impala',
+    'Explorer', 'Tahoe', 'Escape', 'CR-V', 'RAV4', 'Outback', 'Forester', '3 Series', 'C-Class', 'Q5',
+]
+BODY_SUFFIXES = ['', ' Sedan', ' Coupe', ' Wagon', ' Convertible', ' Hatchback', ' Pickup', ' Cab Chassis', ' Van']
+DRIVE_SUFFIXES = ['', '', ' 2WD', ' 4WD', ' AWD', ' FFV']
+DISPLACEMENTS = [1.0, 1.4, 1.5, 1.6, 1.8, 2.0, 2.4, 2.5, 3.0, 3.5, 3.6, 4.0, 4.6, 5.0, 5.3, 5.7, 6.2]
+
+
+def weighted(choices: List[Tuple[str, int]]) -> Tuple[List[str], List[float]]:
+    """Values and their cumulative probabilities, for ``pick``."""
+    total = sum(weight for _, weight in choices)
+    return [value for value, _ in choices], list(accumulate(weight / total for _, weight in choices))
+
+
+def pick(values: List, cumulative: List[float], draw: float):
+    return values[min(bisect_right(cumulative, draw), len(values) - 1)]
+
+
+DRIVE_VALUES, DRIVE_CUMULATIVE = weighted(DRIVES)
+FUEL_VALUES, FUEL_CUMULATIVE = weighted(FUELS)
+TRANSMISSION_VALUES, TRANSMISSION_CUMULATIVE = weighted(TRANSMISSIONS)
+VCLASS_VALUES, VCLASS_CUMULATIVE = weighted(VCLASSES)
+
+
+def apportion(total: int, weights: List[float]) -> List[int]:
+    """Split ``total`` proportionally to ``weights`` with the largest remainder method."""
+    weight_sum = sum(weights) or 1
+    shares = [total * weight / weight_sum for weight in weights]
+    counts = [int(share) for share in shares]
+    by_remainder = sorted(range(len(shares)), key=lambda i: shares[i] - counts[i], reverse=True)
+    for i in by_remainder[:total - sum(counts)]:
+        counts[i] += 1
+    return counts
+
+
+class SyntheticDataset:
+    """A deterministic, OpenDataSoft-shaped vehicle dataset of ``total`` records.
+
+    ``makes`` is a list of ``(make, weight)`` pairs, e.g. the import command's
+    MAKES_LIST. Later model years are more common, as in the real dataset.
+    """
+
+    def __init__(self, makes: Iterable[Tuple[str, int]], total: int, seed: int = 42):
+        self.seed = seed
+        makes = list(makes)
+        years = list(range(FIRST_MODEL_YEAR, LAST_MODEL_YEAR + 1))
+        year_weights = [1 + (year - FIRST_MODEL_YEAR) / 10 for year in years]
+
+        self.make_counts: Dict[str, int] = {}
+        self.year_starts: Dict[str, Tuple[List[int], List[int]]] = {}
+        self.catalogs: Dict[str, List[Tuple[str, str, str]]] = {}
+
+        for (make_name, _), count in zip(makes, apportion(total, [weight for _, weight in makes])):
+            if not count:
+                continue
+            self.make_counts[make_name] = count
+
+            starts, start = [], 0
+            for year_count in apportion(count, year_weights):
+                starts.append(start)
+                start += year_count
+            self.year_starts[make_name] = (years, starts)
+            self.catalogs[make_name] = self.build_catalog(make_name, count)
+
+    def build_catalog(self, make_name: str, count: int) -> List[Tuple[str, str, str]]:
+        """``(model, basemodel, vclass)`` entries a make's records are drawn from."""
+        rng = random.Random(f"{self.seed}:{make_name}:catalog")
+        base_models = rng.sample(BASE_MODELS, k=min(len(BASE_MODELS), max(2, count // 400)))
+        catalog = []
+        for base_model in base_models:
+            for _ in range(rng.randint(1, 4)):
+                model = f"{base_model}{rng.choice(BODY_SUFFIXES)}{rng.choice(DRIVE_SUFFIXES)}"
+                vclass = pick(VCLASS_VALUES, VCLASS_CUMULATIVE, rng.random())
+                catalog.append((model, base_model, vclass))
+        return catalog
+
+    @property
+    def total(self) -> int:
+        return sum(self.make_counts.values())
+
+    def year_range(self, make_name: str, year_from: Optional[int] = None, year_to: Optional[int] = None) -> Tuple[int, int]:
+        """Half-open index range of a make's records within the given model years."""
+        if make_name not in self.make_counts:
+            return 0, 0
+
+        years, starts = self.year_starts[make_name]
+        end_of_make = self.make_counts[make_name]
+
+        def start_of(year: int) -> int:
+            position = year - years[0]
+            if position <= 0:
+                return 0
+            if position >= len(years):
+                return end_of_make
+            return starts[position]
+
+        start = 0 if year_from is None else start_of(year_from)
+        end = end_of_make if year_to is None else start_of(year_to + 1)
+        return start, max(start, end)
+
+    def record(self, make_name: str, index: int) -> Dict:
+        years, starts = self.year_starts[make_name]
+        year = years[bisect_right(starts, index) - 1]
+
+        # Seeding a Random per record costs more than the importer spends on it, so the
+        # random draws come from a hash of the record's position instead.
+        digest = hashlib.blake2b(f"{self.seed}:{make_name}:{index}".encode(), digest_size=24).digest()
+        draws = [int.from_bytes(digest[i:i + 2], 'big') / 65536 for i in range(10, 24, 2)]
+
+        catalog = self.catalogs[make_name]
+        model, base_model, vclass = catalog[int(draws[0] * len(catalog))]
+        fuel = pick(FUEL_VALUES, FUEL_CUMULATIVE, draws[1])
+        displ = None if fuel == 'Electricity' else DISPLACEMENTS[int(draws[2] * len(DISPLACEMENTS))]
+
+        record = {
+            'id': digest[:10].hex(),
+            'make': make_name,
+            'model': model,
+            'basemodel': base_model,
+            'year': str(year),
+            'displ': displ,
+            'cylinders': None if displ is None else max(3, min(12, round(displ * 1.6))),
+            'drive': pick(DRIVE_VALUES, DRIVE_CUMULATIVE, draws[3]),
+            'vclass': vclass,
+            'fueltype1': fuel,
+            'trany': 'Automatic (A1)' if fuel == 'Electricity' else pick(
+                TRANSMISSION_VALUES, TRANSMISSION_CUMULATIVE, draws[4]
+            ),
+        }
+        # A little of the noise found upstream: missing base models and blank displacements.
+        if draws[5] < 0.01:
+            del record['basemodel']
+        if displ is not None and draws[6] < 0.005:
+            record['displ'] = ''
+        return record
+
+    def records(self, make_name: str, offset: int, limit: int,
+                year_from: Optional[int] = None, year_to: Optional[int] = None) -> Tuple[int, List[Dict]]:
+        """``(total_count, page)`` for a make (optionally within model years), like the records endpoint."""
+        start, end = self.year_range(make_name, year_from, year_to)
+        first = min(end, start + offset)
+        last = min(end, first + limit)
+        return end - start, [self.record(make_name, index) for index in range(first, last)]
+
+    def facet(self, name: str, make_name: Optional[str] = None) -> List[Tuple[str, int]]:
+        """``(value, count)`` pairs for the ``make`` facet or a make's ``year`` facet."""
+        if name == 'make':
+            return sorted(self.make_counts.items(), key=lambda item: item[1], reverse=True)
+        if name == 'year' and make_name in self.make_counts:
+            years, starts = self.year_starts[make_name]
+            ends = starts[1:] + [self.make_counts[make_name]]
+            return [(str(year), end - start) for year, start, end in zip(years, starts, ends) if end > start]
+        return []
+
+
+REFINE_MAKE = re.compile(r'make:"(?P<make>.*)"')
+WHERE_YEAR_FROM = re.compile(r"year >= date'(?P<year>\d{4})")
+WHERE_YEAR_BEFORE = re.compile(r"year < date'(?P<year>\d{4})")
+
+
+class SyntheticDatasetHandler(BaseHTTPRequestHandler):
+    """Serves ``/records`` and ``/facets`` for the server's ``dataset`` like OpenDataSoft v2.1."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        refine = REFINE_MAKE.match(params.get('refine', ''))
+        make_name = refine.group('make') if refine else None
+
+        if url.path.endswith('/facets'):
+            facet = params.get('facet', '')
+            values = self.server.dataset.facet(facet, make_name)
+            self.send_json(200, {'facets': [{
+                'name': facet,
+                'facets': [{'name': value, 'value': value, 'count': count, 'state': 'displayed'}
+                           for value, count in values],
+            }]})
+            return
+
+        if not url.path.endswith('/records'):
+            self.send_json(404, {'error_code': 'NotFound', 'message': url.path})
+            return
+
+        limit = int(params.get('limit', 10))
+        offset = int(params.get('offset', 0))
+        if offset + limit > OFFSET_CEILING:
+            self.send_json(400, {
+                'error_code': 'InvalidRESTParameterError',
+                'message': f'offset + limit must not exceed {OFFSET_CEILING}',
+            })
+            return
+
+        where = params.get('where', '')
+        year_from = WHERE_YEAR_FROM.search(where)
+        year_before = WHERE_YEAR_BEFORE.search(where)
+        total_count, results = self.server.dataset.records(
+            make_name,
+            offset,
+            limit,
+            int(year_from.group('year')) if year_from else None,
+            int(year_before.group('year')) - 1 if year_before else None,
+        )
+        self.send_json(200, {'total_count': total_count, 'results': results})
+
+    def send_json(self, status: int, payload: Dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_synthetic_dataset(dataset: SyntheticDataset, host: str = '127.0.0.1', port: int = 0) -> ThreadingHTTPServer:
+    """Bind a stub server for ``dataset``; call ``serve_forever()`` on it to start serving."""
+    server = ThreadingHTTPServer((host, port), SyntheticDatasetHandler)
+    server.daemon_threads = True
+    server.dataset = dataset
+    return server
+
+
+def run_stub_server(makes: List[Tuple[str, int]], total: int, seed: int, port_queue) -> None:
+    """Process target: serve a dataset until terminated, reporting the bound port on ``port_queue``."""
+    server = serve_synthetic_dataset(SyntheticDataset(makes, total, seed))
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
@@ -0,0 +1,51 @@
+import time
+import uuid
+from contextlib import contextmanager
+
+from django_redis import get_redis_connection
+
+ACQUIRE_SCRIPT = """
+local now = redis.call('TIME')
+local now_seconds = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local lease = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now_seconds - lease)
+if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[1]) then
+    redis.call('ZADD', KEYS[1], now_seconds, ARGV[3])
+    redis.call('EXPIRE', KEYS[1], math.ceil(lease))
+    return 1
+end
+return 0
+"""
+
+
+class UpstreamSemaphore:
+    """Cluster-wide cap on concurrent requests to an upstream, backed by a Redis sorted set.
+
+    Every holder is stored with its acquisition time; holders older than
+    ``lease_seconds`` are treated as crashed and their slot is reclaimed.
+    """
+
+    def __init__(self, name: str, limit: int, lease_seconds: int = 60, poll_interval: float = 0.05):
+        self.key = f"upstream_semaphore:{name}"
+        self.limit = limit
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.connection = get_redis_connection('default')
+        self.acquire_script = self.connection.register_script(ACQUIRE_SCRIPT)
+
+    def acquire(self) -> str:
+        token = uuid.uuid4().hex
+        while not self.acquire_script(keys=[self.key], args=[self.limit, self.lease_seconds, token]):
+            time.sleep(self.poll_interval)
+        return token
+
+    def release(self, token: str) -> None:
+        self.connection.zrem(self.key, token)
+
+    @contextmanager
+    def slot(self):
+        token = self.acquire()
+        try:
+            yield
+        finally:
+            self.release(token)
@@ -0,0 +1,66 @@
+"""Process-local holder for an upstream JWT and the expiry decoded from it."""
+import base64
+import binascii
+import json
+import threading
+import time
+from typing import Optional, Tuple
+
+
+def jwt_expiry(token: str) -> Optional[float]:
+    """The ``exp`` claim of a JWT as a Unix timestamp, without verifying the signature."""
+    try:
+        payload = token.split('.')[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+        return float(claims['exp'])
+    except (IndexError, KeyError, TypeError, ValueError, binascii.Error):
+        return None
+
+
+class JWTTokenHolder:
+    """Keeps a token in memory until shortly before it expires.
+
+    ``current`` is what every request reads, so it takes no lock and does no I/O.
+    Once the token is within ``refresh_before`` seconds of expiring, ``needs_refresh``
+    tells the owner to fetch a new one in the background while the old one is still
+    handed out; within ``expiry_margin`` seconds it is no longer returned at all.
+    """
+
+    def __init__(self, refresh_before: float = 60 * 60, expiry_margin: float = 60,
+                 default_lifetime: float = 6 * 24 * 60 * 60):
+        self.refresh_before = refresh_before
+        self.expiry_margin = expiry_margin
+        # Assumed lifetime of tokens without a decodable exp claim.
+        self.default_lifetime = default_lifetime
+        self.lock = threading.Lock()
+        # Replaced as a whole so that readers always see a matching token and expiry.
+        self.state: Tuple[Optional[str], float] = (None, 0.0)
+
+    def current(self) -> Optional[str]:
+        token, expires_at = self.state
+        if token and time.time() < expires_at - self.expiry_margin:
+            return token
+        return None
+
+    def needs_refresh(self) -> bool:
+        token, expires_at = self.state
+        return not token or time.time() >= expires_at - self.refresh_before
+
+    def remaining(self) -> int:
+        """Seconds the held token stays usable, for storing it in a shared cache."""
+        return max(0, int(self.state[1] - self.expiry_margin - time.time()))
+
+    def set(self, token: Optional[str]) -> Optional[str]:
+        """Hold ``token`` if it outlives the one held now; returns the token held afterwards, if usable."""
+        if token:
+            expires_at = jwt_expiry(token) or time.time() + self.default_lifetime
+            with self.lock:
+                if expires_at > self.state[1]:
+                    self.state = (token, expires_at)
+        return self.current()
+
+    def clear(self, token: Optional[str] = None) -> None:
+        """Forget the held token, or only ``token`` if it is still the one held (e.g. after a 401)."""
+        with self.lock:
+            if token is None or self.state[0] == token:
+                self.state = (None, 0.0)
@@ -0,0 +1,53 @@
+"""Setup shared by the ``benchmark_*`` commands: stub processes, upstream limits and a scratch database."""
+import multiprocessing
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator
+
+from django.db import connection, connections
+
+
+def unthrottled_limits(upstream: str, **overrides) -> Dict:
+    """``UPSTREAM_LIMITS`` for ``upstream`` that never throttle or retry.
+
+    Benchmarks run against a local stub, and the production limits would make
+    them measure the rate limiter instead of the code under test.
+    """
+    return {
+        upstream: {
+            'rate': 1000000.0,
+            'burst': 100000,
+            'max_rate': 1000000.0,
+            'max_attempts': 1,
+            **overrides,
+        },
+    }
+
+
+@contextmanager
+def stub_process(target: Callable, *args, timeout: float = 60) -> Iterator[int]:
+    """Run ``target(*args, port_queue)`` in its own process and yield the port it reports.
+
+    A separate process keeps the stub from competing for the GIL or showing up in
+    the benchmark's peak RSS. Database connections are closed first so the child
+    does not inherit them.
+    """
+    port_queue = multiprocessing.Queue()
+    connections.close_all()
+    stub = multiprocessing.Process(target=target, args=(*args, port_queue), daemon=True)
+    stub.start()
+    try:
+        yield port_queue.get(timeout=timeout)
+    finally:
+        stub.terminate()
+        stub.join()
+
+
+@contextmanager
+def benchmark_database(keepdb: bool = False) -> Iterator[None]:
+    """Point the default connection at a test database for the duration of the block."""
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
@@ -0,0 +1,267 @@
+import asyncio
+import json
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test.utils import override_settings
+
+from ..benchmarking import benchmark_database, stub_process, unthrottled_limits
+from ...async_http import close_async_upstreams
+from ...async_views import AsyncCarAPIService
+from ...http_client import reset_upstreams
+from ...models import VINDecode, VINPrefix
+from ...views import CarAPIService
+from ...vin import TRANSLITERATION, check_digit
+
+ENDPOINT = '/makes/v2'
+PARAMS = {'limit': '100', 'page': '1'}
+
+# The JWT token and response cache live in local memory, so neither Redis nor carapi.app is needed.
+BENCHMARK_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class CarAPIStubHandler(BaseHTTPRequestHandler):
+    """Answers every GET with a small page of makes after ``server.latency`` seconds."""
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as two writes; with Nagle on, the body waits for the client's delayed ACK.
+    disable_nagle_algorithm = True
+    payload = json.dumps({
+        'collection': {'url': ENDPOINT, 'count': 3, 'pages': 1, 'total': 3},
+        'data': [{'id': 1, 'name': 'Acura'}, {'id': 2, 'name': 'Audi'}, {'id': 3, 'name': 'BMW'}],
+    }).encode()
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        payload = self.payload
+        if self.path.startswith('/vin/'):
+            vin = self.path[len('/vin/'):].split('?')[0]
+            payload = json.dumps({'vin': vin, 'year': 2020, 'make': 'Honda', 'model': 'Civic', 'trim': 'EX'}).encode()
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CarAPIStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def run_carapi_stub(latency: float, port_queue) -> None:
+    server = CarAPIStubServer(('127.0.0.1', 0), CarAPIStubHandler)
+    server.latency = latency
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = 'Compare concurrency scaling of the sync and async CarAPI services, and VIN batch decoding, against a local stub'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency',
+            default='1,10,50,100,250,500',
+            help='Comma separated numbers of concurrent upstream calls'
+        )
+        parser.add_argument(
+            '--rounds',
+            type=int,
+            default=10,
+            help='Requests per concurrent caller at each level'
+        )
+        parser.add_argument(
+            '--latency',
+            type=float,
+            default=50,
+            help='Milliseconds the stub waits before answering'
+        )
+        parser.add_argument(
+            '--vins',
+            type=int,
+            default=1000,
+            help='VINs per batch decode benchmark, run in a test database; 0 skips it'
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=32,
+            help='Worker threads available to the sync service, as in a threaded WSGI/ASGI server'
+        )
+
+    def handle(self, *args, **options):
+        levels = [int(level) for level in options['concurrency'].split(',') if level.strip()]
+        threads = options['threads']
+        latency = options['latency'] / 1000
+
+        # Pools big enough for the widest level and for a batch decode's fan-out.
+        limits = unthrottled_limits(
+            'carapi',
+            pool_size=max(threads, CarAPIService.VIN_BATCH_WORKERS),
+            async_pool_size=max(levels + [CarAPIService.VIN_BATCH_WORKERS]),
+        )
+        results = []
+        vin_results = []
+
+        with stub_process(run_carapi_stub, latency) as port:
+            base_url = f"http://127.0.0.1:{port}"
+            try:
+                with override_settings(UPSTREAM_LIMITS=limits, CACHES=BENCHMARK_CACHES):
+                    reset_upstreams()
+                    for concurrency in levels:
+                        requests = concurrency * options['rounds']
+                        for name, benchmark in (('sync', self.benchmark_sync), ('async', self.benchmark_async)):
+                            result = benchmark(base_url, concurrency, requests, threads)
+                            results.append({'name': name, 'concurrency': concurrency, **result})
+                            self.stdout.write(
+                                f"{name} x{concurrency}: {requests} requests in {result['seconds']:.2f}s "
+                                f"({result['failed']} failed)"
+                            )
+
+                    if options['vins']:
+                        vin_results = self.benchmark_vins(base_url, options['vins'])
+            finally:
+                reset_upstreams()
+
+        self.stdout.write("=" * 72)
+        self.stdout.write(
+            f"{'service':<8} {'concurrency':>11} {'requests/s':>11} {'ideal':>9} {'p50 ms':>8} {'p95 ms':>8}"
+        )
+        for result in results:
+            ideal = result['concurrency'] / latency if latency else 0
+            self.stdout.write(
+                f"{result['name']:<8} {result['concurrency']:>11} {result['requests_per_second']:>11.0f} "
+                f"{ideal:>9.0f} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f}"
+            )
+        self.stdout.write(f"Ideal is concurrency / stub latency; the sync service is capped by --threads={threads}.")
+
+        if vin_results:
+            self.stdout.write("-" * 72)
+            self.stdout.write(f"{'VIN decode':<14} {'VINs':>7} {'seconds':>9} {'VINs/s':>9}")
+            for result in vin_results:
+                self.stdout.write(
+                    f"{result['name']:<14} {result['vins']:>7} {result['seconds']:>9.2f} "
+                    f"{result['vins_per_second']:>9.0f}"
+                )
+            self.stdout.write(f"Batches fan out to {CarAPIService.VIN_BATCH_WORKERS} concurrent upstream calls.")
+        self.stdout.write("=" * 72)
+
+    def service(self, service_class, base_url: str) -> CarAPIService:
+        service = service_class()
+        service.base_url = base_url
+        service.api_token = service.api_secret = None
+        return service
+
+    def benchmark_sync(self, base_url: str, concurrency: int, requests: int, threads: int) -> Dict:
+        """Uncached upstream calls from a thread pool, one thread pinned per call in flight."""
+        service = self.service(CarAPIService, base_url)
+
+        def call(_) -> tuple:
+            started = time.perf_counter()
+            result = service.request_upstream(ENDPOINT, PARAMS)
+            return time.perf_counter() - started, result['status_code']
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(concurrency, threads)) as executor:
+            calls = list(executor.map(call, range(requests)))
+        return self.result(calls, time.perf_counter() - started)
+
+    def benchmark_async(self, base_url: str, concurrency: int, requests: int, threads: int) -> Dict:
+        """Uncached upstream calls from ``concurrency`` coroutines on one event loop."""
+        service = self.service(AsyncCarAPIService, base_url)
+
+        async def caller(count: int, calls: List) -> None:
+            for _ in range(count):
+                started = time.perf_counter()
+                result = await service.arequest_upstream(ENDPOINT, PARAMS)
+                calls.append((time.perf_counter() - started, result['status_code']))
+
+        async def run() -> tuple:
+            calls = []
+            shares = [requests // concurrency + (index < requests % concurrency) for index in range(concurrency)]
+            try:
+                started = time.perf_counter()
+                await asyncio.gather(*(caller(share, calls) for share in shares))
+                return calls, time.perf_counter() - started
+            finally:
+                await close_async_upstreams()
+
+        calls, elapsed = asyncio.run(run())
+        return self.result(calls, elapsed)
+
+    def result(self, calls: List[tuple], elapsed: float) -> Dict:
+        latencies = [seconds * 1000 for seconds, status_code in calls if status_code == 200]
+        return {
+            'seconds': elapsed,
+            'requests_per_second': len(latencies) / elapsed if elapsed else 0.0,
+            'p50_ms': statistics.median(latencies) if latencies else 0.0,
+            'p95_ms': percentile(latencies, 0.95) if latencies else 0.0,
+            'failed': len(calls) - len(latencies),
+        }
+
+    def benchmark_vins(self, base_url: str, count: int) -> List[Dict]:
+        """VIN decode throughput one VIN at a time, in sync and async batches, and for already stored VINs."""
+        alphabet = list(TRANSLITERATION)
+        rng = random.Random(42)
+        vins = []
+        while len(vins) < count:
+            vin = ''.join(rng.choice(alphabet) for _ in range(17))
+            vin = vin[:8] + check_digit(vin) + vin[9:]
+            if vin not in vins:
+                vins.append(vin)
+
+        sync_service = self.service(CarAPIService, base_url)
+        async_service = self.service(AsyncCarAPIService, base_url)
+
+        async def decode_async() -> Dict:
+            try:
+                return await async_service.adecode_vins(vins)
+            finally:
+                await close_async_upstreams()
+                # The database work ran on asgiref's thread; close_all must run there to close its connection,
+                # which would otherwise keep the test database open.
+                await sync_to_async(connections.close_all)()
+
+        single = vins[:min(count, 100)]
+        runs = [
+            ('one by one', single, lambda: [sync_service.decode_vin(vin) for vin in single]),
+            ('batch sync', vins, lambda: sync_service.decode_vins(vins)),
+            ('batch async', vins, lambda: asyncio.run(decode_async())),
+            ('batch stored', vins, lambda: sync_service.decode_vins(vins)),
+        ]
+
+        self.stdout.write("Creating the benchmark database...")
+        results = []
+        with benchmark_database():
+            for name, batch, run in runs:
+                if name != 'batch stored':
+                    VINDecode.objects.all().delete()
+                    VINPrefix.objects.all().delete()
+                started = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - started
+                results.append({
+                    'name': name,
+                    'vins': len(batch),
+                    'seconds': elapsed,
+                    'vins_per_second': len(batch) / elapsed if elapsed else 0.0,
+                })
+                self.stdout.write(f"{name}: {len(batch)} VINs in {elapsed:.2f}s")
+
+        return results
@@ -0,0 +1,103 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...importer import classifiers
+
+DRIVES = [
+    'Front-Wheel Drive', 'Rear-Wheel Drive', '4-Wheel or All-Wheel Drive', 'All-Wheel Drive',
+    '4-Wheel Drive', 'Part-time 4-Wheel Drive', '2-Wheel Drive', '',
+]
+VCLASSES = [
+    'Compact Cars', 'Midsize Cars', 'Large Cars', 'Subcompact Cars', 'Two Seaters', 'Minicompact Cars',
+    'Small Station Wagons', 'Midsize Station Wagons', 'Small Sport Utility Vehicle 4WD',
+    'Standard Sport Utility Vehicle 2WD', 'Sport Utility Vehicle - 4WD', 'Special Purpose Vehicles',
+    'Minivan - 2WD', 'Vans', 'Vans, Cargo Type', 'Small Pickup Trucks 2WD', 'Standard Pickup Trucks 4WD',
+]
+MODELS = [
+    'Camry', 'Civic Sedan', 'F150 Pickup 4WD', 'Silverado Crew Cab 2WD', '911 Carrera Cabriolet',
+    'A4 Avant Wagon', 'Mustang Coupe', 'Grand Caravan', 'Model 3 Long Range', 'Wrangler 4WD',
+]
+FUELS = ['Regular Gasoline', 'Premium Gasoline', 'Diesel', 'Electricity', 'Midgrade Gasoline', 'Natural Gas', 'E85']
+TRANSMISSIONS = [
+    'Automatic 4-spd', 'Automatic (S6)', 'Automatic (AM7)', 'Automatic (variable gear ratios)', 'Automatic (AV-S8)',
+    'Manual 5-spd', 'Manual 6-spd', 'Automatic (AM-S7)',
+]
+
+
+class Command(BaseCommand):
+    help = 'Measure per-record cost of the vehicle attribute classifiers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--records',
+            type=int,
+            default=100000,
+            help='Number of synthetic records to classify'
+        )
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=100,
+            help='Records per classify_records call'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed for the synthetic records'
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        records = [
+            {
+                'drive': rng.choice(DRIVES),
+                'vclass': rng.choice(VCLASSES),
+                'model': rng.choice(MODELS),
+                'fueltype1': rng.choice(FUELS),
+                'trany': rng.choice(TRANSMISSIONS),
+            }
+            for _ in range(options['records'])
+        ]
+        page_size = max(1, options['page_size'])
+        pages = [records[i:i + page_size] for i in range(0, len(records), page_size)]
+
+        self.stdout.write(f"Classifying {len(records)} records in pages of {page_size}")
+
+        uncached = self.measure_uncached(records)
+        classifiers.cache_clear()
+        cold = self.measure(pages)
+        warm = self.measure(pages)
+
+        self.stdout.write("=" * 60)
+        self.stdout.write(f"Rules only (no memoization): {uncached:.0f} ns/record")
+        self.stdout.write(f"Memoized, cold cache:        {cold:.0f} ns/record")
+        self.stdout.write(f"Memoized, warm cache:        {warm:.0f} ns/record")
+        for name, info in classifiers.cache_info().items():
+            self.stdout.write(f"  {name}: {info.currsize} cached values, {info.hits} hits, {info.misses} misses")
+        self.stdout.write("=" * 60)
+
+    @staticmethod
+    def measure(pages) -> float:
+        total = sum(len(page) for page in pages)
+        start = time.perf_counter()
+        for page in pages:
+            classifiers.classify_records(page)
+        return (time.perf_counter() - start) * 1e9 / total
+
+    @staticmethod
+    def measure_uncached(records) -> float:
+        classify_drive = classifiers.classify_drive.__wrapped__
+        classify_body = classifiers.classify_body.__wrapped__
+        classify_fuel = classifiers.classify_fuel.__wrapped__
+        classify_transmission = classifiers.classify_transmission.__wrapped__
+
+        start = time.perf_counter()
+        for record in records:
+            classify_drive(record['drive'])
+            classify_body(record['vclass'], record['model'])
+            classify_fuel(record['fueltype1'])
+            classify_transmission(record['trany'])
+        return (time.perf_counter() - start) * 1e9 / len(records)
@@ -0,0 +1,167 @@
+import io
+import resource
+import time
+from typing import Dict, List
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from ..benchmarking import benchmark_database, stub_process, unthrottled_limits
+from ...http_client import reset_upstreams
+from ...importer.synthetic import SyntheticDataset, run_stub_server
+from ...models import CarGeneralInfo, ImportCheckpoint, ImportRun, Model, Stamp
+from .import_vehicles import Command as ImportVehiclesCommand
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far (ru_maxrss is in KiB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Command(BaseCommand):
+    help = 'Measure import throughput on synthetic OpenDataSoft data served by a local stub'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scales',
+            default='10000,100000,1000000',
+            help='Comma separated dataset sizes to benchmark'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed for the synthetic dataset'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='--workers passed to import_vehicles'
+        )
+        parser.add_argument(
+            '--batch-pages',
+            type=int,
+            default=10,
+            help='--batch-pages passed to import_vehicles'
+        )
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help='Run import_vehicles with --copy'
+        )
+        parser.add_argument(
+            '--records-only',
+            action='store_true',
+            help='Only benchmark record normalization, not the full command'
+        )
+        parser.add_argument(
+            '--keepdb',
+            action='store_true',
+            help='Keep the benchmark database between runs'
+        )
+
+    def handle(self, *args, **options):
+        scales = [int(scale) for scale in options['scales'].split(',') if scale.strip()]
+        makes = ImportVehiclesCommand.MAKES_LIST
+
+        self.stdout.write("Creating the benchmark database...")
+        results = []
+
+        with benchmark_database(keepdb=options['keepdb']):
+            call_command('create_fuel_transmission', stdout=io.StringIO())
+
+            try:
+                with override_settings(UPSTREAM_LIMITS=unthrottled_limits('opendatasoft')):
+                    reset_upstreams()
+                    for scale in scales:
+                        dataset = SyntheticDataset(makes, scale, options['seed'])
+
+                        self.clear_vehicles()
+                        results.append(self.benchmark_records(dataset))
+                        self.report(results[-1])
+
+                        if not options['records_only']:
+                            self.clear_vehicles()
+                            results.append(self.benchmark_command(dataset, makes, options))
+                            self.report(results[-1])
+            finally:
+                reset_upstreams()
+
+        self.stdout.write("=" * 72)
+        self.stdout.write(f"{'benchmark':<10} {'records':>9} {'records/s':>11} {'queries/record':>15} {'peak RSS':>11}")
+        for result in results:
+            queries = result['queries_per_record']
+            self.stdout.write(
+                f"{result['name']:<10} {result['records']:>9} {result['records_per_second']:>11.0f} "
+                f"{queries if queries is None else format(queries, '.3f'):>15} "
+                f"{result['peak_rss_mb']:>9.0f}MB"
+            )
+        self.stdout.write("Peak RSS is the process high-water mark, so it never drops between rows.")
+        self.stdout.write("=" * 72)
+
+    def clear_vehicles(self) -> None:
+        tables = [model._meta.db_table for model in (ImportCheckpoint, ImportRun, CarGeneralInfo, Model, Stamp)]
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {', '.join(tables)} CASCADE")
+
+    def benchmark_records(self, dataset: SyntheticDataset) -> Dict:
+        """Normalize every record through process_page without writing vehicles."""
+        command = ImportVehiclesCommand(stdout=io.StringIO())
+        command.batch_pages = float('inf')  # never flush; rows are discarded after each page
+        command.warm_cache()
+        limit = command.LIMIT_PER_REQUEST
+        elapsed = 0.0
+
+        with connection.execute_wrapper(command.profiler.count_query):
+            for make_name, count in dataset.make_counts.items():
+                make_stats = command.new_make_stats()
+                for offset in range(0, count, limit):
+                    _, records = dataset.records(make_name, offset, limit)
+
+                    started = time.perf_counter()
+                    command.process_page(make_name, offset, records, make_stats)
+                    elapsed += time.perf_counter() - started
+
+                    command.pending_rows.clear()
+                    command.pending_payloads.clear()
+                    command.pending_pages.clear()
+
+        return self.result('records', command, elapsed)
+
+    def benchmark_command(self, dataset: SyntheticDataset, makes: List, options: Dict) -> Dict:
+        """Run the whole import_vehicles command against a stub serving the dataset."""
+        with stub_process(run_stub_server, makes, dataset.total, options['seed']) as port:
+            command = ImportVehiclesCommand(stdout=io.StringIO())
+            started = time.perf_counter()
+            call_command(
+                command,
+                dataset_url=f"http://127.0.0.1:{port}",
+                refresh_plan=True,
+                workers=options['workers'],
+                batch_pages=options['batch_pages'],
+                copy=options['copy'],
+            )
+            elapsed = time.perf_counter() - started
+
+        return self.result('command', command, elapsed)
+
+    def result(self, name: str, command: ImportVehiclesCommand, elapsed: float) -> Dict:
+        records = command.stats['total_processed']
+        return {
+            'name': name,
+            'records': records,
+            'seconds': elapsed,
+            'records_per_second': records / elapsed if elapsed else 0.0,
+            'queries_per_record': command.profiler.report()['queries_per_record'],
+            'peak_rss_mb': peak_rss_mb(),
+            'failed': command.stats['failed'],
+        }
+
+    def report(self, result: Dict) -> None:
+        self.stdout.write(
+            f"{result['name']}: {result['records']} records in {result['seconds']:.1f}s "
+            f"({result['failed']} failed)"
+        )
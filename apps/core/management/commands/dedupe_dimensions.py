@@ -0,0 +1,81 @@
+"""Merge duplicate stamps and models ahead of their unique constraints.
+
+``unique_stamp_name`` and ``unique_model_stamp_name`` cannot be applied to a
+database that already holds duplicates. Run, in this order::
+
+    python manage.py dedupe_dimensions
+    python manage.py makemigrations core
+    python manage.py migrate
+
+and keep imports stopped in between, so no new duplicates appear.
+"""
+from typing import Dict, List, Tuple
+
+from django.core.management.base import BaseCommand
+from django.db import models, transaction
+from django.db.models import Count, Min
+
+from ...models import Model, Stamp
+
+
+def duplicate_groups(model, fields: List[str]) -> Dict[int, List[int]]:
+    """Lowest pk of every group of rows sharing ``fields``, mapped to the other pks of the group."""
+    groups = (
+        model.objects.values(*fields)
+        .annotate(keep=Min('pk'), rows=Count('pk'))
+        .filter(rows__gt=1)
+    )
+    duplicates = {}
+    for group in groups:
+        lookup = {field: group[field] for field in fields}
+        duplicates[group['keep']] = list(
+            model.objects.filter(**lookup).exclude(pk=group['keep']).values_list('pk', flat=True)
+        )
+    return duplicates
+
+
+def merge_duplicates(model, duplicates: Dict[int, List[int]]) -> Tuple[int, int]:
+    """Point every foreign key at the kept row of its group and delete the others.
+
+    Returns ``(references repointed, rows deleted)``.
+    """
+    foreign_keys = [
+        relation for relation in model._meta.related_objects
+        if isinstance(relation.field, models.ForeignKey)
+    ]
+    repointed = deleted = 0
+    for keep, others in duplicates.items():
+        for relation in foreign_keys:
+            repointed += relation.related_model._base_manager.filter(
+                **{f"{relation.field.name}__in": others}
+            ).update(**{relation.field.name: keep})
+        deleted += model.objects.filter(pk__in=others).delete()[0]
+    return repointed, deleted
+
+
+class Command(BaseCommand):
+    help = ('Merge duplicate stamps (same name) and models (same stamp and name) into their lowest pk; '
+            'run before migrating the unique constraints on car_stamp and car_model')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report the duplicates'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            # Stamps first: merging them can turn models of the merged stamps into duplicates.
+            for model, fields in ((Stamp, ['name']), (Model, ['stamp', 'name'])):
+                duplicates = duplicate_groups(model, fields)
+                rows = sum(len(others) for others in duplicates.values())
+                label = model._meta.db_table
+                if options['dry_run']:
+                    self.stdout.write(f"{label}: {rows} duplicate rows in {len(duplicates)} groups")
+                    continue
+
+                repointed, deleted = merge_duplicates(model, duplicates)
+                self.stdout.write(self.style.SUCCESS(
+                    f"{label}: deleted {deleted} duplicate rows, repointed {repointed} references"
+                ))
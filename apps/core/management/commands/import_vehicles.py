@@ -1,15 +1,33 @@
 import decimal
+import hashlib
+import json
 import logging
+import math
+import threading
 import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
 from decimal import Decimal
-from typing import Dict, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 import requests
 from django.core.management.base import BaseCommand
-from django.db import transaction
-
+from django.db import DatabaseError, connection, connections, transaction
+from django.utils import timezone
+
+from ...http_client import get_upstream
+from ...importer.classifiers import VehicleClassification, classify_record, classify_records
+from ...importer.copy_loader import STAGING_TABLE, CopyLoader
+from ...importer.indexes import drop_secondary_indexes, rebuild_secondary_indexes
+from ...importer.pipeline import WriteBehind, prefetch
+from ...importer.planning import (
+    DATASET_URL, OFFSET_CEILING, Partition, discover_partitions, static_partitions
+)
+from ...importer.profiling import TOTAL, ImportProfiler
+from ...importer.snapshot import SnapshotWriter, iter_snapshot_files, read_snapshot_pages
 from ...models import (
-    Stamp, Model, Fuel, Transmission, CarGeneralInfo
+    Stamp, Model, Fuel, Transmission, CarGeneralInfo, ImportRun, ImportCheckpoint, QuarantinedRecord
 )
 
 logger = logging.getLogger(__name__)
@@ -18,9 +36,21 @@ logger = logging.getLogger(__name__)
 class Command(BaseCommand):
     help = 'Import vehicle data from OpenDataSoft API by make to bypass 10k limit'
 
-    BASE_URL = "https://public.opendatasoft.com/api/explore/v2.1/catalog/datasets/all-vehicles-model/records"
+    SOURCE = 'opendatasoft'
     LIMIT_PER_REQUEST = 100
+    UPSERT_BATCH_SIZE = 1000
+    UPSERT_FIELDS = [
+        'stamp', 'model', 'year', 'engine_volume', 'body_type', 'drive',
+        'primary_fuel_type', 'primary_transmission', 'seats_count',
+        'generation', 'horse_power', 'salon_color', 'salon_type',
+        'primary_color', 'vin', 'features', 'source_hash', 'updated_at',
+    ]
+    HASH_FIELDS = [
+        'stamp_id', 'model_id', 'year', 'engine_volume', 'body_type', 'drive',
+        'primary_fuel_type_id', 'primary_transmission_id', 'seats_count',
+    ]
 
+    # Fallback when the make facet cannot be queried (see importer.planning).
     MAKES_LIST = [
         ('Chevrolet', 4420),
         ('Ford', 3821),
@@ -168,20 +198,47 @@ class Command(BaseCommand):
         ('Volga Associated Automobile', 1),
     ]
 
-    def __init__(self):
-        super().__init__()
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         self.cache = {
             'stamps': {},
             'models': {},
             'fuels': {},
             'transmissions': {},
         }
+        self.missing_dimensions: Set[Tuple[str, str]] = set()
+        self.fallback_fuel_id: Optional[int] = None
+        self.fallback_transmission_id: Optional[int] = None
+        self.pending_rows: Dict[str, CarGeneralInfo] = {}
+        # Source records of pending_rows by external_id, for quarantining rows whose write fails.
+        self.pending_payloads: Dict[str, Dict] = {}
+        self.pending_pages: List[Tuple[str, int, int]] = []
+        self.batch_pages = 1
+        self.run: Optional[ImportRun] = None
+        self.completed_pages: Set[Tuple[str, int]] = set()
+        self.snapshot_writer: Optional[SnapshotWriter] = None
+        self.upstream_slot = nullcontext
+        self.dataset_url = DATASET_URL
+        self.copy_loader = None
+        self.writer: Optional[WriteBehind] = None
+        self.prefetch_pages = 0
+        self.stats_lock = threading.Lock()
+        self.quarantine: Dict[Optional[str], QuarantinedRecord] = {}
+        self.error_counts: Counter = Counter()
+        self.retrying_quarantine = False
+        self.profiler = ImportProfiler()
         self.stats = {
             'total_processed': 0,
             'successful': 0,
             'failed': 0,
             'skipped': 0,
+            'created': 0,
+            'updated': 0,
+            'unchanged': 0,
+            'quarantined': 0,
             'makes_processed': 0,
+            # Pages or partitions given up on, and make discovery falling back to MAKES_LIST.
+            'fetch_failures': 0,
         }
 
     def add_arguments(self, parser):
@@ -203,71 +260,242 @@ class Command(BaseCommand):
             default=None,
             help='Maximum number of makes to process'
         )
+        parser.add_argument(
+            '--batch-pages',
+            type=int,
+            default=1,
+            help='Number of fetched pages to collect before writing them in one upsert'
+        )
+        parser.add_argument(
+            '--dataset-url',
+            default=DATASET_URL,
+            help='OpenDataSoft dataset to import from, e.g. a mirror or a local stub'
+        )
+        parser.add_argument(
+            '--static-makes',
+            action='store_true',
+            help='Use the built-in MAKES_LIST instead of discovering makes from the dataset facets'
+        )
+        parser.add_argument(
+            '--max-partition-size',
+            type=int,
+            default=OFFSET_CEILING,
+            help='Split makes with more records than this into year ranges (capped at the offset ceiling)'
+        )
+        parser.add_argument(
+            '--refresh-plan',
+            action='store_true',
+            help='Ignore the cached partition plan and query the facets again'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of pages to fetch concurrently; partitions are scheduled largest first'
+        )
+        parser.add_argument(
+            '--prefetch-pages',
+            type=int,
+            default=4,
+            help='Pages fetched ahead of normalization when --workers is 1 (0 fetches inline)'
+        )
+        parser.add_argument(
+            '--write-queue',
+            type=int,
+            default=2,
+            help='Batches buffered for the background writer; fetching stalls when it is full (0 writes inline)'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Resume the latest unfinished run, skipping pages it already wrote'
+        )
+        parser.add_argument(
+            '--run-id',
+            type=int,
+            default=None,
+            help='Run to resume instead of the latest unfinished one (implies --resume)'
+        )
+        parser.add_argument(
+            '--capture-snapshot',
+            type=str,
+            default=None,
+            metavar='DIR',
+            help='Only fetch: stream raw API records into gzip NDJSON files (one per make) in DIR'
+        )
+        parser.add_argument(
+            '--from-snapshot',
+            type=str,
+            default=None,
+            metavar='PATH',
+            help='Load records from a snapshot file or directory instead of the API'
+        )
+        parser.add_argument(
+            '--report-json',
+            type=str,
+            default=None,
+            metavar='PATH',
+            help='Write the per-stage profile and run stats as JSON to PATH'
+        )
+        parser.add_argument(
+            '--copy',
+            action='store_true',
+            help='Full refresh: COPY rows into an unlogged staging table and merge them in one statement at the end'
+        )
+        parser.add_argument(
+            '--sweep',
+            action='store_true',
+            help='With --copy, delete imported vehicles that are missing from a complete refresh'
+        )
+        parser.add_argument(
+            '--retry-quarantine',
+            action='store_true',
+            help='Reprocess only the records quarantined by earlier runs instead of fetching'
+        )
+        parser.add_argument(
+            '--drop-indexes',
+            action='store_true',
+            help='Drop the secondary indexes of car_general_info before a full load and rebuild them '
+                 'concurrently (followed by ANALYZE) afterwards'
+        )
         parser.add_argument(
             '--verbose',
             action='store_true',
             help='Enable verbose logging'
         )
 
-    def get_drive_type(self, drive_str: str) -> Optional[str]:
-        """Map API drive string to model choices."""
-        if not drive_str:
+    @staticmethod
+    def parse_year(year_str) -> Optional[int]:
+        """Parse the model year, rejecting values outside the supported range."""
+        try:
+            year = int(year_str)
+        except (ValueError, TypeError):
+            return None
+
+        if year < 1900 or year > 2030:
             return None
 
-        drive_lower = drive_str.lower()
+        return year
 
-        if 'front' in drive_lower:
-            return 'fwd'
-        elif 'rear' in drive_lower:
-            return 'rwd'
-        elif '4-wheel' in drive_lower or '4wd' in drive_lower:
-            return '4wd'
-        elif 'all-wheel' in drive_lower or 'awd' in drive_lower:
-            return 'awd'
+    @staticmethod
+    def clean_model_name(model_name: str) -> str:
+        """Strip drive suffixes and keep the first word of the model name."""
+        clean_name = model_name
+        for suffix in ['2WD', '4WD', 'AWD', 'FWD', 'RWD']:
+            clean_name = clean_name.replace(suffix, '').strip()
 
-        return None
+        return clean_name.split()[0] if clean_name else model_name
 
-    def get_body_type(self, vclass: str, model_name: str = '') -> Optional[str]:
-        """Map vehicle class to body type."""
-        if not vclass:
-            return None
+    def warm_cache(self) -> None:
+        """Load id-only lookup maps for every dimension, one query each, and resolve fallbacks once."""
+        self.cache['stamps'] = dict(Stamp.objects.values_list('name', 'id'))
+        self.cache['models'] = {
+            (stamp_id, name): model_id
+            for stamp_id, name, model_id in Model.objects.values_list('stamp_id', 'name', 'id')
+        }
+        self.cache['fuels'] = dict(Fuel.objects.values_list('name', 'id'))
+        self.cache['transmissions'] = dict(Transmission.objects.values_list('name', 'id'))
 
-        vclass_lower = vclass.lower()
-        model_lower = model_name.lower()
-
-        if 'sedan' in model_lower:
-            return 'SEDAN'
-        elif 'coupe' in model_lower:
-            return 'COUPE'
-        elif 'convertible' in model_lower or 'cabriolet' in model_lower:
-            return 'CONVERTIBLE'
-        elif 'wagon' in model_lower:
-            return 'WAGON'
-
-        if 'pickup' in vclass_lower or 'truck' in vclass_lower:
-            return 'PICKUP'
-        elif 'van' in vclass_lower or 'minivan' in vclass_lower:
-            return 'VAN'
-        elif 'suv' in vclass_lower or 'sport utility' in vclass_lower or 'special purpose' in vclass_lower:
-            return 'SUV'
-        elif 'wagon' in vclass_lower:
-            return 'WAGON'
-        elif 'compact' in vclass_lower or 'subcompact' in vclass_lower:
-            return 'HATCHBACK'
-        elif 'two seater' in vclass_lower or 'coupe' in vclass_lower:
-            return 'COUPE'
-        elif 'sedan' in vclass_lower or 'midsize' in vclass_lower or 'large car' in vclass_lower:
-            return 'SEDAN'
+        self.fallback_fuel_id = self.cache['fuels'].get('gasoline')
+        self.fallback_transmission_id = self.cache['transmissions'].get('automatic')
 
+        logger.debug(
+            f"Warmed caches: {len(self.cache['stamps'])} stamps, {len(self.cache['models'])} models, "
+            f"{len(self.cache['fuels'])} fuels, {len(self.cache['transmissions'])} transmissions"
+        )
+
+    def create_missing_dimensions(self, records: List[Dict]) -> None:
+        """Bulk-create the stamps and models of a page that are not cached yet, one statement each.
+
+        Partitions run concurrently (``import_vehicles_distributed``), so another worker may
+        have inserted some of the names: those are only cached, the others are inserted with
+        conflicts ignored and their ids read back.
+        """
+        page_models = []
+        for record in records:
+            make_name = record.get('make')
+            model_name = record.get('model')
+            base_model_name = record.get('basemodel', model_name)
+            if not make_name or not model_name or not base_model_name:
+                continue
+            if self.parse_year(record.get('year')) is None:
+                continue
+            page_models.append((make_name, self.clean_model_name(base_model_name)))
+
+        self.create_stamps(make_name for make_name, _ in page_models)
+
+        new_models = {
+            (self.cache['stamps'][make_name], base_model)
+            for make_name, base_model in page_models
+        } - self.cache['models'].keys()
+        if not new_models:
+            return
+
+        self.read_model_ids(new_models)
+        absent = sorted(new_models - self.cache['models'].keys())
+        if not absent:
+            return
+
+        Model.objects.bulk_create([
+            Model(stamp_id=stamp_id, name=base_model, name_ru=base_model, name_kr=base_model)
+            for stamp_id, base_model in absent
+        ], ignore_conflicts=True)
+        self.read_model_ids(set(absent))
+        self.stdout.write(f"Created new models: {', '.join(name for _, name in absent)}")
+
+    def read_model_ids(self, keys: Set[Tuple[int, str]]) -> None:
+        """Cache the ids of the stored models among ``(stamp_id, name)`` keys."""
+        stored = Model.objects.filter(
+            stamp_id__in={stamp_id for stamp_id, _ in keys},
+            name__in={name for _, name in keys},
+        ).values_list('stamp_id', 'name', 'id')
+        self.cache['models'].update(
+            ((stamp_id, name), model_id)
+            for stamp_id, name, model_id in stored
+            if (stamp_id, name) in keys
+        )
+
+    def create_stamps(self, make_names: Iterable[str]) -> None:
+        """Bulk-create the stamps of ``make_names`` that are neither cached nor stored yet, in one statement."""
+        new_stamps = set(make_names) - self.cache['stamps'].keys()
+        if not new_stamps:
+            return
+
+        self.cache['stamps'].update(Stamp.objects.filter(name__in=new_stamps).values_list('name', 'id'))
+        absent = sorted(new_stamps - self.cache['stamps'].keys())
+        if not absent:
+            return
+
+        Stamp.objects.bulk_create([
+            Stamp(name=make_name, name_ru=make_name, name_kr=make_name)
+            for make_name in absent
+        ], ignore_conflicts=True)
+        self.cache['stamps'].update(Stamp.objects.filter(name__in=absent).values_list('name', 'id'))
+        self.stdout.write(f"Created new stamps: {', '.join(absent)}")
+
+    def check_preconditions(self) -> Optional[str]:
+        """Why an import cannot write vehicles yet, or ``None`` when it can."""
+        if not Fuel.objects.exists() or not Transmission.objects.exists():
+            return 'No Fuel or Transmission types found. Please run create_fuel_transmission command first.'
         return None
 
-    def get_or_create_stamp(self, make_name: str) -> Optional[Stamp]:
-        """Get or create a Stamp (manufacturer) instance."""
+    def prepare_dimensions(self, partitions: List[Partition]) -> None:
+        """Warm the lookup caches and create the stamps of every planned make up front.
+
+        Run once before the partitions are fetched, so that concurrent partitions
+        of a make find its stamp instead of each inserting it.
+        """
+        self.warm_cache()
+        self.create_stamps(partition.make_name for partition in partitions)
+
+    def get_stamp_id(self, make_name: str) -> Optional[int]:
+        """Resolve a Stamp (manufacturer) id, creating the stamp when it is not cached."""
         if not make_name:
             return None
 
-        if make_name in self.cache['stamps']:
-            return self.cache['stamps'][make_name]
+        stamp_id = self.cache['stamps'].get(make_name)
+        if stamp_id is not None:
+            return stamp_id
 
         stamp, created = Stamp.objects.get_or_create(
             name=make_name,
@@ -277,115 +505,68 @@ class Command(BaseCommand):
             }
         )
 
-        self.cache['stamps'][make_name] = stamp
+        self.cache['stamps'][make_name] = stamp.id
         if created:
             self.stdout.write(f"Created new stamp: {make_name}")
 
-        return stamp
+        return stamp.id
 
-    def get_or_create_model(self, model_name: str, stamp: Stamp) -> Optional[Model]:
-        """Get or create a Model instance."""
-        if not model_name or not stamp:
+    def get_model_id(self, model_name: str, stamp_id: Optional[int]) -> Optional[int]:
+        """Resolve a Model id for a stamp, creating the model when it is not cached."""
+        if not model_name or not stamp_id:
             return None
 
-        clean_name = model_name
-        for suffix in ['2WD', '4WD', 'AWD', 'FWD', 'RWD']:
-            clean_name = clean_name.replace(suffix, '').strip()
-
-        base_model = clean_name.split()[0] if clean_name else model_name
+        base_model = self.clean_model_name(model_name)
 
-        cache_key = f"{stamp.id}:{base_model}"
-        if cache_key in self.cache['models']:
-            return self.cache['models'][cache_key]
+        cache_key = (stamp_id, base_model)
+        model_id = self.cache['models'].get(cache_key)
+        if model_id is not None:
+            return model_id
 
         model, created = Model.objects.get_or_create(
             name=base_model,
-            stamp=stamp,
+            stamp_id=stamp_id,
             defaults={
                 'name_ru': base_model,
                 'name_kr': base_model,
             }
         )
 
-        self.cache['models'][cache_key] = model
+        self.cache['models'][cache_key] = model.id
         if created:
-            self.stdout.write(f"Created new model: {base_model} for {stamp.name}")
+            self.stdout.write(f"Created new model: {base_model}")
 
-        return model
+        return model.id
 
-    def get_fuel_type(self, fuel_str: str) -> Optional[Fuel]:
-        """Map API fuel type to existing Fuel objects."""
-        if not fuel_str:
+    def get_fuel_id(self, fuel_name: Optional[str]) -> Optional[int]:
+        """Resolve a classified fuel name to an existing Fuel id."""
+        if not fuel_name:
             return None
 
-        if fuel_str in self.cache['fuels']:
-            return self.cache['fuels'][fuel_str]
-
-        fuel_lower = fuel_str.lower()
-
-        fuel_name = None
-        if 'electric' in fuel_lower and 'gasoline' in fuel_lower:
-            fuel_name = 'gasoline+electric'
-        elif 'electric' in fuel_lower and 'diesel' in fuel_lower:
-            fuel_name = 'diesel+electric'
-        elif 'lpg' in fuel_lower and 'gasoline' in fuel_lower:
-            fuel_name = 'gasoline+lpg'
-        elif 'electric' in fuel_lower:
-            fuel_name = 'electric'
-        elif 'diesel' in fuel_lower:
-            fuel_name = 'diesel'
-        elif 'gasoline' in fuel_lower or 'regular' in fuel_lower or 'premium' in fuel_lower or 'midgrade' in fuel_lower:
-            fuel_name = 'gasoline'
-        elif 'e85' in fuel_lower or 'ethanol' in fuel_lower:
-            fuel_name = 'other'
-        elif 'hydrogen' in fuel_lower or 'natural gas' in fuel_lower:
-            fuel_name = 'other'
-        else:
-            fuel_name = 'other'
-
-        try:
-            fuel = Fuel.objects.get(name=fuel_name)
-            self.cache['fuels'][fuel_str] = fuel
-            return fuel
-        except Fuel.DoesNotExist:
+        fuel_id = self.cache['fuels'].get(fuel_name)
+        if fuel_id is None and ('fuel', fuel_name) not in self.missing_dimensions:
+            self.missing_dimensions.add(('fuel', fuel_name))
             self.stdout.write(self.style.WARNING(f"Fuel type '{fuel_name}' not found in database"))
-            return None
 
-    def get_transmission_type(self, trans_str: str) -> Optional[Transmission]:
-        """Map API transmission to existing Transmission objects."""
-        if not trans_str:
+        return fuel_id
+
+    def get_transmission_id(self, transmission_name: Optional[str]) -> Optional[int]:
+        """Resolve a classified transmission name to an existing Transmission id."""
+        if not transmission_name:
             return None
 
-        if trans_str in self.cache['transmissions']:
-            return self.cache['transmissions'][trans_str]
-
-        trans_lower = trans_str.lower()
-
-        trans_name = None
-        if 'automatic' in trans_lower or 'auto' in trans_lower:
-            trans_name = 'automatic'
-        elif 'manual' in trans_lower:
-            trans_name = 'mechanical'
-        elif 'cvt' in trans_lower or 'variable' in trans_lower or 'variator' in trans_lower:
-            trans_name = 'variator'
-        elif 'semi' in trans_lower or 'automated' in trans_lower or 'amt' in trans_lower:
-            trans_name = 'semi_automatic'
-        elif 'dual' in trans_lower or 'dct' in trans_lower:
-            trans_name = 'semi_automatic'
-        else:
-            trans_name = 'other'
+        transmission_id = self.cache['transmissions'].get(transmission_name)
+        if transmission_id is None and ('transmission', transmission_name) not in self.missing_dimensions:
+            self.missing_dimensions.add(('transmission', transmission_name))
+            self.stdout.write(self.style.WARNING(f"Transmission type '{transmission_name}' not found in database"))
 
-        try:
-            transmission = Transmission.objects.get(name=trans_name)
-            self.cache['transmissions'][trans_str] = transmission
-            return transmission
-        except Transmission.DoesNotExist:
-            self.stdout.write(self.style.WARNING(f"Transmission type '{trans_name}' not found in database"))
-            return None
+        return transmission_id
 
-    def process_vehicle_record(self, api_data: Dict) -> bool:
-        """Process a single vehicle record from the API."""
+    def process_vehicle_record(self, api_data: Dict, classification: Optional[VehicleClassification] = None) -> bool:
+        """Normalize a single vehicle record from the API and queue it for the next upsert batch."""
         try:
+            if classification is None:
+                classification = classify_record(api_data)
 
             make_name = api_data.get('make')
             model_name = api_data.get('model')
@@ -396,40 +577,30 @@ class Command(BaseCommand):
                 self.stats['skipped'] += 1
                 return False
 
-            try:
-                year = int(year_str)
-                if year < 1900 or year > 2030:
-                    self.stats['skipped'] += 1
-                    return False
-            except (ValueError, TypeError):
+            year = self.parse_year(year_str)
+            if year is None:
                 self.stats['skipped'] += 1
                 return False
 
-            stamp = self.get_or_create_stamp(make_name)
-            if not stamp:
+            stamp_id = self.get_stamp_id(make_name)
+            if not stamp_id:
                 self.stats['skipped'] += 1
                 return False
 
-            model = self.get_or_create_model(base_model_name, stamp)
-            if not model:
+            model_id = self.get_model_id(base_model_name, stamp_id)
+            if not model_id:
                 self.stats['skipped'] += 1
                 return False
 
-            fuel = self.get_fuel_type(api_data.get('fueltype1', ''))
-            if not fuel:
-
-                fuel = Fuel.objects.filter(name='gasoline').first()
-                if not fuel:
-                    self.stats['skipped'] += 1
-                    return False
-
-            transmission = self.get_transmission_type(api_data.get('trany', ''))
-            if not transmission:
+            fuel_id = self.get_fuel_id(classification.fuel) or self.fallback_fuel_id
+            if not fuel_id:
+                self.stats['skipped'] += 1
+                return False
 
-                transmission = Transmission.objects.filter(name='automatic').first()
-                if not transmission:
-                    self.stats['skipped'] += 1
-                    return False
+            transmission_id = self.get_transmission_id(classification.transmission) or self.fallback_transmission_id
+            if not transmission_id:
+                self.stats['skipped'] += 1
+                return False
 
             try:
                 displ_value = api_data.get('displ', 0)
@@ -449,123 +620,436 @@ class Command(BaseCommand):
                 logger.warning(f"Invalid engine displacement value: {api_data.get('displ')} - setting to null")
                 engine_volume = None
 
-            drive = self.get_drive_type(api_data.get('drive', ''))
-            body_type = self.get_body_type(api_data.get('vclass', ''), model_name)
-
-            vclass = api_data.get('vclass', '').lower()
-            if 'two seater' in vclass:
-                seats_count = 2
-            elif 'van' in vclass or 'minivan' in vclass:
-                seats_count = 7
-            elif 'pickup' in vclass and 'crew' in model_name.lower():
-                seats_count = 5
-            elif 'suv' in vclass or 'sport utility' in vclass:
-                seats_count = 5
-            else:
-                seats_count = 4
-
-            external_id = f"opendatasoft_{api_data.get('id', '')}"
+            external_id = f"{self.SOURCE}_{api_data.get('id', '')}"
 
-            car, created = CarGeneralInfo.objects.update_or_create(
+            row = CarGeneralInfo(
                 external_id=external_id,
-                defaults={
-                    'stamp': stamp,
-                    'model': model,
-                    'year': year,
-                    'engine_volume': engine_volume,
-                    'body_type': body_type,
-                    'drive': drive,
-                    'primary_fuel_type': fuel,
-                    'primary_transmission': transmission,
-                    'seats_count': seats_count,
-
-                    'generation': None,
-                    'horse_power': None,
-                    'salon_color': None,
-                    'salon_type': None,
-                    'primary_color': None,
-                    'vin': None,
-                    'features': {},
-                }
+                stamp_id=stamp_id,
+                model_id=model_id,
+                year=year,
+                engine_volume=engine_volume,
+                body_type=classification.body_type,
+                drive=classification.drive,
+                primary_fuel_type_id=fuel_id,
+                primary_transmission_id=transmission_id,
+                seats_count=classification.seats_count,
+
+                generation=None,
+                horse_power=None,
+                salon_color=None,
+                salon_type=None,
+                primary_color=None,
+                vin=None,
+                features={},
             )
+            row.source_hash = self.row_hash(row)
+            self.pending_rows[external_id] = row
+            self.pending_payloads[external_id] = api_data
 
-            action = "Created" if created else "Updated"
             logger.debug(
-                f"{action}: {stamp.name} {model.name} ({year}) - "
-                f"{engine_volume}L {fuel.name} {transmission.name}"
+                f"Queued: {make_name} {base_model_name} ({year}) - "
+                f"{engine_volume}L {api_data.get('fueltype1')} {api_data.get('trany')}"
             )
 
             return True
 
         except Exception as e:
-            logger.error(f"Error processing record: {e}")
-            logger.error(f"Failed record: {api_data}")
-            import traceback
-            logger.error(traceback.format_exc())
+            self.quarantine_record(api_data, e)
             return False
 
-    def fetch_vehicles_by_make(self, make_name: str, expected_count: int) -> int:
-        """Fetch all vehicles for a specific make."""
-        offset = 0
-        make_stats = {
-            'processed': 0,
-            'successful': 0,
-            'failed': 0,
-        }
+    def quarantine_record(self, api_data: Dict, error: Exception) -> None:
+        """Queue a failed record for the quarantine table."""
+        entry = self.quarantine_entry(api_data, error)
+        if entry is not None:
+            self.quarantine[entry.external_id or f"#{len(self.quarantine)}"] = entry
+
+    def quarantine_entry(self, api_data: Dict, error: Exception) -> Optional[QuarantinedRecord]:
+        """Count a failed record and build its quarantine entry; only the first error of each type is logged.
+
+        Returns ``None`` while retrying the quarantine, whose entries already exist.
+        """
+        error_class = type(error).__name__
+        with self.stats_lock:
+            self.error_counts[error_class] += 1
+            first = self.error_counts[error_class] == 1
+        if first:
+            logger.warning(f"Quarantining records failing with {error_class}: {error}")
+        logger.debug(f"Quarantined record {api_data.get('id')}: {error_class}: {error}")
+
+        if self.retrying_quarantine:
+            return None
 
-        self.stdout.write(f"\nProcessing {make_name} (expected: {expected_count} vehicles)")
+        return QuarantinedRecord(
+            run=self.run,
+            source=self.SOURCE,
+            external_id=f"{self.SOURCE}_{api_data['id']}" if api_data.get('id') else None,
+            error_class=error_class,
+            error_message=str(error),
+            payload=api_data,
+        )
 
-        while True:
-            try:
+    def flush_quarantine(self) -> None:
+        """Write queued failed records; a record failing again replaces its earlier entry."""
+        entries = list(self.quarantine.values())
+        self.quarantine = {}
+        self.write_quarantine(entries)
+
+    def write_quarantine(self, entries: List[QuarantinedRecord]) -> None:
+        """Upsert quarantine entries in one statement."""
+        if not entries:
+            return
+
+        QuarantinedRecord.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=['source', 'external_id'],
+            update_fields=['run', 'error_class', 'error_message', 'payload', 'resolved_at', 'updated_at'],
+        )
+        with self.stats_lock:
+            self.stats['quarantined'] += len(entries)
+
+    @classmethod
+    def row_hash(cls, row: CarGeneralInfo) -> str:
+        """Stable hash of the normalized values written for a vehicle."""
+        values = (getattr(row, field) for field in cls.HASH_FIELDS)
+        payload = '\x1f'.join('' if value is None else str(value) for value in values)
+        return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+    def upsert_rows(
+        self,
+        rows: List[CarGeneralInfo],
+        pages: List[Tuple[str, int, int]],
+        make_name: str = TOTAL,
+    ) -> Tuple[int, int, int]:
+        """Write all new or changed rows of a batch with a single multi-row upsert keyed on external_id.
+
+        Stored hashes for the batch are prefetched in one query and rows whose hash
+        matches are skipped. The pages the rows came from are checkpointed in the
+        same transaction. Returns a ``(created, updated, unchanged)`` tuple.
+        """
+        if not rows and not pages:
+            return 0, 0, 0
+
+        created = updated = 0
+        started = time.perf_counter()
+        with transaction.atomic():
+            write_started = time.perf_counter()
+            if rows:
+                stored_hashes = dict(
+                    CarGeneralInfo.objects
+                    .filter(external_id__in=[row.external_id for row in rows])
+                    .values_list('external_id', 'source_hash')
+                )
+                changed_rows = []
+                for row in rows:
+                    if row.external_id not in stored_hashes:
+                        created += 1
+                    elif stored_hashes[row.external_id] != row.source_hash:
+                        updated += 1
+                    else:
+                        continue
+                    changed_rows.append(row)
+
+                if changed_rows:
+                    CarGeneralInfo.objects.bulk_create(
+                        changed_rows,
+                        batch_size=self.UPSERT_BATCH_SIZE,
+                        update_conflicts=True,
+                        unique_fields=['external_id'],
+                        update_fields=self.UPSERT_FIELDS,
+                    )
+            self.save_checkpoints(pages)
+            write_seconds = time.perf_counter() - write_started
+
+        self.profiler.record(make_name, 'write', write_seconds)
+        self.profiler.record(make_name, 'commit', time.perf_counter() - started - write_seconds)
+
+        return created, updated, len(rows) - created - updated
+
+    def stage_rows(self, rows: List[CarGeneralInfo], make_name: str = TOTAL) -> None:
+        """COPY a batch into the staging table; nothing reaches car_general_info until merge.
+
+        Pages are not checkpointed, since the unlogged staging table does not survive a crash.
+        """
+        with self.profiler.measure(make_name, 'write'):
+            self.copy_loader.write(rows)
+
+    def merge_staged_rows(self, sweep: bool) -> None:
+        """Merge everything staged by --copy into car_general_info, optionally sweeping stale rows."""
+        self.stdout.write(f"Merging {self.copy_loader.rows_staged} staged rows into car_general_info...")
+        swept = 0
+        started = time.perf_counter()
+        with transaction.atomic():
+            created, updated, unchanged = self.copy_loader.merge()
+            if sweep:
+                swept = self.copy_loader.sweep(f"{self.SOURCE}_")
+            write_seconds = time.perf_counter() - started
+        self.profiler.record(TOTAL, 'write', write_seconds)
+        self.profiler.record(TOTAL, 'commit', time.perf_counter() - started - write_seconds)
+
+        self.stats['created'] += created
+        self.stats['updated'] += updated
+        self.stats['unchanged'] += unchanged
+        self.stdout.write(f"Merged: New: {created}, Changed: {updated}, Unchanged: {unchanged}")
+        if sweep:
+            self.stdout.write(f"Swept {swept} vehicles no longer present upstream")
+
+    def write_batch(self, make_name: str, make_stats: Dict) -> None:
+        """Hand the pending batch to the write stage, or write it right away when there is none.
+
+        Blocks while the write queue is full, which in turn stops the fetcher once
+        its own buffer fills up.
+        """
+        make_stats['pages_in_batch'] = 0
+        self.flush_quarantine()
+        rows = list(self.pending_rows.values())
+        payloads = self.pending_payloads
+        pages = self.pending_pages
+        self.pending_rows = {}
+        self.pending_payloads = {}
+        self.pending_pages = []
+        if not rows and not pages:
+            return
+
+        if self.writer:
+            self.writer.submit(make_name, make_stats, rows, pages, payloads)
+        else:
+            self.write_rows(make_name, make_stats, rows, pages, payloads)
+
+    def write_rows(
+        self,
+        make_name: str,
+        make_stats: Dict,
+        rows: List[CarGeneralInfo],
+        pages: List[Tuple[str, int, int]],
+        payloads: Optional[Dict[str, Dict]] = None,
+    ) -> None:
+        """Write one batch and account for its result in the run and make stats.
+
+        A batch the database rejects is retried row by row, so that only the
+        offending rows are counted as failed and quarantined with their payloads.
+        """
+        batch_size = len(rows)
+        try:
+            if self.copy_loader:
+                self.stage_rows(rows, make_name)
+            else:
+                created, updated, unchanged = self.upsert_rows(rows, pages, make_name)
+        except DatabaseError as e:
+            self.stdout.write(self.style.ERROR(f"Batch write failed for {make_name}, retrying row by row: {e}"))
+            written, created, updated, unchanged = self.write_rows_singly(make_name, rows, pages, payloads or {})
+            with self.stats_lock:
+                make_stats['failed'] += batch_size - len(written)
+                self.stats['failed'] += batch_size - len(written)
+            batch_size = len(written)
+
+        with self.stats_lock:
+            make_stats['successful'] += batch_size
+            self.stats['successful'] += batch_size
+            if not self.copy_loader:
+                self.stats['created'] += created
+                self.stats['updated'] += updated
+                self.stats['unchanged'] += unchanged
+
+        if self.copy_loader:
+            if batch_size:
+                self.stdout.write(f"  {make_name}: staged {batch_size} rows")
+            return
+
+        if batch_size:
+            self.stdout.write(
+                f"  {make_name}: wrote batch of {batch_size} "
+                f"(New: {created}, Changed: {updated}, Unchanged: {unchanged})"
+            )
 
-                params = {
-                    'limit': self.LIMIT_PER_REQUEST,
-                    'offset': offset,
-                    'refine': f'make:"{make_name}"'
-                }
+    def write_rows_singly(
+        self,
+        make_name: str,
+        rows: List[CarGeneralInfo],
+        pages: List[Tuple[str, int, int]],
+        payloads: Dict[str, Dict],
+    ) -> Tuple[List[CarGeneralInfo], int, int, int]:
+        """Write a rejected batch one row at a time, quarantining each row that fails again.
+
+        The pages are checkpointed once the failed rows are quarantined, since
+        ``--retry-quarantine`` picks those up. Returns the rows written and their
+        ``(created, updated, unchanged)`` counts.
+        """
+        written = []
+        entries = []
+        created = updated = unchanged = 0
+        for row in rows:
+            try:
+                if self.copy_loader:
+                    self.stage_rows([row], make_name)
+                else:
+                    row_created, row_updated, row_unchanged = self.upsert_rows([row], [], make_name)
+                    created += row_created
+                    updated += row_updated
+                    unchanged += row_unchanged
+            except DatabaseError as e:
+                entry = self.quarantine_entry(payloads.get(row.external_id, {}), e)
+                if entry is not None:
+                    entries.append(entry)
+                continue
+            written.append(row)
 
-                logger.debug(f"Fetching {make_name}: offset={offset}, limit={self.LIMIT_PER_REQUEST}")
-                response = requests.get(self.BASE_URL, params=params, timeout=30)
-                response.raise_for_status()
+        try:
+            self.write_quarantine(entries)
+            if not self.copy_loader:
+                self.upsert_rows([], pages, make_name)
+        except DatabaseError as e:
+            self.stdout.write(self.style.ERROR(f"Could not quarantine the failed rows of {make_name}: {e}"))
+
+        return written, created, updated, unchanged
+
+    @contextmanager
+    def write_stage(self, queue_size: int):
+        """Run batch writes on a background thread for the duration of the block.
+
+        At most ``queue_size`` batches wait for the writer. The writer uses its own
+        database connection, which is closed when the block exits. A queue size of 0
+        keeps writes on the calling thread.
+        """
+        if queue_size < 1:
+            yield
+            return
 
-                data = response.json()
-                total_for_make = data.get('total_count', 0)
-                records = data.get('results', [])
+        self.writer = WriteBehind(self.write_rows_counted, queue_size, name='import-writer', on_exit=connections.close_all)
+        try:
+            yield
+        finally:
+            writer, self.writer = self.writer, None
+            writer.close()
+
+    def write_rows_counted(self, *args) -> None:
+        """write_rows for the writer thread, whose connection is not covered by handle()'s query counter."""
+        with connection.execute_wrapper(self.profiler.count_query):
+            self.write_rows(*args)
+
+    def wait_for_writes(self) -> None:
+        if self.writer:
+            self.writer.join()
+
+    def save_checkpoints(self, pages: List[Tuple[str, int, int]]) -> None:
+        """Record written pages against the current run."""
+        if not self.run or not pages:
+            return
 
-                if not records:
-                    break
+        ImportCheckpoint.objects.bulk_create(
+            [
+                ImportCheckpoint(run=self.run, make=make_name, offset=offset, records=records)
+                for make_name, offset, records in pages
+            ],
+            ignore_conflicts=True,
+        )
+        self.completed_pages.update((make_name, offset) for make_name, offset, _ in pages)
 
-                with transaction.atomic():
-                    for record in records:
-                        make_stats['processed'] += 1
-                        self.stats['total_processed'] += 1
+    def start_run(self, options: Dict) -> bool:
+        """Create a new run or load the one being resumed with its completed pages."""
+        if not options['resume'] and not options['run_id']:
+            self.run = ImportRun.objects.create()
+            self.stdout.write(f"Started import run #{self.run.pk}")
+            return True
 
-                        if self.process_vehicle_record(record):
-                            make_stats['successful'] += 1
-                            self.stats['successful'] += 1
-                        else:
-                            make_stats['failed'] += 1
-                            self.stats['failed'] += 1
+        runs = ImportRun.objects.all()
+        if options['run_id']:
+            self.run = runs.filter(pk=options['run_id']).first()
+        else:
+            self.run = runs.exclude(status='completed').first()
 
-                if make_stats['processed'] % 100 == 0 or make_stats['processed'] == total_for_make:
-                    self.stdout.write(
-                        f"  {make_name}: {make_stats['processed']}/{total_for_make} "
-                        f"(Success: {make_stats['successful']}, Failed: {make_stats['failed']})"
-                    )
+        if not self.run:
+            self.stdout.write(self.style.ERROR("No import run to resume"))
+            return False
 
-                offset += self.LIMIT_PER_REQUEST
+        self.completed_pages = set(self.run.checkpoints.values_list('make', 'offset'))
+        self.run.status = 'running'
+        self.run.save(update_fields=['status', 'updated_at'])
+        self.stdout.write(
+            f"Resuming import run #{self.run.pk}: {len(self.completed_pages)} pages already written"
+        )
+        return True
 
-                time.sleep(0.2)
+    def finish_run(self, status: str) -> None:
+        if not self.run:
+            return
 
-            except requests.RequestException as e:
-                self.stdout.write(self.style.ERROR(f"API request failed for {make_name}: {e}"))
-                time.sleep(5)
-                continue
+        self.run.status = status
+        self.run.stats = self.stats
+        self.run.finished_at = timezone.now()
+        self.run.save(update_fields=['status', 'stats', 'finished_at', 'updated_at'])
+
+    def fetch_page(self, make_name: str, offset: int, where: Optional[str] = None) -> Dict:
+        """Fetch one page of vehicles for a make from the API."""
+        params = {
+            'limit': self.LIMIT_PER_REQUEST,
+            'offset': offset,
+            'refine': f'make:"{make_name}"'
+        }
+        if where:
+            params['where'] = where
+
+        logger.debug(f"Fetching {make_name}: offset={offset}, limit={self.LIMIT_PER_REQUEST}, where={where}")
+        with self.profiler.measure(make_name, 'fetch'):
+            response = get_upstream('opendatasoft').get(
+                f"{self.dataset_url}/records",
+                params=params,
+                timeout=30,
+                concurrency_slot=self.upstream_slot,
+            )
+        response.raise_for_status()
+
+        with self.profiler.measure(make_name, 'decode'):
+            return response.json()
+
+    def process_page(self, make_name: str, offset: int, records: List[Dict], make_stats: Dict) -> None:
+        """Queue every record of a fetched page and flush once enough pages are buffered."""
+        if self.snapshot_writer:
+            self.snapshot_writer.write(make_name, records)
+            make_stats['processed'] += len(records)
+            make_stats['successful'] += len(records)
+            self.stats['total_processed'] += len(records)
+            self.stats['successful'] += len(records)
+            return
 
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"Error processing {make_name}: {e}"))
-                break
+        self.profiler.current_make = make_name
+        self.profiler.count_records(make_name, len(records))
+
+        with self.profiler.measure(make_name, 'dimensions'):
+            self.create_missing_dimensions(records)
+
+        with self.profiler.measure(make_name, 'classify'):
+            classifications = classify_records(records)
+
+        with self.profiler.measure(make_name, 'normalize'):
+            for record, classification in zip(records, classifications):
+                make_stats['processed'] += 1
+                self.stats['total_processed'] += 1
+
+                # Skipped records are counted in stats['skipped'] only; failures were quarantined.
+                skipped = self.stats['skipped']
+                if not self.process_vehicle_record(record, classification) and self.stats['skipped'] == skipped:
+                    with self.stats_lock:
+                        make_stats['failed'] += 1
+                        self.stats['failed'] += 1
+
+        self.pending_pages.append((make_name, offset, len(records)))
+        make_stats['pages_in_batch'] += 1
+        if make_stats['pages_in_batch'] >= self.batch_pages:
+            self.write_batch(make_name, make_stats)
+
+    def report_make_progress(self, make_name: str, make_stats: Dict, total_for_make: Optional[int] = None) -> None:
+        if make_stats['processed'] % 100 == 0 or make_stats['processed'] == total_for_make:
+            progress = make_stats['processed']
+            if total_for_make is not None:
+                progress = f"{progress}/{total_for_make}"
+            self.stdout.write(
+                f"  {make_name}: {progress} "
+                f"(Success: {make_stats['successful']}, Failed: {make_stats['failed']})"
+            )
 
+    def report_make_complete(self, make_name: str, make_stats: Dict) -> None:
+        self.wait_for_writes()
         self.stdout.write(
             self.style.SUCCESS(
                 f"✓ {make_name} complete: {make_stats['successful']} imported, "
@@ -573,39 +1057,287 @@ class Command(BaseCommand):
             )
         )
 
+    @staticmethod
+    def new_make_stats() -> Dict:
+        return {
+            'processed': 0,
+            'successful': 0,
+            'failed': 0,
+            'pages_in_batch': 0,
+        }
+
+    def fetch_vehicles_by_make(
+        self,
+        make_name: str,
+        expected_count: int,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None,
+    ) -> int:
+        """Fetch all vehicles for a specific make, optionally limited to a range of model years.
+
+        With ``prefetch_pages`` set, pages are fetched on a background thread up to
+        that many pages ahead of normalization.
+        """
+        make_stats = self.new_make_stats()
+        partition = Partition(make_name, expected_count, year_from, year_to)
+        label = partition.label
+
+        self.stdout.write(f"\nProcessing {label} (expected: {expected_count} vehicles)")
+
+        pages = self.iter_partition_pages(partition)
+        if self.prefetch_pages:
+            pages = prefetch(pages, self.prefetch_pages, name=f'import-fetch-{make_name}')
+
+        offset = 0
+        try:
+            for offset, data in pages:
+                self.process_page(label, offset, data['results'], make_stats)
+                self.report_make_progress(label, make_stats, data.get('total_count', 0))
+
+        except requests.RequestException as e:
+            self.stats['fetch_failures'] += 1
+            self.stdout.write(self.style.ERROR(f"API request failed for {label} after offset {offset}, giving up: {e}"))
+
+        except Exception as e:
+            self.stats['fetch_failures'] += 1
+            self.stdout.write(self.style.ERROR(f"Error processing {label}: {e}"))
+
+        finally:
+            pages.close()
+
+        self.write_batch(label, make_stats)
+        self.report_make_complete(label, make_stats)
+
         return make_stats['successful']
 
-    def handle(self, *args, **options):
+    def iter_partition_pages(self, partition: Partition) -> Iterator[Tuple[int, Dict]]:
+        """Yield ``(offset, page)`` for every non-empty page of a partition not yet checkpointed."""
+        offset = 0
+        while True:
+            if (partition.label, offset) in self.completed_pages:
+                logger.debug(f"Skipping {partition.label}: offset={offset} already written")
+                offset += self.LIMIT_PER_REQUEST
+                continue
 
-        log_level = logging.DEBUG if options['verbose'] else logging.INFO
-        logging.basicConfig(
-            level=log_level,
-            format='%(asctime)s - %(levelname)s - %(message)s'
+            data = self.fetch_page(partition.make_name, offset, partition.where)
+            if not data.get('results'):
+                return
+
+            yield offset, data
+            offset += self.LIMIT_PER_REQUEST
+
+    def build_page_plan(self, partitions: List[Partition]) -> List[Tuple[Partition, int]]:
+        """Precompute every (partition, offset) page from the expected counts, largest partitions first."""
+        plan = []
+        for partition in sorted(partitions, key=lambda item: item.expected_count, reverse=True):
+            pages = max(1, math.ceil(partition.expected_count / self.LIMIT_PER_REQUEST))
+            plan.extend((partition, page * self.LIMIT_PER_REQUEST) for page in range(pages))
+        return plan
+
+    def fetch_vehicles_concurrently(self, partitions: List[Partition], workers: int) -> None:
+        """Fetch pages on a bounded thread pool while this thread writes them in plan order.
+
+        At most ``workers * 2`` pages are in flight or buffered at any time. Results are
+        consumed in submission order, so every upsert batch still belongs to a single partition.
+        """
+        full_plan = self.build_page_plan(partitions)
+        planned_pages = Counter(partition.label for partition, _ in full_plan)
+        plan = deque(
+            (partition, offset) for partition, offset in full_plan
+            if (partition.label, offset) not in self.completed_pages
         )
+        pages_left = Counter(partition.label for partition, _ in plan)
+        sized_partitions = set()
+        partition_stats = {partition.label: self.new_make_stats() for partition in partitions}
+        max_in_flight = workers * 2
+        in_flight = deque()
+        current_label = None
+
+        for partition in partitions:
+            if not pages_left[partition.label]:
+                self.stats['makes_processed'] += 1
+                self.stdout.write(f"Skipping {partition.label}: all planned pages already written")
 
-        self.stdout.write(self.style.WARNING(
-            'Make sure to run "python manage.py create_fuel_transmission" first!'
-        ))
+        self.stdout.write(f"Fetching {len(plan)} pages with {workers} workers")
 
-        if not Fuel.objects.exists() or not Transmission.objects.exists():
-            self.stdout.write(
-                self.style.ERROR(
-                    'No Fuel or Transmission types found. Please run create_fuel_transmission command first.'
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='import-vehicles')
+        try:
+            while plan or in_flight:
+                while plan and len(in_flight) < max_in_flight:
+                    partition, offset = plan.popleft()
+                    future = executor.submit(self.fetch_page, partition.make_name, offset, partition.where)
+                    in_flight.append((partition, offset, future))
+
+                partition, offset, future = in_flight.popleft()
+                label = partition.label
+                stats = partition_stats[label]
+
+                if label != current_label:
+                    if current_label is not None:
+                        self.write_batch(current_label, partition_stats[current_label])
+                    current_label = label
+
+                try:
+                    data = future.result()
+                    total_for_partition = data.get('total_count', 0)
+                    records = data.get('results', [])
+
+                    if label not in sized_partitions:
+                        sized_partitions.add(label)
+                        needed_pages = math.ceil(total_for_partition / self.LIMIT_PER_REQUEST)
+                        extra_offsets = [
+                            page * self.LIMIT_PER_REQUEST
+                            for page in range(planned_pages[label], needed_pages)
+                            if (label, page * self.LIMIT_PER_REQUEST) not in self.completed_pages
+                        ]
+                        if extra_offsets:
+                            logger.debug(f"{label}: scheduling {len(extra_offsets)} pages beyond the expected count")
+                            insert_at = 0
+                            while insert_at < len(plan) and plan[insert_at][0] == partition:
+                                insert_at += 1
+                            for extra in reversed(extra_offsets):
+                                plan.insert(insert_at, (partition, extra))
+                            pages_left[label] += len(extra_offsets)
+
+                    if records:
+                        self.process_page(label, offset, records, stats)
+                        self.report_make_progress(label, stats, total_for_partition)
+
+                except Exception as e:
+                    self.stats['fetch_failures'] += 1
+                    self.stdout.write(self.style.ERROR(f"Error processing {label} at offset {offset}: {e}"))
+
+                pages_left[label] -= 1
+                if pages_left[label] == 0:
+                    self.write_batch(label, stats)
+                    self.stats['makes_processed'] += 1
+                    self.report_make_complete(label, stats)
+                    self.stdout.write(
+                        f"Overall progress: {self.stats['makes_processed']}/{len(partitions)} partitions, "
+                        f"{self.stats['total_processed']} vehicles processed"
+                    )
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def retry_quarantine(self) -> None:
+        """Reprocess unresolved quarantined records; entries whose rows are written are marked resolved."""
+        entries = QuarantinedRecord.objects.filter(source=self.SOURCE, resolved_at__isnull=True).order_by('pk')
+        label = 'quarantine'
+        make_stats = self.new_make_stats()
+        self.retrying_quarantine = True
+        self.stdout.write(f"Retrying {entries.count()} quarantined records")
+
+        last_pk = 0
+        while True:
+            chunk = list(entries.filter(pk__gt=last_pk)[:self.LIMIT_PER_REQUEST])
+            if not chunk:
+                break
+            last_pk = chunk[-1].pk
+
+            records = [entry.payload for entry in chunk]
+            self.create_missing_dimensions(records)
+            recovered = []
+            for entry, record, classification in zip(chunk, records, classify_records(records)):
+                make_stats['processed'] += 1
+                self.stats['total_processed'] += 1
+                if self.process_vehicle_record(record, classification):
+                    recovered.append(entry.pk)
+                else:
+                    make_stats['failed'] += 1
+                    self.stats['failed'] += 1
+
+            failed_before_write = make_stats['failed']
+            self.write_batch(label, make_stats)
+            self.wait_for_writes()
+            if make_stats['failed'] == failed_before_write:
+                QuarantinedRecord.objects.filter(pk__in=recovered).update(
+                    resolved_at=timezone.now(), updated_at=timezone.now()
                 )
-            )
+            self.report_make_progress(label, make_stats)
+
+        self.report_make_complete(label, make_stats)
+
+    def load_snapshot(self, path: str) -> None:
+        """Stream snapshot files through the normal record pipeline without any HTTP."""
+        snapshot_files = iter_snapshot_files(path)
+        if not snapshot_files:
+            self.stdout.write(self.style.ERROR(f"No snapshot files found at {path}"))
             return
 
-        self.stdout.write(self.style.SUCCESS('Starting vehicle data import by make...'))
+        self.stdout.write(f"Loading {len(snapshot_files)} snapshot files from {path}")
+
+        for snapshot_file in snapshot_files:
+            # Offsets restart in every file, and a make split by year spans several files,
+            # so pages are checkpointed under the file name rather than the make.
+            label = snapshot_file.name
+            started = False
+            make_stats = self.new_make_stats()
+
+            for offset, records in read_snapshot_pages(snapshot_file, self.LIMIT_PER_REQUEST):
+                if not started:
+                    started = True
+                    self.stdout.write(f"\nProcessing {records[0].get('make') or label} from {label}")
+
+                if (label, offset) in self.completed_pages:
+                    continue
+
+                self.process_page(label, offset, records, make_stats)
+                self.report_make_progress(label, make_stats)
+
+            if not started:
+                continue
+
+            self.write_batch(label, make_stats)
+            self.stats['makes_processed'] += 1
+            self.report_make_complete(label, make_stats)
+
+    def write_report(self, path: str, profile: Dict, elapsed_time: float, run_status: str) -> None:
+        report = {
+            'run_id': self.run.pk if self.run else None,
+            'status': run_status,
+            'finished_at': timezone.now().isoformat(),
+            'elapsed_seconds': elapsed_time,
+            'stats': self.stats,
+            'errors': dict(self.error_counts),
+            'http_pool': get_upstream('opendatasoft').pool_stats(),
+            'profile': profile,
+        }
+        with open(path, 'w', encoding='utf-8') as report_file:
+            json.dump(report, report_file, indent=2)
+        self.stdout.write(f"Profile written to {path}")
+
+    def plan_partitions(self, options: Dict) -> List[Partition]:
+        """Partition plan from the dataset's facets, falling back to MAKES_LIST."""
+        if not options['static_makes']:
+            try:
+                return discover_partitions(
+                    options['max_partition_size'],
+                    refresh=options['refresh_plan'],
+                    dataset_url=self.dataset_url,
+                )
+            except requests.RequestException as e:
+                self.stats['fetch_failures'] += 1
+                self.stdout.write(self.style.WARNING(f"Make discovery failed, using the built-in make list: {e}"))
+
+        return static_partitions(self.MAKES_LIST)
+
+    def select_partitions(self, options: Dict) -> List[Partition]:
+        partitions = self.plan_partitions(options)
+
+        make_names = []
+        for partition in partitions:
+            if partition.make_name not in make_names:
+                make_names.append(partition.make_name)
 
         if options['makes']:
 
-            makes_to_process = []
+            selected_makes = set()
             for make_name in options['makes']:
 
                 found = False
-                for make, count in self.MAKES_LIST:
+                for make in make_names:
                     if make.lower() == make_name.lower():
-                        makes_to_process.append((make, count))
+                        selected_makes.add(make)
                         found = True
                         break
                 if not found:
@@ -613,43 +1345,197 @@ class Command(BaseCommand):
         else:
 
             start_idx = options['skip_makes']
-            end_idx = start_idx + options['limit_makes'] if options['limit_makes'] else len(self.MAKES_LIST)
-            makes_to_process = self.MAKES_LIST[start_idx:end_idx]
+            end_idx = start_idx + options['limit_makes'] if options['limit_makes'] else len(make_names)
+            selected_makes = set(make_names[start_idx:end_idx])
+
+        return [partition for partition in partitions if partition.make_name in selected_makes]
 
-        if not makes_to_process:
-            self.stdout.write(self.style.ERROR("No makes to process"))
+    def fetch_makes(self, partitions: List[Partition], workers: int) -> None:
+        if workers > 1:
+            self.fetch_vehicles_concurrently(partitions, workers)
             return
 
-        total_expected = sum(count for _, count in makes_to_process)
-        self.stdout.write(
-            f"Will process {len(makes_to_process)} makes with approximately {total_expected} vehicles"
+        for partition in partitions:
+            self.stats['makes_processed'] += 1
+            self.fetch_vehicles_by_make(*partition)
+
+            self.stdout.write(
+                f"Overall progress: {self.stats['makes_processed']}/{len(partitions)} partitions, "
+                f"{self.stats['total_processed']} vehicles processed"
+            )
+
+    def handle(self, *args, **options):
+
+        log_level = logging.DEBUG if options['verbose'] else logging.INFO
+        logging.basicConfig(
+            level=log_level,
+            format='%(asctime)s - %(levelname)s - %(message)s'
         )
 
+        capture_dir = options['capture_snapshot']
+        snapshot_path = options['from_snapshot']
+
+        retry_quarantine = options['retry_quarantine']
+
+        if capture_dir and snapshot_path:
+            self.stdout.write(self.style.ERROR("--capture-snapshot and --from-snapshot cannot be combined"))
+            return
+
+        if retry_quarantine and (capture_dir or snapshot_path or options['copy']):
+            self.stdout.write(self.style.ERROR(
+                "--retry-quarantine cannot be combined with snapshots or --copy"
+            ))
+            return
+
+        if options['copy'] and (capture_dir or options['resume'] or options['run_id']):
+            self.stdout.write(self.style.ERROR("--copy cannot be combined with --capture-snapshot or resuming a run"))
+            return
+
+        partial_refresh = options['makes'] or options['skip_makes'] or options['limit_makes']
+        if options['sweep'] and (not options['copy'] or partial_refresh):
+            self.stdout.write(self.style.ERROR("--sweep needs --copy and a refresh of all makes"))
+            return
+
+        if not capture_dir:
+            self.stdout.write(self.style.WARNING(
+                'Make sure to run "python manage.py create_fuel_transmission" first!'
+            ))
+
+            error = self.check_preconditions()
+            if error:
+                self.stdout.write(self.style.ERROR(error))
+                return
+
+        self.batch_pages = max(1, options['batch_pages'])
+        self.prefetch_pages = max(0, options['prefetch_pages'])
+        self.dataset_url = options['dataset_url'].rstrip('/')
+
+        if snapshot_path:
+            makes_to_process = []
+            self.stdout.write(self.style.SUCCESS(f'Starting vehicle data import from snapshot {snapshot_path}...'))
+        elif retry_quarantine:
+            makes_to_process = []
+            self.stdout.write(self.style.SUCCESS('Retrying quarantined vehicle records...'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Starting vehicle data import by make...'))
+
+            makes_to_process = self.select_partitions(options)
+            if not makes_to_process:
+                self.stdout.write(self.style.ERROR("No makes to process"))
+                return
+
+            total_expected = sum(partition.expected_count for partition in makes_to_process)
+            self.stdout.write(
+                f"Will process {len(makes_to_process)} partitions with approximately {total_expected} vehicles"
+            )
+
+        if capture_dir:
+            self.snapshot_writer = SnapshotWriter(capture_dir)
+            self.stdout.write(f"Capturing raw records to {capture_dir} (no database writes)")
+        elif not self.start_run(options):
+            return
+        else:
+            self.prepare_dimensions(makes_to_process)
+
+        if options['copy']:
+            self.copy_loader = CopyLoader(
+                ['external_id'] + [name for name in self.UPSERT_FIELDS if name != 'updated_at'],
+                staging_table=f"{STAGING_TABLE}_{self.run.pk}",
+            )
+            self.copy_loader.prepare()
+            self.stdout.write(f"Staging rows in {self.copy_loader.staging_table} for a COPY merge")
+
         start_time = time.time()
+        run_status = 'interrupted'
+        drop_indexes = options['drop_indexes'] and not capture_dir
 
         try:
-            for make_name, expected_count in makes_to_process:
-                self.stats['makes_processed'] += 1
-                self.fetch_vehicles_by_make(make_name, expected_count)
-
-                self.stdout.write(
-                    f"Overall progress: {self.stats['makes_processed']}/{len(makes_to_process)} makes, "
-                    f"{self.stats['total_processed']} vehicles processed"
-                )
+            if drop_indexes:
+                dropped = drop_secondary_indexes(CarGeneralInfo)
+                self.stdout.write(f"Dropped {len(dropped)} secondary indexes; they are rebuilt after the load")
+
+            with connection.execute_wrapper(self.profiler.count_query):
+                with self.write_stage(options['write_queue']):
+                    if snapshot_path:
+                        self.load_snapshot(snapshot_path)
+                    elif retry_quarantine:
+                        self.retry_quarantine()
+                    else:
+                        self.fetch_makes(makes_to_process, options['workers'])
+
+                if self.copy_loader:
+                    sweep = options['sweep']
+                    if sweep and self.stats['failed']:
+                        self.stdout.write(self.style.WARNING("Not sweeping: some rows failed to stage"))
+                        sweep = False
+                    elif sweep and self.stats['fetch_failures']:
+                        self.stdout.write(self.style.WARNING(
+                            "Not sweeping: some pages, partitions or the make discovery failed to fetch"
+                        ))
+                        sweep = False
+                    self.merge_staged_rows(sweep)
+
+            run_status = ImportRun.finished_status(self.stats)
 
         except KeyboardInterrupt:
             self.stdout.write(self.style.WARNING("\nImport interrupted by user"))
 
+        finally:
+            if self.snapshot_writer:
+                self.snapshot_writer.close()
+            if self.copy_loader:
+                self.copy_loader.drop()
+            self.finish_run(run_status)
+            if drop_indexes:
+                self.stdout.write("Rebuilding secondary indexes concurrently...")
+                with self.profiler.measure(TOTAL, 'indexes'):
+                    rebuilt = rebuild_secondary_indexes(CarGeneralInfo)
+                self.stdout.write(f"Rebuilt {len(rebuilt)} secondary indexes and analyzed car_general_info")
+
         elapsed_time = time.time() - start_time
         hours, remainder = divmod(elapsed_time, 3600)
         minutes, seconds = divmod(remainder, 60)
+        makes_total = len(makes_to_process) or self.stats['makes_processed']
 
         self.stdout.write("=" * 60)
         self.stdout.write(self.style.SUCCESS("Import Summary:"))
-        self.stdout.write(f"Makes processed: {self.stats['makes_processed']}/{len(makes_to_process)}")
+        self.stdout.write(f"Partitions processed: {self.stats['makes_processed']}/{makes_total}")
         self.stdout.write(f"Total vehicles processed: {self.stats['total_processed']}")
-        self.stdout.write(f"Successfully imported: {self.stats['successful']}")
-        self.stdout.write(f"Failed: {self.stats['failed']}")
-        self.stdout.write(f"Skipped (invalid data): {self.stats['skipped']}")
+        if self.snapshot_writer:
+            self.stdout.write(f"Records captured: {self.snapshot_writer.records_written} to {capture_dir}")
+        else:
+            self.stdout.write(f"Successfully imported: {self.stats['successful']}")
+            self.stdout.write(
+                f"  New: {self.stats['created']}, Changed: {self.stats['updated']}, "
+                f"Unchanged: {self.stats['unchanged']}"
+            )
+            self.stdout.write(f"Failed: {self.stats['failed']}")
+            self.stdout.write(f"Fetch failures: {self.stats['fetch_failures']}")
+            self.stdout.write(f"Skipped (invalid data): {self.stats['skipped']}")
+            self.stdout.write(f"Quarantined: {self.stats['quarantined']}")
+            for error_class, count in self.error_counts.most_common():
+                self.stdout.write(f"  {error_class}: {count}")
         self.stdout.write(f"Total runtime: {int(hours)}h {int(minutes)}m {int(seconds)}s")
+        for host, usage in get_upstream('opendatasoft').pool_stats().items():
+            self.stdout.write(
+                f"HTTP pool {host}: {usage['connections_opened']} connections opened "
+                f"for {usage['requests']} requests"
+            )
+
+        profile = self.profiler.report()
+        self.stdout.write("Stage timings (p50 / p95 / max, total):")
+        for stage, timing in profile['stages'].items():
+            self.stdout.write(
+                f"  {stage:<10} {timing['p50'] * 1000:8.1f}ms {timing['p95'] * 1000:8.1f}ms "
+                f"{timing['max'] * 1000:8.1f}ms  {timing['total']:8.1f}s over {timing['count']} calls"
+            )
+        if profile['queries_per_record'] is not None:
+            self.stdout.write(
+                f"Queries: {profile['queries']} ({profile['queries_per_record']:.3f} per record)"
+            )
+
+        if options['report_json']:
+            self.write_report(options['report_json'], profile, elapsed_time, run_status)
+        if self.run:
+            self.stdout.write(f"Run ID: {self.run.pk} (resume with --resume --run-id {self.run.pk})")
         self.stdout.write("=" * 60)
@@ -0,0 +1,76 @@
+from django.core.management.base import BaseCommand
+
+from ...importer.indexes import index_usage, missing_indexes, rebuild_secondary_indexes
+from ...models import CarGeneralInfo
+
+
+def format_size(size: int) -> str:
+    for unit in ('B', 'kB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f}{unit}" if unit == 'B' else f"{size:.1f}{unit}"
+        size /= 1024
+
+
+class Command(BaseCommand):
+    help = 'Report index size and usage from pg_stat_user_indexes and flag redundant indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--table',
+            default=CarGeneralInfo._meta.db_table,
+            help='Table to report on'
+        )
+        parser.add_argument(
+            '--all-tables',
+            action='store_true',
+            help='Report on every user table'
+        )
+        parser.add_argument(
+            '--create-missing',
+            action='store_true',
+            help='Concurrently create car_general_info indexes that are declared in the model but missing, '
+                 'e.g. after an interrupted import_vehicles --drop-indexes'
+        )
+
+    def handle(self, *args, **options):
+        missing = missing_indexes(CarGeneralInfo)
+        if missing and options['create_missing']:
+            created = rebuild_secondary_indexes(CarGeneralInfo)
+            self.stdout.write(self.style.SUCCESS(f"Created {len(created)} missing indexes: {', '.join(created)}"))
+        elif missing:
+            self.stdout.write(self.style.WARNING(
+                f"{len(missing)} indexes declared on CarGeneralInfo are missing: "
+                f"{', '.join(index.name for index in missing)} (rebuild with --create-missing)"
+            ))
+
+        indexes = index_usage(None if options['all_tables'] else options['table'])
+        if not indexes:
+            self.stdout.write(self.style.ERROR("No indexes found"))
+            return
+
+        self.stdout.write(f"{'index':<45} {'size':>9} {'scans':>10} {'tuples read':>12}  notes")
+        for index in indexes:
+            notes = []
+            if index['primary']:
+                notes.append('primary key')
+            elif index['unique']:
+                notes.append('unique')
+            if index['covered_by']:
+                notes.append(f"redundant with {index['covered_by']}")
+            if not index['scans'] and not index['primary'] and not index['unique']:
+                notes.append('never scanned')
+
+            name = f"{index['table']}.{index['name']}" if options['all_tables'] else index['name']
+            self.stdout.write(
+                f"{name:<45} {format_size(index['size']):>9} {index['scans']:>10} "
+                f"{index['tuples_read']:>12}  {', '.join(notes)}"
+            )
+
+        redundant = [index for index in indexes if index['covered_by']]
+        total_size = sum(index['size'] for index in indexes)
+        self.stdout.write(f"Total index size: {format_size(total_size)}")
+        if redundant:
+            self.stdout.write(self.style.WARNING(
+                f"{len(redundant)} redundant indexes use {format_size(sum(index['size'] for index in redundant))}"
+            ))
+        self.stdout.write("Scan counts are cumulative since the last pg_stat_reset().")
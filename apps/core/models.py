@@ -33,6 +33,11 @@ class Stamp(MultiLanguageModel):
 
     class Meta:
         db_table = "car_stamp"
+        # Concurrent import partitions insert stamps with ignore_conflicts and read the ids back.
+        # Existing databases need ``manage.py dedupe_dimensions`` before this constraint migrates.
+        constraints = [
+            models.UniqueConstraint(fields=["name"], name="unique_stamp_name"),
+        ]
         indexes = [
             models.Index(fields=["name"]),
             models.Index(fields=["name_ru"]),
@@ -54,6 +59,9 @@ class Model(MultiLanguageModel):
 
     class Meta:
         db_table = "car_model"
+        constraints = [
+            models.UniqueConstraint(fields=["stamp", "name"], name="unique_model_stamp_name"),
+        ]
         indexes = [
             models.Index(fields=["name"]),
             models.Index(fields=["name_ru"]),
@@ -200,7 +208,13 @@ class CarGeneralInfo(TimestampedModel):
     )
 
     seats_count = models.PositiveSmallIntegerField(default=4)
-    external_id = models.CharField(max_length=255, blank=True, null=True)
+    external_id = models.CharField(max_length=255, blank=True, null=True, unique=True)
+    source_hash = models.CharField(
+        max_length=32,
+        blank=True,
+        null=True,
+        help_text="Hash of the normalized source record, used to skip unchanged rows on import"
+    )
     vin = models.CharField(max_length=255, blank=True, null=True)
     features = JSONField(default=dict, blank=True, null=True)
 
@@ -224,3 +238,181 @@ class CarGeneralInfo(TimestampedModel):
             models.Index(fields=["generation"]),
             models.Index(fields=["primary_color"]),
         ]
+
+
+class ImportRun(TimestampedModel):
+    """Single run of the import_vehicles command, used to resume interrupted imports."""
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('interrupted', 'Interrupted'),
+        ('completed', 'Completed'),
+        ('completed_with_errors', 'Completed with errors'),
+        ('failed', 'Failed'),
+    ]
+    status = models.CharField(max_length=32, choices=STATUS_CHOICES, default='running')
+    stats = JSONField(default=dict, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    @staticmethod
+    def finished_status(stats: dict) -> str:
+        """Status of a run that ran to the end with ``stats``: rows or pages that failed leave it incomplete."""
+        if stats.get('failed') or stats.get('fetch_failures'):
+            return 'completed_with_errors'
+        return 'completed'
+
+    def __str__(self):
+        return f"Import run #{self.pk} ({self.status})"
+
+    class Meta:
+        ordering = ["-created_at"]
+        db_table = "import_run"
+        indexes = [
+            models.Index(fields=["status", "-created_at"]),
+        ]
+
+
+class ImportCheckpoint(models.Model):
+    """Page of a make whose records were written by an import run."""
+    run = models.ForeignKey(ImportRun, on_delete=models.CASCADE, related_name="checkpoints")
+    make = models.CharField(max_length=255)
+    offset = models.PositiveIntegerField()
+    records = models.PositiveIntegerField(default=0)
+    completed_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.make}@{self.offset} (run #{self.run_id})"
+
+    class Meta:
+        db_table = "import_checkpoint"
+        constraints = [
+            models.UniqueConstraint(fields=["run", "make", "offset"], name="unique_import_checkpoint_page"),
+        ]
+
+
+class QuarantinedRecord(TimestampedModel):
+    """Raw source record that failed to import, kept for inspection and ``import_vehicles --retry-quarantine``."""
+    run = models.ForeignKey(
+        ImportRun,
+        on_delete=models.SET_NULL,
+        related_name="quarantined_records",
+        null=True,
+        blank=True
+    )
+    source = models.CharField(max_length=50)
+    external_id = models.CharField(max_length=255, blank=True, null=True)
+    error_class = models.CharField(max_length=255)
+    error_message = models.TextField(blank=True)
+    payload = JSONField(default=dict)
+    resolved_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.source}:{self.external_id} ({self.error_class})"
+
+    class Meta:
+        ordering = ["-created_at"]
+        db_table = "import_quarantine"
+        constraints = [
+            models.UniqueConstraint(fields=["source", "external_id"], name="unique_quarantined_record"),
+        ]
+        indexes = [
+            models.Index(fields=["source", "resolved_at"]),
+            models.Index(fields=["error_class"]),
+        ]
+
+
+class CatalogEntry(TimestampedModel):
+    """Row of a CarAPI catalog endpoint, mirrored by the ``sync_carapi_catalog`` task.
+
+    ``make``, ``model`` and ``submodel`` are lowercased for the lookups behind the
+    proxy's filter params; ``data`` is the item exactly as CarAPI returned it.
+    Makes and models are stored once per year they are listed for, plus once with
+    no year for the unfiltered list; other endpoints carry their own year.
+    """
+    ENDPOINT_CHOICES = [
+        ('/years', 'Years'),
+        ('/makes', 'Makes'),
+        ('/models', 'Models'),
+        ('/submodels', 'Submodels'),
+        ('/trims', 'Trims'),
+    ]
+    endpoint = models.CharField(max_length=20, choices=ENDPOINT_CHOICES)
+    external_id = models.CharField(max_length=50, blank=True, null=True)
+    year = models.PositiveSmallIntegerField(blank=True, null=True)
+    make = models.CharField(max_length=255, blank=True, null=True)
+    model = models.CharField(max_length=255, blank=True, null=True)
+    submodel = models.CharField(max_length=255, blank=True, null=True)
+    position = models.PositiveIntegerField(default=0)
+    data = JSONField(default=dict)
+    stamp = models.ForeignKey(
+        Stamp,
+        on_delete=models.SET_NULL,
+        related_name="catalog_entries",
+        null=True,
+        blank=True
+    )
+    car_model = models.ForeignKey(
+        Model,
+        on_delete=models.SET_NULL,
+        related_name="catalog_entries",
+        null=True,
+        blank=True
+    )
+    generation = models.ForeignKey(
+        Generation,
+        on_delete=models.SET_NULL,
+        related_name="catalog_entries",
+        null=True,
+        blank=True
+    )
+
+    def __str__(self):
+        return f"{self.endpoint} {self.external_id} ({self.year})"
+
+    class Meta:
+        db_table = "carapi_catalog"
+        indexes = [
+            models.Index(fields=["endpoint", "year", "make", "model", "submodel"]),
+            models.Index(fields=["endpoint", "make", "model", "submodel"]),
+        ]
+
+
+class CatalogSyncState(TimestampedModel):
+    """When ``sync_carapi_catalog`` last replaced the mirrored rows of an endpoint."""
+    endpoint = models.CharField(max_length=20, choices=CatalogEntry.ENDPOINT_CHOICES, unique=True)
+    synced_at = models.DateTimeField()
+    rows = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.endpoint} synced at {self.synced_at}"
+
+    class Meta:
+        db_table = "carapi_catalog_sync"
+
+
+class VINDecode(TimestampedModel):
+    """CarAPI decode of a VIN, or the upstream's rejection of it, which is kept until ``expires_at``."""
+    vin = models.CharField(max_length=17, primary_key=True)
+    status_code = models.PositiveSmallIntegerField(default=200)
+    data = JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.vin} ({self.status_code})"
+
+    class Meta:
+        db_table = "vin_decode"
+
+
+class VINPrefix(TimestampedModel):
+    """Make, model and year shared by every VIN with the same WMI, VDS and model year code."""
+    prefix = models.CharField(max_length=9, primary_key=True)
+    make = models.CharField(max_length=255, blank=True, null=True)
+    model = models.CharField(max_length=255, blank=True, null=True)
+    year = models.PositiveSmallIntegerField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.prefix}: {self.year} {self.make} {self.model}"
+
+    class Meta:
+        db_table = "vin_prefix"
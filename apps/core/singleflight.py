@@ -0,0 +1,222 @@
+"""Single-flight coalescing of expensive calls, within a process and across processes.
+
+Concurrent callers asking for the same key share one computation: threads of
+this process wait on the thread that got there first, and other processes wait
+on a Redis lock and pick the result up from the shared cache once the lock
+holder has stored it. ``AsyncSingleFlight`` does the same for coroutines.
+"""
+import asyncio
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, Optional, Set, TypeVar
+
+from asgiref.sync import sync_to_async
+from django_redis import get_redis_connection
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+_refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='singleflight-refresh')
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Runs at most one computation per key at a time across every process sharing Redis.
+
+    ``read_shared`` passed to ``run`` must return the value a finished computation
+    left in the shared cache, or ``None``; callers that lose the race for the lock
+    poll it until the holder is done or ``wait_timeout`` expires, after which they
+    compute the value themselves rather than fail.
+    """
+
+    def __init__(self, namespace: str, lock_timeout: float = 30, wait_timeout: float = 10,
+                 poll_interval: float = 0.05):
+        self.namespace = namespace
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.lock = threading.Lock()
+        self.calls: Dict[str, _Call] = {}
+        self.refreshing: Set[str] = set()
+        self._redis = None
+        self._release_script = None
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = get_redis_connection('default')
+            self._release_script = self._redis.register_script(RELEASE_SCRIPT)
+        return self._redis
+
+    def lock_key(self, key: str) -> str:
+        return f"singleflight:{self.namespace}:{key}"
+
+    def acquire(self, key: str) -> Optional[str]:
+        """Take the cross-process lock for ``key``; returns its token, or ``None`` if someone holds it."""
+        token = uuid.uuid4().hex
+        try:
+            acquired = self.redis.set(self.lock_key(key), token, nx=True, px=int(self.lock_timeout * 1000))
+        except Exception as e:
+            logger.warning(f"Single-flight lock unavailable, computing {key} without it: {e}")
+            return token
+        return token if acquired else None
+
+    def release(self, key: str, token: str) -> None:
+        try:
+            self._release_script(keys=[self.lock_key(key)], args=[token])
+        except Exception as e:
+            logger.warning(f"Single-flight lock release failed for {key}: {e}")
+
+    def run(self, key: str, compute: Callable[[], T], read_shared: Callable[[], Optional[T]]) -> T:
+        """Return ``compute()``, sharing one computation among all concurrent callers for ``key``."""
+        with self.lock:
+            call = self.calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self.calls[key] = _Call()
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self.run_shared(key, compute, read_shared)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+
+    def run_shared(self, key: str, compute: Callable[[], T], read_shared: Callable[[], Optional[T]]) -> T:
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            token = self.acquire(key)
+            if token is not None:
+                try:
+                    # The previous holder may have finished between our cache miss and the lock.
+                    value = read_shared()
+                    return value if value is not None else compute()
+                finally:
+                    self.release(key, token)
+
+            value = read_shared()
+            if value is not None:
+                return value
+            if time.monotonic() >= deadline:
+                logger.warning(f"Gave up waiting for the single-flight holder of {key}")
+                return compute()
+            time.sleep(self.poll_interval)
+
+    def refresh(self, key: str, compute: Callable[[], object]) -> None:
+        """Run ``compute`` in the background unless this or another process is already refreshing ``key``."""
+        with self.lock:
+            if key in self.refreshing:
+                return
+            self.refreshing.add(key)
+
+        def task():
+            try:
+                token = self.acquire(key)
+                if token is None:
+                    return
+                try:
+                    compute()
+                finally:
+                    self.release(key, token)
+            except Exception:
+                logger.exception(f"Background refresh of {key} failed")
+            finally:
+                with self.lock:
+                    self.refreshing.discard(key)
+
+        _refresh_executor.submit(task)
+
+
+class AsyncSingleFlight:
+    """Event-loop counterpart of ``SingleFlight``, sharing its Redis lock with sync callers.
+
+    Coroutines asking for the same key await one shared task; a caller that is
+    cancelled (e.g. its client disconnected) leaves the task running for the others.
+    ``compute`` and ``read_shared`` are coroutine functions.
+    """
+
+    def __init__(self, shared: SingleFlight):
+        self.shared = shared
+        self.calls: Dict[str, asyncio.Future] = {}
+        self.refreshing: Set[str] = set()
+        self.tasks: Set[asyncio.Task] = set()
+
+    async def run(self, key: str, compute: Callable[[], Awaitable[T]],
+                  read_shared: Callable[[], Awaitable[Optional[T]]]) -> T:
+        call = self.calls.get(key)
+        if call is None:
+            call = self.calls[key] = asyncio.ensure_future(self.run_shared(key, compute, read_shared))
+            call.add_done_callback(lambda _: self.calls.pop(key, None))
+        return await asyncio.shield(call)
+
+    async def run_shared(self, key: str, compute: Callable[[], Awaitable[T]],
+                         read_shared: Callable[[], Awaitable[Optional[T]]]) -> T:
+        deadline = time.monotonic() + self.shared.wait_timeout
+        while True:
+            token = await sync_to_async(self.shared.acquire)(key)
+            if token is not None:
+                try:
+                    value = await read_shared()
+                    return value if value is not None else await compute()
+                finally:
+                    await sync_to_async(self.shared.release)(key, token)
+
+            value = await read_shared()
+            if value is not None:
+                return value
+            if time.monotonic() >= deadline:
+                logger.warning(f"Gave up waiting for the single-flight holder of {key}")
+                return await compute()
+            await asyncio.sleep(self.shared.poll_interval)
+
+    def refresh(self, key: str, compute: Callable[[], Awaitable[object]]) -> None:
+        """Schedule ``compute`` on the running loop unless ``key`` is already being refreshed."""
+        if key in self.refreshing:
+            return
+        self.refreshing.add(key)
+
+        async def task():
+            try:
+                token = await sync_to_async(self.shared.acquire)(key)
+                if token is None:
+                    return
+                try:
+                    await compute()
+                finally:
+                    await sync_to_async(self.shared.release)(key, token)
+            except Exception:
+                logger.exception(f"Background refresh of {key} failed")
+            finally:
+                self.refreshing.discard(key)
+
+        # The loop only keeps weak references to tasks.
+        background = asyncio.ensure_future(task())
+        self.tasks.add(background)
+        background.add_done_callback(self.tasks.discard)
@@ -0,0 +1,154 @@
+import logging
+from typing import Dict, List, Optional
+
+import requests
+from celery import chord, shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from .catalog import CatalogSync
+from .importer.planning import Partition, discover_partitions, static_partitions
+from .importer.upstream import UpstreamSemaphore
+from .management.commands.import_vehicles import Command as ImportVehiclesCommand
+from .models import ImportRun
+from .views import carapi_service
+
+logger = logging.getLogger(__name__)
+
+PARTITION_THRESHOLD = 2000
+YEARS_PER_PARTITION = 10
+PREFETCH_PAGES = 4
+WRITE_QUEUE_SIZE = 2
+
+
+def plan_import_partitions(threshold: int = PARTITION_THRESHOLD, years_per_partition: int = YEARS_PER_PARTITION) -> List[Dict]:
+    """Partitions of at most ``threshold`` records, discovered from the dataset facets.
+
+    Falls back to cutting MAKES_LIST into ``years_per_partition`` year ranges when
+    the facets cannot be queried.
+    """
+    try:
+        partitions = discover_partitions(threshold)
+    except requests.RequestException as e:
+        logger.warning(f"Make discovery failed, planning from MAKES_LIST: {e}")
+        partitions = static_partitions(ImportVehiclesCommand.MAKES_LIST, threshold, years_per_partition)
+
+    return [partition._asdict() for partition in partitions]
+
+
+@shared_task(bind=True, acks_late=True)
+def import_vehicle_partition(
+    self,
+    run_id: int,
+    make_name: str,
+    expected_count: int,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    batch_pages: int = 1,
+) -> Dict:
+    """Import one make (or one year range of a make) and return its stats.
+
+    Errors are counted in ``fetch_failures`` rather than raised, so that one bad
+    partition still lets the chord callback close the run.
+    """
+    command = ImportVehiclesCommand()
+    command.batch_pages = batch_pages
+    label = Partition(make_name, expected_count, year_from, year_to).label
+
+    try:
+        command.run = ImportRun.objects.get(pk=run_id)
+        command.completed_pages = set(command.run.checkpoints.filter(make=label).values_list('make', 'offset'))
+
+        semaphore = UpstreamSemaphore('opendatasoft', settings.OPENDATASOFT_MAX_CONCURRENCY)
+        command.upstream_slot = semaphore.slot
+
+        command.warm_cache()
+        command.prefetch_pages = PREFETCH_PAGES
+        with command.write_stage(WRITE_QUEUE_SIZE):
+            command.fetch_vehicles_by_make(make_name, expected_count, year_from, year_to)
+        command.stats['makes_processed'] = 1
+    except Exception:
+        logger.exception(f"Import partition {label} failed")
+        command.stats['fetch_failures'] += 1
+
+    logger.info(f"Import partition {label} finished: {command.stats}")
+    return command.stats
+
+
+@shared_task
+def aggregate_import_stats(partition_stats: List[Dict], run_id: int) -> Dict:
+    """Chord callback: sum the stats of all partitions and close the run."""
+    totals = {}
+    for stats in partition_stats:
+        for key, value in stats.items():
+            totals[key] = totals.get(key, 0) + value
+
+    ImportRun.objects.filter(pk=run_id).update(
+        status=ImportRun.finished_status(totals),
+        stats=totals,
+        finished_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+
+    logger.info(f"Distributed import run #{run_id} finished: {totals}")
+    return totals
+
+
+@shared_task
+def mark_import_failed(request, exc, traceback, run_id: int) -> None:
+    """Chord errback: close a run whose partitions or callback could not complete."""
+    logger.error(f"Distributed import run #{run_id} failed: {exc!r}")
+    ImportRun.objects.filter(pk=run_id).update(
+        status='failed',
+        finished_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+
+
+@shared_task
+def import_vehicles_distributed(
+    threshold: int = PARTITION_THRESHOLD,
+    years_per_partition: int = YEARS_PER_PARTITION,
+    batch_pages: int = 1,
+    run_id: Optional[int] = None,
+) -> int:
+    """Fan the OpenDataSoft import out across workers as a chord of partition tasks.
+
+    Passing ``run_id`` resumes an earlier run, skipping pages it already wrote.
+    The preconditions of ``import_vehicles`` are checked and the stamps of every
+    planned make created here, once, before any partition task starts.
+    """
+    if run_id:
+        run = ImportRun.objects.get(pk=run_id)
+        run.status = 'running'
+        run.save(update_fields=['status', 'updated_at'])
+    else:
+        run = ImportRun.objects.create()
+
+    command = ImportVehiclesCommand()
+    error = command.check_preconditions()
+    if error:
+        logger.error(f"Distributed import run #{run.pk} not started: {error}")
+        run.status = 'failed'
+        run.finished_at = timezone.now()
+        run.save(update_fields=['status', 'finished_at', 'updated_at'])
+        return run.pk
+
+    partitions = plan_import_partitions(threshold, years_per_partition)
+    command.prepare_dimensions([Partition(**partition) for partition in partitions])
+    logger.info(f"Distributed import run #{run.pk}: {len(partitions)} partitions")
+
+    chord(
+        import_vehicle_partition.s(run.pk, batch_pages=batch_pages, **partition)
+        for partition in partitions
+    )(aggregate_import_stats.s(run.pk).on_error(mark_import_failed.s(run_id=run.pk)))
+
+    return run.pk
+
+
+@shared_task(acks_late=True)
+def sync_carapi_catalog() -> Dict[str, int]:
+    """Refresh the local mirror of the CarAPI catalog the proxy views answer from."""
+    counts = CatalogSync(carapi_service).sync()
+    logger.info(f"CarAPI catalog mirrored: {counts}")
+    return counts
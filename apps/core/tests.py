@@ -1,3 +1,826 @@
-from django.test import TestCase
+import base64
+import io
+import json
+import random
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from typing import Dict, List, Optional
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from . import catalog
+from . import vin as vin_cache
+from .http_client import AdaptiveRateLimiter
+from .importer import classifiers
+from .importer.copy_loader import CopyLoader
+from .importer.pipeline import WriteBehind
+from .importer.planning import FIRST_MODEL_YEAR, Partition, split_by_year, static_partitions
+from .jwt_token import JWTTokenHolder, jwt_expiry
+from .management.commands.import_vehicles import Command as ImportVehiclesCommand
+from .models import (
+    CarGeneralInfo, CatalogEntry, CatalogSyncState, Fuel, ImportRun, Model, QuarantinedRecord, Stamp,
+)
+from .singleflight import SingleFlight
+from .tasks import aggregate_import_stats, import_vehicle_partition, import_vehicles_distributed, mark_import_failed
+from .views import CarAPIService
+from .vin import check_digit, validate_vin
+
+
+# The if/elif heuristics import_vehicles used before the table-driven classifiers,
+# kept verbatim as the reference the rule tables must reproduce.
+def baseline_drive(drive_str: str) -> Optional[str]:
+    if not drive_str:
+        return None
+
+    drive_lower = drive_str.lower()
+
+    if 'front' in drive_lower:
+        return 'fwd'
+    elif 'rear' in drive_lower:
+        return 'rwd'
+    elif '4-wheel' in drive_lower or '4wd' in drive_lower:
+        return '4wd'
+    elif 'all-wheel' in drive_lower or 'awd' in drive_lower:
+        return 'awd'
+
+    return None
+
+
+def baseline_body_type(vclass: str, model_name: str = '') -> Optional[str]:
+    if not vclass:
+        return None
+
+    vclass_lower = vclass.lower()
+    model_lower = model_name.lower()
+
+    if 'sedan' in model_lower:
+        return 'SEDAN'
+    elif 'coupe' in model_lower:
+        return 'COUPE'
+    elif 'convertible' in model_lower or 'cabriolet' in model_lower:
+        return 'CONVERTIBLE'
+    elif 'wagon' in model_lower:
+        return 'WAGON'
+
+    if 'pickup' in vclass_lower or 'truck' in vclass_lower:
+        return 'PICKUP'
+    elif 'van' in vclass_lower or 'minivan' in vclass_lower:
+        return 'VAN'
+    elif 'suv' in vclass_lower or 'sport utility' in vclass_lower or 'special purpose' in vclass_lower:
+        return 'SUV'
+    elif 'wagon' in vclass_lower:
+        return 'WAGON'
+    elif 'compact' in vclass_lower or 'subcompact' in vclass_lower:
+        return 'HATCHBACK'
+    elif 'two seater' in vclass_lower or 'coupe' in vclass_lower:
+        return 'COUPE'
+    elif 'sedan' in vclass_lower or 'midsize' in vclass_lower or 'large car' in vclass_lower:
+        return 'SEDAN'
+
+    return None
+
+
+def baseline_seats(vclass: str, model_name: str) -> int:
+    vclass = vclass.lower()
+    if 'two seater' in vclass:
+        return 2
+    elif 'van' in vclass or 'minivan' in vclass:
+        return 7
+    elif 'pickup' in vclass and 'crew' in model_name.lower():
+        return 5
+    elif 'suv' in vclass or 'sport utility' in vclass:
+        return 5
+    return 4
+
+
+def baseline_fuel(fuel_str: str) -> Optional[str]:
+    if not fuel_str:
+        return None
+
+    fuel_lower = fuel_str.lower()
+
+    if 'electric' in fuel_lower and 'gasoline' in fuel_lower:
+        return 'gasoline+electric'
+    elif 'electric' in fuel_lower and 'diesel' in fuel_lower:
+        return 'diesel+electric'
+    elif 'lpg' in fuel_lower and 'gasoline' in fuel_lower:
+        return 'gasoline+lpg'
+    elif 'electric' in fuel_lower:
+        return 'electric'
+    elif 'diesel' in fuel_lower:
+        return 'diesel'
+    elif 'gasoline' in fuel_lower or 'regular' in fuel_lower or 'premium' in fuel_lower or 'midgrade' in fuel_lower:
+        return 'gasoline'
+    return 'other'
+
+
+def baseline_transmission(trans_str: str) -> Optional[str]:
+    if not trans_str:
+        return None
+
+    trans_lower = trans_str.lower()
+
+    if 'automatic' in trans_lower or 'auto' in trans_lower:
+        return 'automatic'
+    elif 'manual' in trans_lower:
+        return 'mechanical'
+    elif 'cvt' in trans_lower or 'variable' in trans_lower or 'variator' in trans_lower:
+        return 'variator'
+    elif 'semi' in trans_lower or 'automated' in trans_lower or 'amt' in trans_lower:
+        return 'semi_automatic'
+    elif 'dual' in trans_lower or 'dct' in trans_lower:
+        return 'semi_automatic'
+    return 'other'
+
+
+# Every substring the heuristics look for, plus filler, so random inputs hit each branch and their overlaps.
+KEYWORDS = [
+    'front', 'rear', '4-wheel', '4wd', 'all-wheel', 'awd', 'sedan', 'coupe', 'convertible', 'cabriolet', 'wagon',
+    'pickup', 'truck', 'van', 'minivan', 'suv', 'sport utility', 'special purpose', 'compact', 'subcompact',
+    'two seater', 'midsize', 'large car', 'crew', 'electric', 'gasoline', 'diesel', 'lpg', 'regular', 'premium',
+    'midgrade', 'e85', 'ethanol', 'hydrogen', 'natural gas', 'automatic', 'auto', 'manual', 'cvt', 'variable',
+    'variator', 'semi', 'automated', 'amt', 'dual', 'dct',
+]
+FILLER = ['', ' ', '-', '(', ')', '2WD', 'Drive', 'Cars', 'Type', 'S6', '5-spd', 'x']
+
+
+class ClassifierEquivalenceTests(SimpleTestCase):
+    """The rule tables, memoized or not, classify exactly like the if/elif heuristics they replaced."""
+    samples = 200000
+
+    def random_text(self, rng: random.Random) -> str:
+        parts = [rng.choice(KEYWORDS if rng.random() < 0.6 else FILLER) for _ in range(rng.randint(0, 3))]
+        text = rng.choice(['', ' ']).join(parts)
+        return rng.choice([text, text.upper(), text.title()])
+
+    def test_matches_baseline_on_random_records(self):
+        rng = random.Random(6)
+        classifiers.cache_clear()
+        for _ in range(self.samples):
+            record = {field: self.random_text(rng) for field in ('drive', 'vclass', 'model', 'fueltype1', 'trany')}
+            expected = classifiers.VehicleClassification(
+                drive=baseline_drive(record['drive']),
+                body_type=baseline_body_type(record['vclass'], record['model']),
+                seats_count=baseline_seats(record['vclass'], record['model']),
+                fuel=baseline_fuel(record['fueltype1']),
+                transmission=baseline_transmission(record['trany']),
+            )
+            # The second call is answered from the LRU caches.
+            self.assertEqual(classifiers.classify_record(record), expected, record)
+            self.assertEqual(classifiers.classify_record(record), expected, record)
+
+    def test_body_cache_ignores_model_names_without_keywords(self):
+        classifiers.cache_clear()
+        for number in range(1000):
+            classifiers.classify_body('Standard Pickup Trucks', f"F{number} Crew Cab")
+            classifiers.classify_body('Compact Cars', f"Civic {number} Coupe")
+        self.assertEqual(classifiers.cache_info()['body'].currsize, 2)
+
+    def test_missing_fields(self):
+        self.assertEqual(
+            classifiers.classify_record({}),
+            classifiers.VehicleClassification(None, None, classifiers.DEFAULT_SEATS, None, None),
+        )
+
+
+class VINTests(SimpleTestCase):
+    def test_check_digit(self):
+        self.assertEqual(check_digit('1M8GDM9AXKP042788'), 'X')
+        self.assertEqual(check_digit('1HGCM82633A004352'), '3')
+
+    def test_validate_vin(self):
+        self.assertIsNone(validate_vin('1M8GDM9AXKP042788'))
+        self.assertEqual(validate_vin('1M8GDM9AX'), 'VIN must be exactly 17 characters')
+        self.assertEqual(validate_vin('1M8GDM9AXKP04278O'), 'VIN contains invalid characters: O')
+        self.assertEqual(validate_vin('1HGCM82643A004352'), 'VIN check digit does not match')
+
+    def test_check_digit_only_for_north_american_vins(self):
+        for vin in ('WVWZZZ1KZAW000001', 'JN1TANT31U0000001', 'SALGA2BE4MA000000'):
+            self.assertIsNone(validate_vin(vin), vin)
+
+    @override_settings(CARAPI_VIN_CHECK_DIGIT=False)
+    def test_check_digit_can_be_disabled(self):
+        self.assertIsNone(validate_vin('1HGCM82643A004352'))
+
+
+class VINDecodeStoreTests(TestCase):
+    def test_decodes_are_kept_and_answer_basic_lookups_by_prefix(self):
+        vin_cache.store_decodes({
+            '1HGCM82633A004352': upstream_result({'vin': '1HGCM82633A004352', 'year': 2003, 'make': 'Honda',
+                                                  'model': 'Accord'}),
+        })
+
+        stored = vin_cache.read_decodes(['1HGCM82633A004352'])['1HGCM82633A004352']
+        self.assertEqual((stored['status_code'], stored['cache']), (200, 'HIT'))
+        sibling = '1HGCM82613A000000'
+        self.assertEqual(vin_cache.read_decodes([sibling]), {})
+        self.assertEqual(vin_cache.read_decodes([sibling], basic=True)[sibling]['data'],
+                         {'vin': sibling, 'year': 2003, 'make': 'Honda', 'model': 'Accord'})
+
+    def test_rejections_expire_and_outages_are_not_stored(self):
+        vin_cache.store_decodes({
+            '1M8GDM9AXKP042788': upstream_result(status_code=404),
+            '1HGCM82633A004352': upstream_result(status_code=503),
+        })
+
+        rejected = vin_cache.read_decodes(['1M8GDM9AXKP042788', '1HGCM82633A004352'])
+        self.assertEqual(list(rejected), ['1M8GDM9AXKP042788'])
+        self.assertEqual(rejected['1M8GDM9AXKP042788']['status_code'], 404)
+
+        later = timezone.now() + vin_cache.NEGATIVE_TTL + timedelta(seconds=1)
+        with mock.patch('apps.core.vin.timezone.now', return_value=later):
+            self.assertEqual(vin_cache.read_decodes(['1M8GDM9AXKP042788']), {})
+
+
+class PlanningTests(SimpleTestCase):
+    def test_static_partitions(self):
+        partitions = static_partitions([('Small', 500), ('Big', 30000), ('Medium', 9000)], threshold=10000)
+
+        self.assertEqual(partitions[0], Partition('Medium', 9000))
+        self.assertIn(Partition('Small', 500), partitions)
+        big = sorted(
+            (partition for partition in partitions if partition.make_name == 'Big'),
+            key=lambda partition: partition.year_from or 0,
+        )
+        self.assertGreater(len(big), 1)
+        self.assertIsNone(big[0].year_from)
+        self.assertIsNone(big[-1].year_to)
+        self.assertEqual(big[1].year_from, FIRST_MODEL_YEAR + 10)
+        for previous, partition in zip(big, big[1:]):
+            self.assertEqual(partition.year_from, previous.year_to + 1)
+        self.assertEqual([partition.expected_count for partition in partitions],
+                         sorted((partition.expected_count for partition in partitions), reverse=True))
+
+    def test_split_by_year(self):
+        facet = [('1990', 400), ('1991', 500), ('1992-01-01', 300), ('1993', 700), ('unknown', 5)]
+        with mock.patch('apps.core.importer.planning.fetch_facet', return_value=facet) as fetch_facet:
+            partitions = split_by_year('Chevrolet', 1900, max_partition_size=1000)
+
+        self.assertEqual(fetch_facet.call_args.kwargs['refine'], 'make:"Chevrolet"')
+        self.assertEqual(partitions, [
+            Partition('Chevrolet', 900, None, 1991),
+            Partition('Chevrolet', 1000, 1992, None),
+        ])
+        self.assertEqual(partitions[0].label, 'Chevrolet [-1991]')
+        self.assertEqual(partitions[1].where, "year >= date'1992-01-01'")
+
+    def test_split_by_year_without_facets(self):
+        with mock.patch('apps.core.importer.planning.fetch_facet', return_value=[]):
+            self.assertEqual(split_by_year('Tesla', 800, 1000), [Partition('Tesla', 800)])
+
+
+def make_jwt(claims: dict) -> str:
+    payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).decode().rstrip('=')
+    return f"eyJhbGciOiJIUzI1NiJ9.{payload}.signature"
+
+
+class JWTTokenHolderTests(SimpleTestCase):
+    def test_jwt_expiry(self):
+        self.assertEqual(jwt_expiry(make_jwt({'exp': 1700000000})), 1700000000.0)
+        self.assertIsNone(jwt_expiry(make_jwt({'sub': 'user'})))
+        self.assertIsNone(jwt_expiry('not-a-jwt'))
+        self.assertIsNone(jwt_expiry('a.!!!.c'))
+
+    def test_refresh_timing(self):
+        holder = JWTTokenHolder(refresh_before=3600, expiry_margin=60)
+        self.assertIsNone(holder.current())
+        self.assertTrue(holder.needs_refresh())
+
+        fresh = make_jwt({'exp': time.time() + 7200})
+        self.assertEqual(holder.set(fresh), fresh)
+        self.assertFalse(holder.needs_refresh())
+        self.assertAlmostEqual(holder.remaining(), 7200 - 60, delta=2)
+
+        holder.clear()
+        expiring = make_jwt({'exp': time.time() + 1800})
+        self.assertEqual(holder.set(expiring), expiring)
+        self.assertTrue(holder.needs_refresh())
+
+        holder.clear()
+        self.assertIsNone(holder.set(make_jwt({'exp': time.time() + 30})))
+        self.assertTrue(holder.needs_refresh())
+
+    def test_keeps_the_longer_lived_token(self):
+        holder = JWTTokenHolder()
+        longer = make_jwt({'exp': time.time() + 7200})
+        holder.set(longer)
+        self.assertEqual(holder.set(make_jwt({'exp': time.time() + 5000})), longer)
+
+        holder.clear('some-other-token')
+        self.assertEqual(holder.current(), longer)
+        holder.clear(longer)
+        self.assertIsNone(holder.current())
+
+    def test_default_lifetime(self):
+        holder = JWTTokenHolder(default_lifetime=600)
+        self.assertEqual(holder.set('opaque-token'), 'opaque-token')
+        self.assertAlmostEqual(holder.remaining(), 600 - 60, delta=2)
+
+
+class AdaptiveRateLimiterTests(SimpleTestCase):
+    def test_burst_then_wait(self):
+        limiter = AdaptiveRateLimiter(rate=2.0, burst=3)
+        self.assertEqual([limiter.reserve() for _ in range(3)], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(limiter.reserve(), 0.5, delta=0.05)
+
+    def test_refills_over_time(self):
+        limiter = AdaptiveRateLimiter(rate=20.0, burst=1)
+        self.assertEqual(limiter.reserve(), 0.0)
+        time.sleep(0.06)
+        self.assertEqual(limiter.reserve(), 0.0)
+
+    def test_adapts_rate(self):
+        limiter = AdaptiveRateLimiter(rate=10.0, burst=1, min_rate=1.0, max_rate=10.5, increase=0.25, decrease=0.5)
+        limiter.on_success()
+        limiter.on_success()
+        limiter.on_success()
+        self.assertEqual(limiter.rate, 10.5)
+
+        limiter.on_throttle()
+        self.assertEqual(limiter.rate, 5.25)
+        for _ in range(5):
+            limiter.on_throttle()
+        self.assertEqual(limiter.rate, 1.0)
+
+    def test_retry_after_blocks(self):
+        limiter = AdaptiveRateLimiter(rate=100.0, burst=10)
+        limiter.on_throttle(retry_after=5)
+        self.assertAlmostEqual(limiter.reserve(), 5.0, delta=0.1)
+
+
+class WriteBehindTests(SimpleTestCase):
+    def test_backpressure(self):
+        started = threading.Event()
+        release = threading.Event()
+        handled = []
+
+        def handler(item):
+            started.set()
+            release.wait(5)
+            handled.append(item)
+
+        writer = WriteBehind(handler, maxsize=1)
+        writer.submit(1)
+        self.assertTrue(started.wait(5))
+        writer.submit(2)  # waits in the queue while the handler is busy
+
+        third = threading.Thread(target=writer.submit, args=(3,), daemon=True)
+        third.start()
+        third.join(0.2)
+        self.assertTrue(third.is_alive(), 'submit should block while the queue is full')
+
+        release.set()
+        third.join(5)
+        self.assertFalse(third.is_alive())
+        writer.close()
+        self.assertEqual(handled, [1, 2, 3])
+
+    def test_handler_error_is_reraised(self):
+        def handler(item):
+            if item == 'bad':
+                raise ValueError(item)
+
+        writer = WriteBehind(handler, maxsize=2)
+        with self.assertLogs('apps.core.importer.pipeline', 'ERROR'):
+            writer.submit('bad')
+            with self.assertRaises(ValueError):
+                writer.join()
+        writer.submit('good')
+        writer.close()
+
+    def test_import_writer_closes_its_own_connection(self):
+        command = ImportVehiclesCommand(stdout=io.StringIO())
+        with mock.patch('threading.excepthook') as excepthook:
+            with command.write_stage(1):
+                pass
+        excepthook.assert_not_called()
+
+
+def vehicle_record(record_id: int, **fields) -> Dict:
+    """A raw OpenDataSoft record as import_vehicles receives it."""
+    return {
+        'id': record_id,
+        'make': 'Honda',
+        'model': 'Civic 2WD',
+        'basemodel': 'Civic',
+        'year': '2020',
+        'vclass': 'Compact Cars',
+        'drive': 'Front-Wheel Drive',
+        'fueltype1': 'Regular Gasoline',
+        'trany': 'Automatic (S6)',
+        'displ': 2.0,
+        **fields,
+    }
+
+
+class ImportTestCase(TestCase):
+    """Runs import_vehicles' record and write stages against the test database."""
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('create_fuel_transmission', stdout=io.StringIO())
+
+    def import_command(self, batch_pages: int = 100) -> ImportVehiclesCommand:
+        command = ImportVehiclesCommand(stdout=io.StringIO())
+        command.warm_cache()
+        command.batch_pages = batch_pages
+        return command
+
+    def queue_records(self, command: ImportVehiclesCommand, records: List[Dict], make_name: str = 'Honda',
+                      offset: int = 0) -> Dict:
+        make_stats = command.new_make_stats()
+        command.process_page(make_name, offset, records, make_stats)
+        return make_stats
+
+    def import_records(self, records: List[Dict], command: Optional[ImportVehiclesCommand] = None) -> Dict:
+        command = command or self.import_command()
+        make_stats = self.queue_records(command, records)
+        command.write_batch('Honda', make_stats)
+        return make_stats
+
+
+class ImportWriteTests(ImportTestCase):
+    def test_upsert_counts_created_and_updated_rows(self):
+        self.import_records([vehicle_record(1), vehicle_record(2)])
+
+        command = self.import_command()
+        make_stats = self.import_records([vehicle_record(1, year='2021'), vehicle_record(3)], command)
+
+        self.assertEqual(
+            {key: command.stats[key] for key in ('created', 'updated', 'successful', 'failed')},
+            {'created': 1, 'updated': 1, 'successful': 2, 'failed': 0},
+        )
+        self.assertEqual(make_stats['successful'], 2)
+        self.assertEqual(CarGeneralInfo.objects.count(), 3)
+        self.assertEqual(CarGeneralInfo.objects.get(external_id='opendatasoft_1').year, 2021)
+
+    def test_unchanged_rows_are_not_rewritten(self):
+        self.import_records([vehicle_record(1)])
+        stored = CarGeneralInfo.objects.get(external_id='opendatasoft_1')
+
+        command = self.import_command()
+        self.import_records([vehicle_record(1)], command)
+
+        self.assertEqual((command.stats['unchanged'], command.stats['updated']), (1, 0))
+        self.assertEqual(command.stats['successful'], 1)
+        self.assertEqual(CarGeneralInfo.objects.get(external_id='opendatasoft_1').updated_at, stored.updated_at)
+
+    def test_resume_skips_checkpointed_pages(self):
+        command = self.import_command()
+        command.run = ImportRun.objects.create()
+        self.import_records([vehicle_record(1)], command)
+        self.assertEqual(list(command.run.checkpoints.values_list('make', 'offset', 'records')), [('Honda', 0, 1)])
+
+        resumed = self.import_command()
+        self.assertTrue(resumed.start_run({'resume': False, 'run_id': command.run.pk}))
+        self.assertEqual(resumed.completed_pages, {('Honda', 0)})
+
+        limit = resumed.LIMIT_PER_REQUEST
+        pages = {limit: {'results': [vehicle_record(2)]}, 2 * limit: {'results': []}}
+        with mock.patch.object(resumed, 'fetch_page', side_effect=lambda make, offset, where: pages[offset]) as fetch:
+            offsets = [offset for offset, _ in resumed.iter_partition_pages(Partition('Honda', 2 * limit))]
+
+        self.assertEqual(offsets, [limit])
+        self.assertEqual([args[1] for args, _ in fetch.call_args_list], [limit, 2 * limit])
+
+    def test_rejected_batch_quarantines_only_the_failing_row(self):
+        command = self.import_command()
+        command.run = ImportRun.objects.create()
+        # engine_volume is numeric(5, 2); the database rejects the whole batch.
+        make_stats = self.import_records([vehicle_record(1), vehicle_record(2, displ=12345)], command)
+
+        self.assertEqual(list(CarGeneralInfo.objects.values_list('external_id', flat=True)), ['opendatasoft_1'])
+        self.assertEqual((command.stats['successful'], command.stats['failed']), (1, 1))
+        self.assertEqual((make_stats['successful'], make_stats['failed']), (1, 1))
+        self.assertEqual(command.stats['quarantined'], 1)
+        entry = QuarantinedRecord.objects.get()
+        self.assertEqual((entry.external_id, entry.payload['displ']), ('opendatasoft_2', 12345))
+        self.assertEqual(command.completed_pages, {('Honda', 0)})
+
+        entry.payload['displ'] = 2.4
+        entry.save()
+        retry = self.import_command()
+        retry.retry_quarantine()
+
+        self.assertEqual(retry.stats['successful'], 1)
+        self.assertEqual(CarGeneralInfo.objects.get(external_id='opendatasoft_2').engine_volume, Decimal('2.4'))
+        entry.refresh_from_db()
+        self.assertIsNotNone(entry.resolved_at)
+
+
+class DimensionTests(ImportTestCase):
+    def test_only_names_inserted_by_this_command_are_reported(self):
+        command = self.import_command()
+        # Another worker inserts a stamp and a model after this command warmed its cache.
+        tesla = Stamp.objects.create(name='Tesla')
+        Model.objects.create(stamp=tesla, name='Model')
+
+        command.create_missing_dimensions([
+            vehicle_record(1, make='Tesla', basemodel='Model S'),
+            vehicle_record(2, make='Tesla', basemodel='Roadster'),
+            vehicle_record(3, make='Rivian', basemodel='R1T'),
+        ])
+
+        output = command.stdout.getvalue()
+        self.assertIn('Created new stamps: Rivian\n', output)
+        self.assertIn('Created new models: Roadster, R1T\n', output)
+        self.assertEqual(command.cache['stamps']['Tesla'], tesla.pk)
+        self.assertEqual(Stamp.objects.filter(name='Tesla').count(), 1)
+        self.assertEqual(Model.objects.filter(stamp=tesla).count(), 2)
+
+        command.stdout = io.StringIO()
+        command.create_missing_dimensions([vehicle_record(4, make='Rivian', basemodel='R1T')])
+        self.assertEqual(command.stdout.getvalue(), '')
+
+
+class CopyLoaderTests(ImportTestCase):
+    def test_merge_and_sweep_only_touch_the_source(self):
+        self.import_records([vehicle_record(1), vehicle_record(2)])
+        template = CarGeneralInfo.objects.get(external_id='opendatasoft_1')
+        for external_id in ('encar_7', 'opendatasoftX9'):
+            template.pk = None
+            template.external_id = external_id
+            template.save()
+
+        command = self.import_command()
+        loader = CopyLoader(
+            ['external_id'] + [name for name in command.UPSERT_FIELDS if name != 'updated_at'],
+            staging_table='car_general_info_staging_test',
+        )
+        loader.prepare()
+        self.queue_records(command, [vehicle_record(1, year='2021'), vehicle_record(3)])
+        loader.write(list(command.pending_rows.values()))
+
+        self.assertEqual(loader.merge(), (1, 1, 0))
+        self.assertEqual(loader.sweep('opendatasoft_'), 1)
+        loader.drop()
+
+        self.assertEqual(
+            set(CarGeneralInfo.objects.values_list('external_id', flat=True)),
+            {'opendatasoft_1', 'opendatasoft_3', 'encar_7', 'opendatasoftX9'},
+        )
+        self.assertEqual(CarGeneralInfo.objects.get(external_id='opendatasoft_1').year, 2021)
+
+    def test_prepare_replaces_a_leftover_table(self):
+        loader = CopyLoader(['external_id', 'year'], staging_table='car_general_info_staging_test')
+        with connection.cursor() as cursor:
+            cursor.execute("CREATE TABLE car_general_info_staging_test (stale integer)")
+        loader.prepare()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT * FROM car_general_info_staging_test")
+            self.assertEqual([column.name for column in cursor.description], ['external_id', 'year'])
+        loader.drop()
+
+
+class DistributedImportTests(ImportTestCase):
+    def test_run_status_reflects_failures(self):
+        clean = ImportRun.objects.create()
+        aggregate_import_stats([{'successful': 5, 'failed': 0}, {'successful': 3}], clean.pk)
+        clean.refresh_from_db()
+        self.assertEqual(clean.status, 'completed')
+        self.assertEqual(clean.stats, {'successful': 8, 'failed': 0})
+
+        partial = ImportRun.objects.create()
+        aggregate_import_stats([{'successful': 5, 'fetch_failures': 1}], partial.pk)
+        partial.refresh_from_db()
+        self.assertEqual(partial.status, 'completed_with_errors')
+
+    def test_failing_partition_returns_its_failure(self):
+        with self.assertLogs('apps.core.tasks', 'ERROR'):
+            stats = import_vehicle_partition(0, 'Honda', 100)
+        self.assertEqual(stats['fetch_failures'], 1)
+
+    def test_errback_marks_the_run_failed(self):
+        run = ImportRun.objects.create()
+        with self.assertLogs('apps.core.tasks', 'ERROR'):
+            mark_import_failed(None, RuntimeError('worker lost'), None, run_id=run.pk)
+        run.refresh_from_db()
+        self.assertEqual(run.status, 'failed')
+        self.assertIsNotNone(run.finished_at)
+
+    def test_distributed_import_checks_preconditions_and_creates_stamps(self):
+        partitions = [
+            Partition('Honda', 900, None, 2000)._asdict(),
+            Partition('Honda', 900, 2001, None)._asdict(),
+            Partition('Tesla', 100)._asdict(),
+        ]
+        with mock.patch('apps.core.tasks.plan_import_partitions', return_value=partitions), \
+                mock.patch('apps.core.tasks.chord') as chord:
+            run_id = import_vehicles_distributed()
+
+        self.assertEqual(chord.call_count, 1)
+        self.assertEqual(sorted(Stamp.objects.values_list('name', flat=True)), ['Honda', 'Tesla'])
+        self.assertEqual(ImportRun.objects.get(pk=run_id).status, 'running')
+
+        Fuel.objects.all().delete()
+        with mock.patch('apps.core.tasks.chord') as chord, self.assertLogs('apps.core.tasks', 'ERROR'):
+            run_id = import_vehicles_distributed()
+        chord.assert_not_called()
+        self.assertEqual(ImportRun.objects.get(pk=run_id).status, 'failed')
+
+
+class DedupeDimensionsTests(ImportTestCase):
+    def test_merges_duplicates_into_the_lowest_pk(self):
+        # Recreate a database from before the unique constraints.
+        with connection.cursor() as cursor:
+            cursor.execute("ALTER TABLE car_stamp DROP CONSTRAINT unique_stamp_name")
+            cursor.execute("ALTER TABLE car_model DROP CONSTRAINT unique_model_stamp_name")
+        self.import_records([vehicle_record(1)])
+        car = CarGeneralInfo.objects.get(external_id='opendatasoft_1')
+        keep_stamp, keep_model = car.stamp, car.model
+        duplicate_stamp = Stamp.objects.create(name='Honda')
+        duplicate_model = Model.objects.create(stamp=duplicate_stamp, name=keep_model.name)
+        CarGeneralInfo.objects.filter(pk=car.pk).update(stamp=duplicate_stamp, model=duplicate_model)
+
+        call_command('dedupe_dimensions', '--dry-run', stdout=io.StringIO())
+        self.assertEqual(Stamp.objects.filter(name='Honda').count(), 2)
+
+        call_command('dedupe_dimensions', stdout=io.StringIO())
+        self.assertEqual(list(Stamp.objects.filter(name='Honda')), [keep_stamp])
+        self.assertEqual(list(Model.objects.filter(name=keep_model.name)), [keep_model])
+        car.refresh_from_db()
+        self.assertEqual((car.stamp, car.model), (keep_stamp, keep_model))
+
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'core-tests'}}
+
+
+def local_single_flight() -> SingleFlight:
+    """A SingleFlight whose cross-process lock is an in-memory dict instead of Redis."""
+    flight = SingleFlight('tests', poll_interval=0.01)
+    locks = {}
+
+    def set_lock(key, token, nx=False, px=None):
+        return locks.setdefault(key, token) == token
+
+    def release(keys, args):
+        if locks.get(keys[0]) == args[0]:
+            del locks[keys[0]]
+
+    flight._redis = mock.Mock(set=set_lock)
+    flight._release_script = release
+    return flight
+
+
+def upstream_result(data=None, status_code: int = 200) -> Dict:
+    return {'status_code': status_code, 'data': data, 'error': None if status_code == 200 else 'error'}
+
+
+@override_settings(CACHES=LOCMEM_CACHES, CARAPI_CATALOG_MIRROR=False)
+class CarAPICacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.service = CarAPIService()
+        self.service.single_flight = local_single_flight()
+
+    def test_miss_then_hit(self):
+        with mock.patch.object(self.service, 'request_upstream', return_value=upstream_result(['Acura'])) as upstream:
+            first = self.service.make_request('/makes', {'year': 2020})
+            second = self.service.make_request('/makes', {'year': '2020'})
+
+        self.assertEqual((first['cache'], second['cache']), ('MISS', 'HIT'))
+        self.assertEqual(second['data'], ['Acura'])
+        upstream.assert_called_once_with('/makes', {'year': 2020})
+
+    def test_failures_and_uncached_endpoints_are_not_stored(self):
+        outage = upstream_result(status_code=503)
+        with mock.patch.object(self.service, 'request_upstream', return_value=outage) as upstream:
+            self.assertEqual(self.service.make_request('/makes')['cache'], 'MISS')
+            self.assertEqual(self.service.make_request('/makes')['cache'], 'MISS')
+            self.assertEqual(self.service.make_request('/vin/1HGCM82633A004352')['cache'], 'BYPASS')
+        self.assertEqual(upstream.call_count, 3)
+
+    def test_stale_entry_is_served_while_one_refresh_runs(self):
+        key = self.service.cache_key('/makes', {})
+        cache.set(key, {'data': ['Acura'], 'fresh_until': time.time() - 1}, 60)
+        refreshing = threading.Event()
+        release = threading.Event()
+
+        def refresh(endpoint, params):
+            refreshing.set()
+            release.wait(5)
+            return upstream_result(['Acura', 'Audi'])
+
+        with mock.patch.object(self.service, 'request_upstream', side_effect=refresh) as upstream:
+            first = self.service.make_request('/makes')
+            self.assertTrue(refreshing.wait(5))
+            second = self.service.make_request('/makes')
+            release.set()
+            for _ in range(500):
+                if not self.service.single_flight.refreshing:
+                    break
+                time.sleep(0.01)
+            third = self.service.make_request('/makes')
+
+        self.assertEqual([first['cache'], second['cache']], ['STALE', 'STALE'])
+        self.assertEqual(second['data'], ['Acura'])
+        self.assertEqual((third['cache'], third['data']), ('HIT', ['Acura', 'Audi']))
+        self.assertEqual(upstream.call_count, 1)
+
+
+class SingleFlightTests(SimpleTestCase):
+    def test_concurrent_callers_share_one_computation(self):
+        flight = local_single_flight()
+        started = threading.Event()
+        release = threading.Event()
+        computations = []
+
+        def compute():
+            computations.append(threading.get_ident())
+            started.set()
+            release.wait(5)
+            return 'value'
+
+        results = []
+        callers = [
+            threading.Thread(target=lambda: results.append(flight.run('key', compute, lambda: None)))
+            for _ in range(8)
+        ]
+        callers[0].start()
+        self.assertTrue(started.wait(5))
+        for caller in callers[1:]:
+            caller.start()
+        time.sleep(0.1)  # let the followers reach the shared call
+        release.set()
+        for caller in callers:
+            caller.join(5)
+
+        self.assertEqual(len(computations), 1)
+        self.assertEqual(results, ['value'] * 8)
+        self.assertEqual(flight.calls, {})
+
+    def test_lock_held_elsewhere_is_waited_for(self):
+        flight = local_single_flight()
+        other_process = flight.acquire('key')
+        shared = []
+        threading.Timer(0.05, lambda: (shared.append('theirs'), flight.release('key', other_process))).start()
+
+        result = flight.run('key', lambda: 'ours', lambda: shared[0] if shared else None)
+
+        self.assertEqual(result, 'theirs')
+
+
+class CatalogLookupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        CatalogEntry.objects.bulk_create([
+            CatalogEntry(endpoint='/makes', make=name.lower(), position=position, data={'id': position, 'name': name})
+            for position, name in enumerate(['Acura', 'Audi', 'BMW', 'Honda', 'Tesla'])
+        ])
+        CatalogEntry.objects.bulk_create([
+            CatalogEntry(endpoint='/makes', year=2020, make='honda', position=5, data={'id': 3, 'name': 'Honda'}),
+            CatalogEntry(endpoint='/years', year=2021, position=0, data=2021),
+            CatalogEntry(endpoint='/years', year=2020, position=1, data=2020),
+        ])
+        for endpoint in ('/makes', '/years'):
+            CatalogSyncState.objects.create(endpoint=endpoint, synced_at=timezone.now())
+
+    def test_pages_follow_limit(self):
+        first = catalog.lookup('/makes/v2', {'limit': '2'})
+        last = catalog.lookup('/makes/v2', {'limit': '2', 'page': '3'})
+
+        self.assertEqual(first['collection'], {'url': '/makes', 'count': 2, 'pages': 3, 'total': 5})
+        self.assertEqual([item['name'] for item in first['data']], ['Acura', 'Audi'])
+        self.assertEqual(last['collection']['count'], 1)
+        self.assertEqual([item['name'] for item in last['data']], ['Tesla'])
+        past_end = catalog.lookup('/makes', {'limit': '2', 'page': '4'})
+        self.assertEqual((past_end['collection']['total'], past_end['data']), (5, []))
+
+    def test_year_scope_and_unmirrored_params(self):
+        self.assertEqual(catalog.lookup('/makes', {'year': '2020'})['data'], [{'id': 3, 'name': 'Honda'}])
+        self.assertEqual(catalog.lookup('/years'), [2021, 2020])
+        self.assertIsNone(catalog.lookup('/makes', {'sort': 'name'}))
+        self.assertIsNone(catalog.lookup('/bodies'))
+
+    @override_settings(CARAPI_CATALOG_MAX_AGE=3600)
+    def test_stale_or_unsynced_endpoints_go_upstream(self):
+        self.assertIsNotNone(catalog.lookup('/makes'))
+        CatalogSyncState.objects.filter(endpoint='/makes').update(synced_at=timezone.now() - timedelta(hours=2))
+        self.assertIsNone(catalog.lookup('/makes'))
+
+        CatalogSyncState.objects.filter(endpoint='/years').delete()
+        self.assertIsNone(catalog.lookup('/years'))
+
+    def test_sync_records_when_each_endpoint_was_mirrored(self):
+        def request_upstream(endpoint, params):
+            if endpoint == '/years/v2':
+                return upstream_result([2020])
+            if endpoint == '/makes/v2':
+                return upstream_result({'collection': {'pages': 1}, 'data': [{'id': 1, 'name': 'Honda'}]})
+            return upstream_result({'collection': {'pages': 1}, 'data': []})
+
+        before = timezone.now()
+        counts = catalog.CatalogSync(mock.Mock(request_upstream=request_upstream)).sync()
+
+        states = {state.endpoint: state for state in CatalogSyncState.objects.all()}
+        self.assertEqual(set(states), set(catalog.MIRRORED_FILTERS))
+        self.assertEqual({endpoint: state.rows for endpoint, state in states.items()}, counts)
+        self.assertTrue(all(state.synced_at >= before for state in states.values()))
+        self.assertEqual(catalog.lookup('/makes', {'year': 2020})['data'], [{'id': 1, 'name': 'Honda'}])
@@ -1,5 +1,16 @@
 from django.urls import path
 
+from .async_views import (
+    AsyncGetYearsAPIView,
+    AsyncGetMakesAPIView,
+    AsyncGetModelsAPIView,
+    AsyncGetSubmodelsAPIView,
+    AsyncGetTrimsAPIView,
+    AsyncGetBodiesAPIView,
+    AsyncGetEnginesAPIView,
+    AsyncVINBatchDecodeAPIView,
+    AsyncVINDecodeAPIView,
+)
 from .views import (
     GetYearsAPIView,
     GetMakesAPIView,
@@ -8,6 +19,7 @@ from .views import (
     GetTrimsAPIView,
     GetBodiesAPIView,
     GetEnginesAPIView,
+    VINBatchDecodeAPIView,
     VINDecodeAPIView,
 
 )
@@ -21,6 +33,18 @@ urlpatterns = [
     path('carapi/trims/', GetTrimsAPIView.as_view(), name='carapi-trims'),
     path('carapi/bodies/', GetBodiesAPIView.as_view(), name='carapi-bodies'),
     path('carapi/engines/', GetEnginesAPIView.as_view(), name='carapi-engines'),
+    path('carapi/vin/batch/', VINBatchDecodeAPIView.as_view(), name='carapi-vin-batch'),
     path('carapi/vin/<str:vin>/', VINDecodeAPIView.as_view(), name='carapi-vin'),
 
+    # The same endpoints served by async views, for ASGI deployments
+    path('carapi/async/years/', AsyncGetYearsAPIView.as_view(), name='carapi-async-years'),
+    path('carapi/async/makes/', AsyncGetMakesAPIView.as_view(), name='carapi-async-makes'),
+    path('carapi/async/models/', AsyncGetModelsAPIView.as_view(), name='carapi-async-models'),
+    path('carapi/async/submodels/', AsyncGetSubmodelsAPIView.as_view(), name='carapi-async-submodels'),
+    path('carapi/async/trims/', AsyncGetTrimsAPIView.as_view(), name='carapi-async-trims'),
+    path('carapi/async/bodies/', AsyncGetBodiesAPIView.as_view(), name='carapi-async-bodies'),
+    path('carapi/async/engines/', AsyncGetEnginesAPIView.as_view(), name='carapi-async-engines'),
+    path('carapi/async/vin/batch/', AsyncVINBatchDecodeAPIView.as_view(), name='carapi-async-vin-batch'),
+    path('carapi/async/vin/<str:vin>/', AsyncVINDecodeAPIView.as_view(), name='carapi-async-vin'),
+
 ]
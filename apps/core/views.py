@@ -1,37 +1,116 @@
+import hashlib
+import json
+import logging
 import os
-from typing import Dict, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
 import requests
+from django.conf import settings
 from django.core.cache import cache
+from django.db import connection
+from django.http import StreamingHttpResponse
 from dotenv import load_dotenv
 from rest_framework import status
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from . import catalog
+from . import vin as vin_cache
+from .http_client import get_upstream
+from .jwt_token import JWTTokenHolder
+from .singleflight import SingleFlight
+from .vin import normalize_vin, validate_vin
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 
 class CarAPIService:
 
+    # Seconds successful responses are cached, by endpoint prefix (without the /v2 suffix).
+    # Overridable with settings.CARAPI_CACHE_TTLS; 0 disables caching for an endpoint.
+    CACHE_TTLS = {
+        '/years': 24 * 60 * 60,
+        '/makes': 24 * 60 * 60,
+        '/models': 12 * 60 * 60,
+        '/submodels': 12 * 60 * 60,
+        '/trims': 6 * 60 * 60,
+        '/bodies': 6 * 60 * 60,
+        '/engines': 6 * 60 * 60,
+        '/mileages': 6 * 60 * 60,
+    }
+    # Expired entries are still served for this long while one request refreshes them.
+    STALE_WHILE_REVALIDATE = 60 * 60
+    CACHE_KEY_PREFIX = 'carapi:response:v2'
+    # Upstream calls in flight at once for one batch VIN decode.
+    VIN_BATCH_WORKERS = 16
+    # Pages fetched at once for an all=true listing, and the most pages such a listing may span.
+    ALL_PAGES_WORKERS = 8
+    MAX_ALL_PAGES = 100
+    JWT_CACHE_KEY = 'carapi_jwt_token'
+
     def __init__(self):
         self.base_url = "https://carapi.app/api"
         self.api_token = os.getenv('CARAPI_TOKEN')
         self.api_secret = os.getenv('CAR_API_SECRET_KEY')
-        self.jwt_token = None
-        self.jwt_expiry = None
+        self.jwt = JWTTokenHolder()
+        self.single_flight = SingleFlight('carapi')
 
     def get_jwt_token(self) -> Optional[str]:
-
-        cached_token = cache.get('carapi_jwt_token')
-        if cached_token:
-            return cached_token
+        """The JWT held in memory; Redis and the login endpoint are only consulted to replace it.
+
+        A token close to expiry is still returned while one background request per
+        cluster (under the single-flight lock) logs in again, so requests never wait
+        for a refresh or pay for a 401 on an expired token.
+        """
+        token = self.jwt.current()
+        if token:
+            if self.jwt.needs_refresh():
+                self.single_flight.refresh('auth', self.refresh_jwt_token)
+            return token
 
         if not self.api_token or not self.api_secret:
             return None
 
+        return self.single_flight.run('auth', self.login, self.read_shared_jwt_token)
+
+    def read_shared_jwt_token(self) -> Optional[str]:
+        """Adopt the token another process stored in Redis, if it outlives ours."""
+        try:
+            return self.jwt.set(cache.get(self.JWT_CACHE_KEY))
+        except Exception as e:
+            logger.warning(f"CarAPI token cache read failed: {e}")
+            return None
+
+    def refresh_jwt_token(self) -> Optional[str]:
+        # Another process may have logged in since our token entered its refresh window.
+        token = self.read_shared_jwt_token()
+        if token and not self.jwt.needs_refresh():
+            return token
+        return self.login()
+
+    def store_jwt_token(self, token: Optional[str]) -> Optional[str]:
+        """Hold a freshly issued token and share it with the other processes until it expires."""
+        token = self.jwt.set(token)
+        if token:
+            try:
+                cache.set(self.JWT_CACHE_KEY, token, self.jwt.remaining())
+            except Exception as e:
+                logger.warning(f"CarAPI token cache write failed: {e}")
+        return token
+
+    def invalidate_jwt_token(self, token: Optional[str]) -> None:
+        """Drop a token the upstream rejected, here and in Redis."""
+        self.jwt.clear(token)
+        cache.delete(self.JWT_CACHE_KEY)
+
+    def login(self) -> Optional[str]:
         try:
-            response = requests.post(
+            response = get_upstream('carapi').post(
                 f"{self.base_url}/auth/login",
                 json={
                     "api_token": self.api_token,
@@ -42,11 +121,7 @@ class CarAPIService:
 
             if response.status_code == 200:
                 data = response.json()
-                token = data.get('access_token')
-
-                cache.set('carapi_jwt_token', token, 6 * 24 * 60 * 60)
-
-                return token
+                return self.store_jwt_token(data.get('access_token'))
             else:
                 print(f"Authentication failed: {response.status_code} - {response.text}")
                 return None
@@ -55,7 +130,224 @@ class CarAPIService:
             print(f"Error getting JWT token: {e}")
             return None
 
+    def cache_ttl(self, endpoint: str) -> int:
+        ttls = {**self.CACHE_TTLS, **getattr(settings, 'CARAPI_CACHE_TTLS', {})}
+        base_endpoint = endpoint[:-len('/v2')] if endpoint.endswith('/v2') else endpoint
+        for prefix, ttl in ttls.items():
+            if base_endpoint == prefix or (prefix.endswith('/') and base_endpoint.startswith(prefix)):
+                return ttl
+        return 0
+
+    def cache_key(self, endpoint: str, params: Optional[Dict]) -> str:
+        """Key for an endpoint and its params, independent of param order and value types."""
+        normalized = sorted((str(key), str(value)) for key, value in (params or {}).items())
+        digest = hashlib.md5(json.dumps([endpoint, normalized]).encode()).hexdigest()
+        return f"{self.CACHE_KEY_PREFIX}:{digest}"
+
     def make_request(self, endpoint: str, params: Optional[Dict] = None, use_v2: bool = False) -> Dict:
+        """Call a CarAPI endpoint, serving successful responses from the cache while they are fresh.
+
+        Catalog endpoints are answered from the local mirror when it has the rows.
+        The result carries ``cache`` = ``'MIRROR'``, ``'HIT'``, ``'STALE'`` (served while a
+        background request refreshes it), ``'MISS'`` or ``'BYPASS'`` for endpoints without a TTL.
+        """
+        if use_v2 and not endpoint.endswith('/v2'):
+            endpoint = endpoint.rstrip('/') + '/v2'
+
+        mirrored = self.read_mirror(endpoint, params)
+        if mirrored is not None:
+            return {'status_code': 200, 'data': mirrored, 'error': None, 'cache': 'MIRROR'}
+
+        ttl = self.cache_ttl(endpoint)
+        if not ttl:
+            return {**self.request_upstream(endpoint, params), 'cache': 'BYPASS'}
+
+        key = self.cache_key(endpoint, params)
+        entry = self.read_cache(key)
+        if entry is not None:
+            if entry['fresh_until'] > time.time():
+                return self.cached_result(entry, 'HIT')
+
+            self.single_flight.refresh(key, lambda: self.fetch_and_cache(endpoint, params, key, ttl))
+            return self.cached_result(entry, 'STALE')
+
+        # Concurrent misses for the same key share a single upstream call.
+        return self.single_flight.run(
+            key,
+            lambda: self.fetch_and_cache(endpoint, params, key, ttl),
+            lambda: self.read_fresh(key),
+        )
+
+    def list_all(self, endpoint: str, params: Optional[Dict] = None, use_v2: bool = False) -> Dict:
+        """Every page of a listing, for ``all=true``.
+
+        The first page is requested right away and its ``collection`` metadata gives
+        the page count. The result then carries ``pages``, an iterator over the item
+        lists of all pages in order: later pages are fetched concurrently while
+        earlier ones are consumed, and the assembled list is cached once the
+        iterator is exhausted. Without ``pages`` the result is an ordinary error.
+        """
+        params = {key: value for key, value in (params or {}).items() if key != 'page'}
+        key = self.cache_key(f"{endpoint}?all", params)
+        ttl = self.cache_ttl(endpoint)
+
+        entry = self.read_cache(key) if ttl else None
+        if entry is not None and entry['fresh_until'] > time.time():
+            return self.listing_result(entry['data']['collection'], iter([entry['data']['data']]), 'HIT')
+
+        first = self.make_request(endpoint, {**params, 'page': 1}, use_v2=use_v2)
+        if first['status_code'] != 200:
+            return first
+
+        data = first['data'] if isinstance(first['data'], dict) else {'data': first['data']}
+        page_count = int(data.get('collection', {}).get('pages') or 1)
+        if page_count > self.MAX_ALL_PAGES:
+            return {
+                'status_code': status.HTTP_400_BAD_REQUEST,
+                'data': None,
+                'error': f"all=true is limited to {self.MAX_ALL_PAGES} pages, this listing has {page_count}; "
+                         f"narrow the filters or raise limit",
+            }
+
+        collection = {'total': data.get('collection', {}).get('total'), 'pages': page_count}
+        pages = self.iter_pages(endpoint, params, use_v2, data.get('data', []), page_count, collection, key, ttl)
+        return self.listing_result(collection, pages, first.get('cache'))
+
+    @staticmethod
+    def listing_result(collection: Dict, pages, cache_status: Optional[str]) -> Dict:
+        return {'status_code': 200, 'data': None, 'error': None, 'collection': collection,
+                'pages': pages, 'cache': cache_status}
+
+    def iter_pages(self, endpoint: str, params: Dict, use_v2: bool, first_items: List, page_count: int,
+                   collection: Dict, key: str, ttl: int) -> Iterator[List]:
+        items = list(first_items)
+        yield first_items
+
+        if page_count > 1:
+            executor = ThreadPoolExecutor(
+                max_workers=min(self.ALL_PAGES_WORKERS, page_count - 1), thread_name_prefix='carapi-pages'
+            )
+            try:
+                page_numbers = range(2, page_count + 1)
+                results = executor.map(lambda page: self.fetch_page(endpoint, params, page, use_v2), page_numbers)
+                for page, result in zip(page_numbers, results):
+                    page_items = self.page_items(page, result)
+                    items.extend(page_items)
+                    yield page_items
+            finally:
+                # A client that disconnects mid-stream leaves no queued page requests behind.
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        if ttl:
+            entry = {'data': {'collection': collection, 'data': items}, 'fresh_until': time.time() + ttl}
+            try:
+                cache.set(key, entry, ttl)
+            except Exception as e:
+                logger.warning(f"CarAPI cache write failed: {e}")
+
+    def fetch_page(self, endpoint: str, params: Dict, page: int, use_v2: bool) -> Dict:
+        try:
+            return self.make_request(endpoint, {**params, 'page': page}, use_v2=use_v2)
+        finally:
+            # Pages answered from the catalog mirror open a connection in this short-lived thread.
+            connection.close()
+
+    @staticmethod
+    def page_items(page: int, result: Dict) -> List:
+        if result['status_code'] != 200:
+            raise RuntimeError(f"Page {page} failed with {result['status_code']}: {result['error']}")
+        data = result['data']
+        return data.get('data', []) if isinstance(data, dict) else data
+
+    def read_mirror(self, endpoint: str, params: Optional[Dict]) -> Optional[Dict]:
+        try:
+            return catalog.lookup(endpoint, params)
+        except Exception as e:
+            logger.warning(f"CarAPI catalog mirror read failed: {e}")
+            return None
+
+    @staticmethod
+    def cached_result(entry: Dict, cache_status: str) -> Dict:
+        return {'status_code': 200, 'data': entry['data'], 'error': None, 'cache': cache_status}
+
+    def read_cache(self, key: str) -> Optional[Dict]:
+        try:
+            return cache.get(key)
+        except Exception as e:
+            logger.warning(f"CarAPI cache read failed: {e}")
+            return None
+
+    def read_fresh(self, key: str) -> Optional[Dict]:
+        entry = self.read_cache(key)
+        if entry is None or entry['fresh_until'] <= time.time():
+            return None
+        return self.cached_result(entry, 'HIT')
+
+    def fetch_and_cache(self, endpoint: str, params: Optional[Dict], key: str, ttl: int) -> Dict:
+        """Call upstream and cache a successful payload, kept past its TTL for stale-while-revalidate."""
+        result = self.request_upstream(endpoint, params)
+        if result['status_code'] == 200 and result['data'] is not None:
+            entry = {'data': result['data'], 'fresh_until': time.time() + ttl}
+            try:
+                cache.set(key, entry, ttl + self.STALE_WHILE_REVALIDATE)
+            except Exception as e:
+                logger.warning(f"CarAPI cache write failed: {e}")
+
+        return {**result, 'cache': 'MISS'}
+
+    def decode_vin(self, vin: str, basic: bool = False) -> Dict:
+        """Decode a validated VIN from the VIN tables, calling upstream only when they have no answer.
+
+        With ``basic``, make/model/year recorded for another VIN of the same vehicle
+        line is good enough (``cache`` = ``'PREFIX'``).
+        """
+        stored = self.read_vin(vin, basic)
+        if stored is not None:
+            return stored
+
+        return self.single_flight.run(f"vin:{vin}", lambda: self.fetch_vin(vin), lambda: self.read_vin(vin))
+
+    def decode_vins(self, vins: List[str], basic: bool = False) -> Dict[str, Dict]:
+        """Decode distinct validated VINs: stored answers in one query, the rest concurrently upstream.
+
+        At most ``VIN_BATCH_WORKERS`` upstream calls are in flight; the upstream rate
+        limiter still applies to each of them. Returns results by VIN.
+        """
+        results = self.read_vins(vins, basic)
+        missing = [vin for vin in vins if vin not in results]
+        if not missing:
+            return results
+
+        workers = min(self.VIN_BATCH_WORKERS, len(missing))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='vin-batch') as executor:
+            fetched = dict(zip(missing, executor.map(lambda vin: self.request_upstream(f'/vin/{vin}'), missing)))
+
+        self.save_vins(fetched)
+        results.update({vin: {**result, 'cache': 'MISS'} for vin, result in fetched.items()})
+        return results
+
+    def read_vin(self, vin: str, basic: bool = False) -> Optional[Dict]:
+        return self.read_vins([vin], basic).get(vin)
+
+    def read_vins(self, vins: List[str], basic: bool = False) -> Dict[str, Dict]:
+        try:
+            return vin_cache.read_decodes(vins, basic)
+        except Exception as e:
+            logger.warning(f"VIN cache read failed: {e}")
+            return {}
+
+    def fetch_vin(self, vin: str) -> Dict:
+        result = self.request_upstream(f'/vin/{vin}')
+        self.save_vins({vin: result})
+        return {**result, 'cache': 'MISS'}
+
+    def save_vins(self, results: Dict[str, Dict]) -> None:
+        try:
+            vin_cache.store_decodes(results)
+        except Exception as e:
+            logger.warning(f"VIN cache write failed: {e}")
+
+    def request_upstream(self, endpoint: str, params: Optional[Dict] = None) -> Dict:
 
         headers = {}
         jwt_token = self.get_jwt_token()
@@ -65,11 +357,8 @@ class CarAPIService:
 
         headers['Accept'] = 'application/json'
 
-        if use_v2 and not endpoint.endswith('/v2'):
-            endpoint = endpoint.rstrip('/') + '/v2'
-
         try:
-            response = requests.get(
+            response = get_upstream('carapi').get(
                 f"{self.base_url}{endpoint}",
                 params=params,
                 headers=headers,
@@ -78,11 +367,11 @@ class CarAPIService:
 
             if response.status_code == 401:
 
-                cache.delete('carapi_jwt_token')
+                self.invalidate_jwt_token(jwt_token)
                 jwt_token = self.get_jwt_token()
                 if jwt_token:
                     headers['Authorization'] = f'Bearer {jwt_token}'
-                    response = requests.get(
+                    response = get_upstream('carapi').get(
                         f"{self.base_url}{endpoint}",
                         params=params,
                         headers=headers,
@@ -93,7 +382,7 @@ class CarAPIService:
 
                 if not endpoint.endswith('/v2'):
                     print(f"Endpoint {endpoint} deprecated, trying v2...")
-                    return self.make_request(endpoint, params, use_v2=True)
+                    return self.request_upstream(endpoint.rstrip('/') + '/v2', params)
 
             return {
                 'status_code': response.status_code,
@@ -116,189 +405,258 @@ class CarAPIService:
             }
 
 
-class CarAPIBaseView(APIView):
-    permission_classes = [AllowAny]
+carapi_service = CarAPIService()
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
-        self.service = CarAPIService()
 
-    def handle_response(self, result: Dict) -> Response:
-        """Convert service response to DRF Response"""
-        if result['status_code'] == 200:
-            data = result['data']
+def response_body(result: Dict) -> Tuple[Dict, int]:
+    """Client-facing body and status code for a ``CarAPIService`` result."""
+    if result['status_code'] != 200:
+        return {'success': False, 'error': result['error']}, result['status_code']
 
-            if isinstance(data, dict) and 'data' in data:
+    data = result['data']
+    if isinstance(data, dict) and 'data' in data:
+        return {
+            'success': True,
+            'data': data.get('data', []),
+            'collection': data.get('collection', {}),
+            'count': len(data.get('data', []))
+        }, status.HTTP_200_OK
 
-                return Response({
-                    'success': True,
-                    'data': data.get('data', []),
-                    'collection': data.get('collection', {}),
-                    'count': len(data.get('data', []))
-                }, status=status.HTTP_200_OK)
-            else:
+    return {
+        'success': True,
+        'data': data if isinstance(data, list) else [data],
+        'count': len(data) if isinstance(data, list) else 1
+    }, status.HTTP_200_OK
 
-                return Response({
-                    'success': True,
-                    'data': data if isinstance(data, list) else [data],
-                    'count': len(data) if isinstance(data, list) else 1
-                }, status=status.HTTP_200_OK)
 
+def is_true(value: Union[str, bool, None]) -> bool:
+    """Truthiness of a query param or JSON flag; ``"false"`` and ``"0"`` are false."""
+    return str(value or '').lower() in ('1', 'true', 'yes')
 
-class GetYearsAPIView(CarAPIBaseView):
 
-    def get(self, request):
-        result = self.service.make_request('/years', use_v2=True)
-        return self.handle_response(result)
+def stream_listing(result: Dict) -> Iterator[str]:
+    """JSON body of an ``all=true`` listing, written page by page as ``result['pages']`` yields them.
 
+    The status line is sent before later pages are fetched, so ``success`` and
+    ``error`` come last: a page that fails mid-stream ends the body with
+    ``"success": false`` and the items received so far.
+    """
+    yield '{"collection": ' + json.dumps(result['collection']) + ', "data": ['
+    count = 0
+    error = None
+    try:
+        for items in result['pages']:
+            if items:
+                yield (', ' if count else '') + ', '.join(json.dumps(item) for item in items)
+                count += len(items)
+    except Exception as e:
+        logger.warning(f"CarAPI all=true listing stopped: {e}")
+        error = str(e)
+    yield f'], "count": {count}, "success": {json.dumps(error is None)}, "error": {json.dumps(error)}}}'
 
-class GetMakesAPIView(CarAPIBaseView):
 
-    def get(self, request):
+class CarAPIBaseView(APIView):
+    """Proxies one CarAPI endpoint.
+
+    Subclasses declare the ``endpoint`` and the query params passed through to it;
+    the async views in ``async_views`` reuse these declarations.
+    """
+    permission_classes = [AllowAny]
+    service = carapi_service
+    endpoint = None
+    use_v2 = True
+    # Query params forwarded when present, followed by limit/page if ``paginated``.
+    # Paginated views also return every page in one streamed response with ``all=true``.
+    filter_params = ()
+    paginated = True
+
+    def get_endpoint(self, **kwargs) -> str:
+        return self.endpoint
+
+    def get_params(self, query) -> Dict:
         params = {}
 
-        if request.query_params.get('year'):
-            params['year'] = request.query_params.get('year')
+        for param in self.filter_params:
+            if query.get(param):
+                params[param] = query.get(param)
 
-        params['limit'] = request.query_params.get('limit', '100')
-        params['page'] = request.query_params.get('page', '1')
+        if self.paginated:
+            params['limit'] = query.get('limit', '100')
+            params['page'] = query.get('page', '1')
 
-        result = self.service.make_request('/makes', params, use_v2=True)
-        return self.handle_response(result)
+        return params
 
+    def validate(self, **kwargs) -> Optional[str]:
+        """Error message for invalid URL arguments, checked before any upstream call."""
+        return None
 
-class GetModelsAPIView(CarAPIBaseView):
+    def get(self, request, **kwargs):
+        error = self.validate(**kwargs)
+        if error:
+            return Response({
+                'success': False,
+                'error': error
+            }, status=status.HTTP_400_BAD_REQUEST)
 
-    def get(self, request):
-        params = {}
+        if self.paginated and is_true(request.query_params.get('all')):
+            return self.stream_response(self.service.list_all(
+                self.get_endpoint(**kwargs),
+                self.get_params(request.query_params),
+                use_v2=self.use_v2
+            ))
 
-        if request.query_params.get('year'):
-            params['year'] = request.query_params.get('year')
+        return self.handle_response(self.fetch(request.query_params, **kwargs))
 
-        if request.query_params.get('make'):
-            params['make'] = request.query_params.get('make')
+    def fetch(self, query, **kwargs) -> Dict:
+        return self.service.make_request(self.get_endpoint(**kwargs), self.get_params(query), use_v2=self.use_v2)
 
-        params['limit'] = request.query_params.get('limit', '100')
-        params['page'] = request.query_params.get('page', '1')
+    def stream_response(self, result: Dict):
+        """Stream an ``all=true`` listing from ``CarAPIService.list_all``, or return its error."""
+        if 'pages' not in result:
+            return self.handle_response(result)
 
-        result = self.service.make_request('/models', params, use_v2=True)
-        return self.handle_response(result)
+        response = StreamingHttpResponse(stream_listing(result), content_type='application/json')
+        if result.get('cache'):
+            response['X-Cache'] = result['cache']
+        return response
 
+    def handle_response(self, result: Dict) -> Response:
+        """Convert service response to DRF Response"""
+        body, status_code = response_body(result)
+        response = Response(body, status=status_code)
+        if result.get('cache'):
+            response['X-Cache'] = result['cache']
+        return response
 
-class GetSubmodelsAPIView(CarAPIBaseView):
 
-    def get(self, request):
+class GetYearsAPIView(CarAPIBaseView):
+    endpoint = '/years'
+    paginated = False
 
-        params = {}
 
-        if request.query_params.get('year'):
-            params['year'] = request.query_params.get('year')
+class GetMakesAPIView(CarAPIBaseView):
+    endpoint = '/makes'
+    filter_params = ('year',)
 
-        if request.query_params.get('make'):
-            params['make'] = request.query_params.get('make')
 
-        if request.query_params.get('model'):
-            params['model'] = request.query_params.get('model')
+class GetModelsAPIView(CarAPIBaseView):
+    endpoint = '/models'
+    filter_params = ('year', 'make')
 
-        params['limit'] = request.query_params.get('limit', '100')
-        params['page'] = request.query_params.get('page', '1')
 
-        if request.query_params.get('sort'):
-            params['sort'] = request.query_params.get('sort')
-            params['direction'] = request.query_params.get('direction', 'asc')
+class GetSubmodelsAPIView(CarAPIBaseView):
+    endpoint = '/submodels'
+    filter_params = ('year', 'make', 'model')
 
-        if request.query_params.get('search'):
-            params['search'] = request.query_params.get('search')
+    def get_params(self, query) -> Dict:
+        params = super().get_params(query)
 
-        result = self.service.make_request('/submodels', params, use_v2=True)
-        return self.handle_response(result)
+        if query.get('sort'):
+            params['sort'] = query.get('sort')
+            params['direction'] = query.get('direction', 'asc')
 
+        if query.get('search'):
+            params['search'] = query.get('search')
 
-class GetTrimsAPIView(CarAPIBaseView):
+        return params
 
-    def get(self, request):
-        params = {}
 
-        for param in ['year', 'make', 'model', 'submodel']:
-            if request.query_params.get(param):
-                params[param] = request.query_params.get(param)
+class GetTrimsAPIView(CarAPIBaseView):
+    endpoint = '/trims'
+    filter_params = ('year', 'make', 'model', 'submodel')
 
-        params['limit'] = request.query_params.get('limit', '100')
-        params['page'] = request.query_params.get('page', '1')
+    def get_params(self, query) -> Dict:
+        params = super().get_params(query)
 
-        if request.query_params.get('search'):
-            params['search'] = request.query_params.get('search')
+        if query.get('search'):
+            params['search'] = query.get('search')
 
-        result = self.service.make_request('/trims', params, use_v2=True)
-        return self.handle_response(result)
+        return params
 
 
 class GetBodiesAPIView(CarAPIBaseView):
-
-    def get(self, request):
-        params = {}
-
-        if request.query_params.get('trim_id'):
-            params['trim_id'] = request.query_params.get('trim_id')
-
-        for param in ['year', 'make', 'model']:
-            if request.query_params.get(param):
-                params[param] = request.query_params.get(param)
-
-        params['limit'] = request.query_params.get('limit', '100')
-        params['page'] = request.query_params.get('page', '1')
-
-        result = self.service.make_request('/bodies', params, use_v2=True)
-        return self.handle_response(result)
+    endpoint = '/bodies'
+    filter_params = ('trim_id', 'year', 'make', 'model')
 
 
 class GetEnginesAPIView(CarAPIBaseView):
-
-    def get(self, request):
-        params = {}
-
-        if request.query_params.get('trim_id'):
-            params['trim_id'] = request.query_params.get('trim_id')
-
-        for param in ['year', 'make', 'model']:
-            if request.query_params.get(param):
-                params[param] = request.query_params.get(param)
-
-        params['limit'] = request.query_params.get('limit', '100')
-        params['page'] = request.query_params.get('page', '1')
-
-        result = self.service.make_request('/engines', params, use_v2=True)
-        return self.handle_response(result)
+    endpoint = '/engines'
+    filter_params = ('trim_id', 'year', 'make', 'model')
 
 
 class GetMileagesAPIView(CarAPIBaseView):
+    endpoint = '/mileages'
+    filter_params = ('trim_id', 'year', 'make', 'model')
 
-    def get(self, request):
-        params = {}
 
-        if request.query_params.get('trim_id'):
-            params['trim_id'] = request.query_params.get('trim_id')
+class VINDecodeAPIView(CarAPIBaseView):
+    """Decodes a VIN from the persistent VIN cache; ``?basic=true`` accepts make/model/year only."""
+    paginated = False
 
-        for param in ['year', 'make', 'model']:
-            if request.query_params.get(param):
-                params[param] = request.query_params.get(param)
+    def validate(self, vin=None, **kwargs) -> Optional[str]:
+        return validate_vin(normalize_vin(vin))
 
-        params['limit'] = request.query_params.get('limit', '100')
-        params['page'] = request.query_params.get('page', '1')
+    def is_basic(self, query) -> bool:
+        return is_true(query.get('basic'))
 
-        result = self.service.make_request('/mileages', params, use_v2=True)
-        return self.handle_response(result)
+    def fetch(self, query, vin=None, **kwargs) -> Dict:
+        return self.service.decode_vin(normalize_vin(vin), basic=self.is_basic(query))
 
 
-class VINDecodeAPIView(CarAPIBaseView):
+class VINBatchDecodeAPIView(APIView):
+    """Decodes up to ``max_vins`` distinct VINs per request.
 
-    def get(self, request, vin):
-        if len(vin) != 17:
+    POST ``{"vins": [...], "basic": false}``; the response lists one result per
+    distinct VIN in request order, with its own status, data or error.
+    """
+    permission_classes = [AllowAny]
+    service = carapi_service
+    max_vins = 500
+
+    def parse_batch(self, data) -> Tuple[List[str], Dict[str, str], Optional[str]]:
+        """Distinct normalized VINs, the validation error of each invalid one, and any error with the request."""
+        vins = data.get('vins') if isinstance(data, dict) else None
+        if not isinstance(vins, list) or not all(isinstance(vin, str) for vin in vins):
+            return [], {}, 'Expected a JSON body with a "vins" list of strings'
+
+        distinct = list(dict.fromkeys(normalize_vin(vin) for vin in vins))
+        if len(distinct) > self.max_vins:
+            return [], {}, f'At most {self.max_vins} distinct VINs per request'
+
+        errors = {}
+        for vin in distinct:
+            error = validate_vin(vin)
+            if error:
+                errors[vin] = error
+        return distinct, errors, None
+
+    def is_basic(self, data: Dict) -> bool:
+        return is_true(data.get('basic'))
+
+    def batch_body(self, vins: List[str], errors: Dict[str, str], results: Dict[str, Dict]) -> Dict:
+        items = []
+        for vin in vins:
+            if vin in errors:
+                items.append({'vin': vin, 'status': status.HTTP_400_BAD_REQUEST, 'success': False, 'error': errors[vin]})
+                continue
+            body, status_code = response_body(results[vin])
+            items.append({'vin': vin, 'status': status_code, **body, 'cache': results[vin].get('cache')})
+
+        return {
+            'success': True,
+            'count': len(items),
+            'failed': sum(not item['success'] for item in items),
+            'results': items
+        }
+
+    def post(self, request):
+        vins, errors, error = self.parse_batch(request.data)
+        if error:
             return Response({
                 'success': False,
-                'error': 'VIN must be exactly 17 characters'
+                'error': error
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        result = self.service.make_request(f'/vin/{vin}')
-
-        return self.handle_response(result)
+        valid = [vin for vin in vins if vin not in errors]
+        results = self.service.decode_vins(valid, basic=self.is_basic(request.data))
+        return Response(self.batch_body(vins, errors, results), status=status.HTTP_200_OK)
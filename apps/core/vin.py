@@ -0,0 +1,136 @@
+"""VIN validation and the persistent decode cache behind ``VINDecodeAPIView``.
+
+Full decodes are kept forever in ``VINDecode``, since a VIN always decodes the
+same way; VINs the upstream rejects are kept for ``NEGATIVE_TTL`` so that
+retries of a bad VIN do not spend quota. Every decode also records make, model
+and year under the VIN's WMI + VDS + model year prefix in ``VINPrefix``, which
+answers basic lookups for other VINs of the same vehicle line.
+"""
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import VINDecode, VINPrefix
+
+NEGATIVE_TTL = timedelta(days=1)
+# Upstream answers that mean the VIN itself is bad, as opposed to an outage.
+REJECTED_STATUSES = {400, 404, 422}
+
+TRANSLITERATION = {
+    **{str(digit): digit for digit in range(10)},
+    'A': 1, 'B': 2, 'C': 3, 'D': 4, 'E': 5, 'F': 6, 'G': 7, 'H': 8,
+    'J': 1, 'K': 2, 'L': 3, 'M': 4, 'N': 5, 'P': 7, 'R': 9,
+    'S': 2, 'T': 3, 'U': 4, 'V': 5, 'W': 6, 'X': 7, 'Y': 8, 'Z': 9,
+}
+WEIGHTS = (8, 7, 6, 5, 4, 3, 2, 10, 0, 9, 8, 7, 6, 5, 4, 3, 2)
+# First WMI characters of North American manufacturers, whose VINs must carry a valid check digit.
+CHECK_DIGIT_REGIONS = frozenset('12345')
+
+
+def normalize_vin(vin: str) -> str:
+    return vin.strip().upper()
+
+
+def check_digit(vin: str) -> str:
+    total = sum(TRANSLITERATION[char] * weight for char, weight in zip(vin, WEIGHTS))
+    remainder = total % 11
+    return 'X' if remainder == 10 else str(remainder)
+
+
+def validate_vin(vin: str) -> Optional[str]:
+    """Error message for a malformed VIN, or ``None``.
+
+    The check digit (position 9) is only verified for North American VINs, since
+    other markets do not require one; ``CARAPI_VIN_CHECK_DIGIT = False`` skips it entirely.
+    """
+    if len(vin) != 17:
+        return 'VIN must be exactly 17 characters'
+    invalid = sorted(set(char for char in vin if char not in TRANSLITERATION))
+    if invalid:
+        return f"VIN contains invalid characters: {''.join(invalid)}"
+    checked = getattr(settings, 'CARAPI_VIN_CHECK_DIGIT', True) and vin[0] in CHECK_DIGIT_REGIONS
+    if checked and vin[8] != check_digit(vin):
+        return 'VIN check digit does not match'
+    return None
+
+
+def vin_prefix(vin: str) -> str:
+    """WMI and VDS (positions 1-8) plus the model year code (position 10)."""
+    return vin[:8] + vin[9]
+
+
+def decode_result(data: Optional[Dict], status_code: int, error: Optional[str], cache: str) -> Dict:
+    return {'status_code': status_code, 'data': data, 'error': error, 'cache': cache}
+
+
+def read_decodes(vins: List[str], basic: bool = False) -> Dict[str, Dict]:
+    """Stored decodes or rejections of any of ``vins``, by VIN, in one query.
+
+    With ``basic``, VINs without one are answered with make/model/year from their prefix.
+    """
+    results = {
+        decode.vin: decode_result(decode.data, decode.status_code, decode.error or None, 'HIT')
+        for decode in VINDecode.objects.filter(
+            Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now()), vin__in=vins
+        )
+    }
+
+    missing = [vin for vin in vins if vin not in results]
+    if basic and missing:
+        prefixes = {
+            prefix.prefix: prefix
+            for prefix in VINPrefix.objects.filter(prefix__in={vin_prefix(vin) for vin in missing})
+        }
+        for vin in missing:
+            prefix = prefixes.get(vin_prefix(vin))
+            if prefix is not None:
+                data = {'vin': vin, 'year': prefix.year, 'make': prefix.make, 'model': prefix.model}
+                results[vin] = decode_result(data, 200, None, 'PREFIX')
+
+    return results
+
+
+def store_decodes(results: Dict[str, Dict]) -> None:
+    """Persist upstream decodes, and rejections for ``NEGATIVE_TTL``; outages are not stored."""
+    now = timezone.now()
+    decodes = []
+    prefixes = {}
+    for vin, result in results.items():
+        status_code = result['status_code']
+        if status_code == 200 and result['data'] is not None:
+            data = result['data']
+            decodes.append(VINDecode(vin=vin, status_code=200, data=data, error='', expires_at=None))
+            if isinstance(data, dict) and data.get('make'):
+                year = data.get('year')
+                prefixes[vin_prefix(vin)] = VINPrefix(
+                    prefix=vin_prefix(vin),
+                    make=data.get('make'),
+                    model=data.get('model'),
+                    year=int(year) if str(year or '').isdigit() else None,
+                )
+        elif status_code in REJECTED_STATUSES:
+            decodes.append(VINDecode(
+                vin=vin,
+                status_code=status_code,
+                data=None,
+                error=result['error'] or '',
+                expires_at=now + NEGATIVE_TTL,
+            ))
+
+    if decodes:
+        VINDecode.objects.bulk_create(
+            decodes,
+            update_conflicts=True,
+            unique_fields=['vin'],
+            update_fields=['status_code', 'data', 'error', 'expires_at', 'updated_at'],
+        )
+    if prefixes:
+        VINPrefix.objects.bulk_create(
+            list(prefixes.values()),
+            update_conflicts=True,
+            unique_fields=['prefix'],
+            update_fields=['make', 'model', 'year', 'updated_at'],
+        )
@@ -3,6 +3,7 @@ from __future__ import absolute_import, unicode_literals
 import os
 
 from celery import Celery
+from celery.schedules import crontab
 from celery.signals import setup_logging
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
@@ -13,7 +14,10 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 app.conf.timezone = 'UTC'
 app.autodiscover_tasks()
 app.conf.beat_schedule = {
-
+    'sync-carapi-catalog': {
+        'task': 'apps.core.tasks.sync_carapi_catalog',
+        'schedule': crontab(hour=3, minute=30),
+    },
 }
 
 
@@ -210,6 +210,23 @@ CELERY_TIMEZONE = 'Europe/Kyiv'
 CELERY_ENABLE_UTC = False
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
 
+OPENDATASOFT_MAX_CONCURRENCY = int(getenv("OPENDATASOFT_MAX_CONCURRENCY", "4"))
+# Per-upstream overrides for apps.core.http_client.UPSTREAM_DEFAULTS, e.g.
+# {'carapi': {'rate': 5.0, 'max_attempts': 2}}
+UPSTREAM_LIMITS = {}
+# Per-endpoint cache TTLs (seconds) for CarAPI proxy responses, overriding CarAPIService.CACHE_TTLS,
+# e.g. {'/trims': 3600, '/mileages': 0}
+CARAPI_CACHE_TTLS = {}
+# Answer CarAPI catalog requests (years/makes/models/submodels/trims) from the local mirror
+# filled by the sync_carapi_catalog task, going upstream only when it has no matching rows
+CARAPI_CATALOG_MIRROR = True
+# Seconds after its last sync an endpoint's mirrored rows are still served; older or never
+# synced endpoints go upstream. The sync runs daily, so this tolerates one missed run.
+CARAPI_CATALOG_MAX_AGE = 2 * 24 * 60 * 60
+# Reject North American VINs (WMI starting with 1-5) whose check digit (position 9)
+# does not match before calling CarAPI; VINs from other markets are not checked.
+CARAPI_VIN_CHECK_DIGIT = True
+
 LOGS_DIR = Path(os.path.join(BASE_DIR, 'logs'))
 LOGS_DIR.mkdir(exist_ok=True)
 CELERY_LOGS_DIR = Path(os.path.join(LOGS_DIR, 'celery'))